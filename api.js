@@ -36,8 +36,9 @@ class ApiService {
     return this.request('/leagues')
   }
 
-  async syncLeagues() {
-    return this.request('/leagues/sync', { method: 'POST' })
+  async syncLeagues(options = {}) {
+    const job = await this.request('/leagues/sync', { method: 'POST' })
+    return this.waitForJob(job.job_id, options)
   }
 
   // Jogadores
@@ -46,11 +47,45 @@ class ApiService {
     return this.request(`/players/top${queryString ? `?${queryString}` : ''}`)
   }
 
-  async syncPlayers(leagueId, season = 2023) {
-    return this.request('/players/sync', {
+  // Página de /players/top: o cursor da próxima página vem no cabeçalho X-Next-Cursor
+  async getTopPlayersPage(params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    const response = await fetch(`${API_BASE_URL}/players/top${queryString ? `?${queryString}` : ''}`)
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`)
+    }
+
+    return { players: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') }
+  }
+
+  async syncPlayers(leagueId, season = 2023, options = {}) {
+    const job = await this.request('/players/sync', {
       method: 'POST',
       body: JSON.stringify({ league_id: leagueId, season })
     })
+    return this.waitForJob(job.job_id, options)
+  }
+
+  // Jobs de sincronização
+  async getJob(jobId) {
+    return this.request(`/jobs/${jobId}`)
+  }
+
+  async waitForJob(jobId, { interval = 2000, onProgress } = {}) {
+    while (true) {
+      const job = await this.getJob(jobId)
+      if (onProgress) {
+        onProgress(job)
+      }
+      if (job.status === 'finished') {
+        return job
+      }
+      if (job.status === 'failed') {
+        throw new Error(job.message || 'Falha na sincronização')
+      }
+      await new Promise((resolve) => setTimeout(resolve, interval))
+    }
   }
 
   // Rankings SPP
@@ -86,6 +121,20 @@ class ApiService {
     })
   }
 
+  async recalculateAllSeasons({ seasons, processes, staleOnly = false, ...options } = {}) {
+    const job = await this.request('/spp/recalculate/all', {
+      method: 'POST',
+      body: JSON.stringify({ seasons, processes, stale_only: staleOnly })
+    })
+    return this.waitForJob(job.job_id, options)
+  }
+
+  // URL da exportação da temporada (NDJSON ou CSV), para download direto
+  getSeasonExportUrl(season, params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    return `${API_BASE_URL}/export/season/${season}${queryString ? `?${queryString}` : ''}`
+  }
+
   async getStatsOverview(params = {}) {
     const queryString = new URLSearchParams(params).toString()
     return this.request(`/spp/stats/overview${queryString ? `?${queryString}` : ''}`)
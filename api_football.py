@@ -1,16 +1,108 @@
 import requests
+import random
+import threading
 import time
-from typing import Dict, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterator, List, Optional, Tuple
 import os
+from src.services.rate_limiter import TokenBucketLimiter
+from src.services.response_cache import ResponseCache
+from src.services.response_archive import ResponseArchive
+
+# Estado compartilhado do rate limiter (entre threads e workers)
+DEFAULT_STATE_DB = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'api_football_state.db')
+
+# Cache persistente das respostas da API
+DEFAULT_CACHE_DB = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'api_football_cache.db')
+
+# Arquivo append-only das respostas brutas (permite reconstruir o banco offline)
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'archive')
+
+# TTL (segundos) das respostas com dados correntes; temporadas encerradas nunca expiram
+CACHE_TTLS = {
+    '/status': 60,
+    '/leagues/seasons': 86400,
+    '/leagues': 86400,
+    '/teams': 86400,
+    '/players': 3600,
+    '/players/topscorers': 3600,
+    '/players/topassists': 3600,
+}
+
+# Mês a partir do qual a temporada do ano anterior é considerada encerrada
+# (ex: a temporada 2023 - 2023/24 na Europa - é fechada em julho de 2024)
+SEASON_CLOSING_MONTH = 7
+
+# Status HTTP considerados transitórios (vale a pena tentar novamente)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class APIFootballError(Exception):
+    """Erro definitivo ao consultar a API Football (após esgotar as tentativas)"""
+    pass
+
+
+class RequestStats:
+    """
+    Contadores de uso da API Football
+
+    Uma instância pode ser passada para os métodos do serviço para medir o
+    consumo de uma única sincronização (requisições, retentativas e falhas).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.cache_hits = 0
+
+    def record(self, requests: int = 0, retries: int = 0, failures: int = 0, cache_hits: int = 0):
+        with self._lock:
+            self.requests += requests
+            self.retries += retries
+            self.failures += failures
+            self.cache_hits += cache_hits
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'failures': self.failures,
+                'cache_hits': self.cache_hits
+            }
+
 
 class APIFootballService:
-    def __init__(self, api_key: str = None, base_url: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, pool_size: int = 10,
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0,
+                 max_retries: int = 4, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 rate_limiter: TokenBucketLimiter = None, cache: ResponseCache = None,
+                 archive: ResponseArchive = None):
         """
         Inicializa o serviço da API Football
         
         Args:
             api_key: Chave da API (se não fornecida, busca da variável de ambiente)
             base_url: URL base da API (padrão: API-Sports)
+            pool_size: Número máximo de conexões keep-alive mantidas no pool
+            connect_timeout: Timeout de conexão (segundos)
+            read_timeout: Timeout de leitura (segundos)
+            max_retries: Número máximo de retentativas em 429/5xx/erros de conexão
+            backoff_base: Espera base do backoff exponencial (segundos)
+            backoff_max: Espera máxima entre tentativas (segundos)
+            rate_limiter: Limiter de cotas (padrão: token bucket em SQLite local,
+                configurável via API_FOOTBALL_STATE_DB, API_FOOTBALL_RATE_PER_MINUTE
+                e API_FOOTBALL_RATE_PER_DAY)
+            cache: Cache persistente das respostas (padrão: SQLite local, configurável
+                via API_FOOTBALL_CACHE_DB e API_FOOTBALL_CACHE_MAX_MB; desativado
+                com API_FOOTBALL_CACHE_DISABLED=1)
+            archive: Arquivo das respostas brutas (padrão: gzip JSONL em
+                API_FOOTBALL_ARCHIVE_DIR; desativado com API_FOOTBALL_ARCHIVE_DISABLED=1)
         """
         self.api_key = api_key or os.getenv("API_FOOTBALL_KEY", "c8bb846369588ffd9c461ade376ed205")
         self.base_url = base_url or 'https://v3.football.api-sports.io'
@@ -23,46 +115,176 @@ class APIFootballService:
             'Content-Type': 'application/json'
         }
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 1  # 1 segundo entre requisições
+        # Sessão compartilhada com pool de conexões keep-alive
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        
+        # Retentativas com backoff exponencial e jitter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        
+        # Cache read-through das respostas
+        if cache is None and os.getenv('API_FOOTBALL_CACHE_DISABLED') != '1':
+            cache = ResponseCache(
+                os.getenv('API_FOOTBALL_CACHE_DB', DEFAULT_CACHE_DB),
+                max_bytes=int(os.getenv('API_FOOTBALL_CACHE_MAX_MB', 256)) * 1024 * 1024
+            )
+        self.cache = cache
         
-    def _make_request(self, endpoint: str, params: Dict = None) -> Dict:
+        # Arquivo das respostas brutas baixadas da rede
+        if archive is None and os.getenv('API_FOOTBALL_ARCHIVE_DISABLED') != '1':
+            archive = ResponseArchive(os.getenv('API_FOOTBALL_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+        self.archive = archive
+        
+        # Contadores acumulados desde a criação do serviço
+        self.stats = RequestStats()
+        
+        # Rate limiting (token bucket por minuto e por dia, ajustado pelos headers da API).
+        # Os valores iniciais só valem até a primeira resposta: os headers X-RateLimit-*
+        # trazem a cota real do plano e a reduzem (ou ampliam) a partir daí
+        self.rate_limiter = rate_limiter or TokenBucketLimiter(
+            os.getenv('API_FOOTBALL_STATE_DB', DEFAULT_STATE_DB),
+            per_minute=int(os.getenv('API_FOOTBALL_RATE_PER_MINUTE', 60)),
+            per_day=int(os.getenv('API_FOOTBALL_RATE_PER_DAY', 100))
+        )
+        
+    def _make_request(self, endpoint: str, params: Dict = None, stats: RequestStats = None) -> Dict:
         """
-        Faz uma requisição para a API com rate limiting
+        Faz uma requisição para a API, passando antes pelo cache de respostas
         
         Args:
             endpoint: Endpoint da API (ex: '/leagues')
             params: Parâmetros da query string
+            stats: Contadores da sincronização em andamento (opcional)
             
         Returns:
             Resposta da API em formato dict
         """
-        # Rate limiting
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last_request)
+        if self.cache is not None:
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                self._record(stats, cache_hits=1)
+                return cached
+        
+        result = self._fetch(endpoint, params, stats)
+        
+        # Respostas com erros (ex: cota excedida reportada no corpo) não são armazenadas
+        if not result.get('errors'):
+            if self.cache is not None:
+                self.cache.set(endpoint, params, result, self._cache_ttl(endpoint, params))
+            if self.archive is not None:
+                self.archive.append(endpoint, params, result)
         
+        return result
+    
+    def _cache_ttl(self, endpoint: str, params: Dict = None) -> Optional[float]:
+        """
+        Define o tempo de vida de uma resposta no cache
+        
+        Args:
+            endpoint: Endpoint da API
+            params: Parâmetros da query string
+            
+        Returns:
+            TTL em segundos, ou None (nunca expira) para temporadas encerradas
+        """
+        season = (params or {}).get('season')
+        if endpoint != '/status' and season is not None and _is_closed_season(int(season)):
+            return None
+        return CACHE_TTLS.get(endpoint, 3600)
+    
+    def _fetch(self, endpoint: str, params: Dict = None, stats: RequestStats = None) -> Dict:
+        """
+        Faz uma requisição para a API com rate limiting e retentativas
+        
+        Cada tentativa consome um token do rate limiter compartilhado, cujas
+        cotas são ajustadas pelos headers X-RateLimit-* de cada resposta.
+        
+        Erros transitórios (429, 5xx, falhas de conexão e timeouts) são repetidos
+        com backoff exponencial e jitter. Se as tentativas se esgotarem, ou se a
+        API responder com um erro definitivo, é lançado APIFootballError em vez de
+        devolver uma resposta vazia (o que interromperia a paginação em silêncio).
+        
+        Args:
+            endpoint: Endpoint da API (ex: '/leagues')
+            params: Parâmetros da query string
+            stats: Contadores da sincronização em andamento (opcional)
+            
+        Returns:
+            Resposta da API em formato dict
+        """
         url = f"{self.base_url}{endpoint}"
+        last_error = None
+        retry_after = None
         
-        try:
-            response = requests.get(url, headers=self.headers, params=params or {})
-            self.last_request_time = time.time()
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                self._record(stats, retries=1)
+                time.sleep(self._backoff_delay(attempt, retry_after))
+            
+            # Rate limiting (pode lançar RateLimitExceeded se a cota estiver esgotada)
+            self.rate_limiter.acquire()
+            
+            retry_after = None
+            try:
+                self._record(stats, requests=1)
+                response = self.session.get(url, params=params or {}, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.rate_limiter.release()
+                last_error = f"Erro na requisição: {e}"
+                continue
+            except requests.exceptions.RequestException as e:
+                self.rate_limiter.release()
+                self._record(stats, failures=1)
+                raise APIFootballError(f"Erro na requisição: {e}") from e
+            
+            self.rate_limiter.update_from_headers(response.headers)
             
             if response.status_code == 200:
                 return response.json()
             elif response.status_code == 204:
                 return {'response': []}  # No content
+            elif response.status_code in RETRY_STATUS_CODES:
+                last_error = f"Erro na API: {response.status_code} - {response.text}"
+                retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                continue
             else:
-                print(f"Erro na API: {response.status_code} - {response.text}")
-                return {'response': []}
-                
-        except requests.exceptions.RequestException as e:
-            print(f"Erro na requisição: {e}")
-            return {'response': []}
+                self._record(stats, failures=1)
+                raise APIFootballError(f"Erro na API: {response.status_code} - {response.text}")
+        
+        self._record(stats, failures=1)
+        raise APIFootballError(f"{last_error} (após {self.max_retries + 1} tentativas)")
+    
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Calcula a espera antes da próxima tentativa (full jitter)
+        
+        Args:
+            attempt: Número da tentativa (1 = primeira retentativa)
+            retry_after: Espera sugerida pelo header Retry-After, se houver
+            
+        Returns:
+            Tempo de espera em segundos
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+    
+    def _record(self, stats: Optional[RequestStats], requests: int = 0, retries: int = 0,
+                failures: int = 0, cache_hits: int = 0):
+        """Atualiza os contadores globais e os da sincronização em andamento"""
+        self.stats.record(requests=requests, retries=retries, failures=failures, cache_hits=cache_hits)
+        if stats is not None:
+            stats.record(requests=requests, retries=retries, failures=failures, cache_hits=cache_hits)
     
-    def get_leagues(self, country: str = None, season: int = None, current: bool = True) -> List[Dict]:
+    def get_leagues(self, country: str = None, season: int = None, current: bool = True,
+                    stats: RequestStats = None) -> List[Dict]:
         """
         Obtém lista de ligas
         
@@ -70,6 +292,7 @@ class APIFootballService:
             country: País da liga (ex: 'England', 'Spain')
             season: Temporada (ex: 2023)
             current: Apenas ligas ativas
+            stats: Contadores da sincronização em andamento (opcional)
             
         Returns:
             Lista de ligas
@@ -82,16 +305,17 @@ class APIFootballService:
         if current:
             params['current'] = 'true'
             
-        result = self._make_request('/leagues', params)
+        result = self._make_request('/leagues', params, stats=stats)
         return result.get('response', [])
     
-    def get_teams(self, league_id: int, season: int) -> List[Dict]:
+    def get_teams(self, league_id: int, season: int, stats: RequestStats = None) -> List[Dict]:
         """
         Obtém times de uma liga específica
         
         Args:
             league_id: ID da liga
             season: Temporada
+            stats: Contadores da sincronização em andamento (opcional)
             
         Returns:
             Lista de times
@@ -101,10 +325,11 @@ class APIFootballService:
             'season': season
         }
         
-        result = self._make_request('/teams', params)
+        result = self._make_request('/teams', params, stats=stats)
         return result.get('response', [])
     
-    def get_players_statistics(self, league_id: int, season: int, team_id: int = None, page: int = 1) -> List[Dict]:
+    def get_players_statistics(self, league_id: int, season: int, team_id: int = None, page: int = 1,
+                               stats: RequestStats = None) -> List[Dict]:
         """
         Obtém estatísticas de jogadores
         
@@ -113,10 +338,29 @@ class APIFootballService:
             season: Temporada
             team_id: ID do time (opcional)
             page: Página para paginação
+            stats: Contadores da sincronização em andamento (opcional)
             
         Returns:
             Lista de estatísticas de jogadores
         """
+        result = self.get_players_statistics_page(league_id, season, team_id=team_id, page=page, stats=stats)
+        return result.get('response', [])
+    
+    def get_players_statistics_page(self, league_id: int, season: int, team_id: int = None, page: int = 1,
+                                    stats: RequestStats = None) -> Dict:
+        """
+        Obtém uma página de estatísticas de jogadores, incluindo a paginação
+        
+        Args:
+            league_id: ID da liga
+            season: Temporada
+            team_id: ID do time (opcional)
+            page: Página para paginação
+            stats: Contadores da sincronização em andamento (opcional)
+            
+        Returns:
+            Resposta completa da API (chaves 'response' e 'paging')
+        """
         params = {
             'league': league_id,
             'season': season,
@@ -126,16 +370,72 @@ class APIFootballService:
         if team_id:
             params['team'] = team_id
             
-        result = self._make_request('/players', params)
-        return result.get('response', [])
+        return self._make_request('/players', params, stats=stats)
+    
+    def iter_players_statistics_pages(self, league_id: int, season: int, team_id: int = None,
+                                      start_page: int = 1, max_workers: int = 4,
+                                      stats: RequestStats = None) -> Iterator[Tuple[int, int, List[Dict]]]:
+        """
+        Percorre todas as páginas de estatísticas de jogadores, buscando em paralelo
+        
+        A primeira página é buscada sozinha para descobrir o total de páginas
+        (``paging.total``); as demais são buscadas por um pool de threads com
+        paralelismo limitado pelo parâmetro e pela cota por minuto do rate
+        limiter. As páginas são entregues sempre em ordem.
+        
+        Args:
+            league_id: ID da liga
+            season: Temporada
+            team_id: ID do time (opcional)
+            start_page: Primeira página a buscar (permite retomar uma sincronização)
+            max_workers: Número máximo de requisições simultâneas
+            stats: Contadores da sincronização em andamento (opcional)
+            
+        Yields:
+            Tuplas (página, total de páginas, lista de estatísticas de jogadores)
+        """
+        first = self.get_players_statistics_page(league_id, season, team_id=team_id, page=start_page, stats=stats)
+        total_pages = max(int((first.get('paging') or {}).get('total') or start_page), start_page)
+        yield start_page, total_pages, first.get('response', [])
+        
+        pages = list(range(start_page + 1, total_pages + 1))
+        if not pages:
+            return
+        
+        minute_capacity = self.rate_limiter.status().get('minute', {}).get('capacity', max_workers)
+        workers = max(1, min(max_workers, len(pages), int(minute_capacity)))
+        
+        def fetch(page: int) -> List[Dict]:
+            return self.get_players_statistics(league_id, season, team_id=team_id, page=page, stats=stats)
+        
+        # Janela deslizante: mantém no máximo 2x workers páginas em voo/em memória
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            next_index = 0
+            try:
+                while next_index < len(pages) and len(pending) < workers * 2:
+                    pending.append((pages[next_index], executor.submit(fetch, pages[next_index])))
+                    next_index += 1
+                
+                while pending:
+                    page, future = pending.popleft()
+                    players = future.result()
+                    if next_index < len(pages):
+                        pending.append((pages[next_index], executor.submit(fetch, pages[next_index])))
+                        next_index += 1
+                    yield page, total_pages, players
+            finally:
+                for _, future in pending:
+                    future.cancel()
     
-    def get_top_scorers(self, league_id: int, season: int) -> List[Dict]:
+    def get_top_scorers(self, league_id: int, season: int, stats: RequestStats = None) -> List[Dict]:
         """
         Obtém artilheiros de uma liga
         
         Args:
             league_id: ID da liga
             season: Temporada
+            stats: Contadores da sincronização em andamento (opcional)
             
         Returns:
             Lista de artilheiros
@@ -145,16 +445,17 @@ class APIFootballService:
             'season': season
         }
         
-        result = self._make_request('/players/topscorers', params)
+        result = self._make_request('/players/topscorers', params, stats=stats)
         return result.get('response', [])
     
-    def get_top_assists(self, league_id: int, season: int) -> List[Dict]:
+    def get_top_assists(self, league_id: int, season: int, stats: RequestStats = None) -> List[Dict]:
         """
         Obtém jogadores com mais assistências
         
         Args:
             league_id: ID da liga
             season: Temporada
+            stats: Contadores da sincronização em andamento (opcional)
             
         Returns:
             Lista de jogadores com mais assistências
@@ -164,29 +465,50 @@ class APIFootballService:
             'season': season
         }
         
-        result = self._make_request('/players/topassists', params)
+        result = self._make_request('/players/topassists', params, stats=stats)
         return result.get('response', [])
     
-    def get_seasons(self) -> List[int]:
+    def get_seasons(self, stats: RequestStats = None) -> List[int]:
         """
         Obtém lista de temporadas disponíveis
         
+        Args:
+            stats: Contadores da sincronização em andamento (opcional)
+        
         Returns:
             Lista de anos das temporadas
         """
-        result = self._make_request('/leagues/seasons')
+        result = self._make_request('/leagues/seasons', stats=stats)
         return result.get('response', [])
     
-    def get_api_status(self) -> Dict:
+    def get_api_status(self, stats: RequestStats = None) -> Dict:
         """
         Obtém status da API e informações da conta
         
+        Args:
+            stats: Contadores da sincronização em andamento (opcional)
+        
         Returns:
             Informações sobre limites e uso da API
         """
-        result = self._make_request('/status')
+        result = self._make_request('/status', stats=stats)
         return result.get('response', {})
 
+def _is_closed_season(season: int, now: datetime = None) -> bool:
+    """Indica se a temporada já terminou (seus dados não mudam mais)"""
+    now = now or datetime.now()
+    closing_year = season + 1
+    return (now.year, now.month) >= (closing_year, SEASON_CLOSING_MONTH)
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converte o header Retry-After (em segundos) para float"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
 # Configuração das principais ligas e seus multiplicadores SPP
 LEAGUE_CONFIG = {
     # Premier League (Inglaterra)
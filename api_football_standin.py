@@ -0,0 +1,348 @@
+"""
+Servidor local que imita a API-Football (v3) para testes de carga da sincronização
+
+Uso:
+    python -m src.services.api_football_standin --port 8081 --latency 0.05 --error-rate 0.02
+
+e depois:
+    APIFootballService(base_url='http://localhost:8081')
+
+Os dados são sintéticos e determinísticos (semente fixa) ou, com --archive-dir,
+as respostas gravadas pelo ResponseArchive.
+"""
+import argparse
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from flask import Flask, jsonify, request
+from src.services.api_football import LEAGUE_CONFIG
+from src.services.response_archive import ResponseArchive
+
+PAGE_SIZE = 20
+
+POSITIONS = ['Goalkeeper', 'Defender', 'Defender', 'Defender', 'Defender',
+             'Midfielder', 'Midfielder', 'Midfielder', 'Attacker', 'Attacker']
+
+
+class SyntheticDataset:
+    """Ligas, times e jogadores gerados de forma determinística"""
+
+    def __init__(self, seasons: List[int], teams_per_league: int = 20, players_per_team: int = 25, seed: int = 42):
+        self.seasons = seasons
+        self.teams_per_league = teams_per_league
+        self.players_per_team = players_per_team
+        self.seed = seed
+        self._players_cache = {}
+        self._lock = threading.Lock()
+
+    def leagues(self) -> List[Dict]:
+        return [
+            {
+                'league': {
+                    'id': league_id,
+                    'name': config['name'],
+                    'type': 'Cup' if config['country'] in ('World', 'South America') else 'League',
+                    'logo': f'https://media.api-sports.io/football/leagues/{league_id}.png'
+                },
+                'country': {'name': config['country'], 'code': None, 'flag': None},
+                'seasons': [{'year': season, 'current': season == max(self.seasons)} for season in self.seasons]
+            }
+            for league_id, config in LEAGUE_CONFIG.items()
+        ]
+
+    def teams(self, league_id: int, season: int) -> List[Dict]:
+        return [
+            {
+                'team': {
+                    'id': league_id * 1000 + index,
+                    'name': f"{LEAGUE_CONFIG.get(league_id, {}).get('name', 'Liga')} FC {index}",
+                    'code': f'T{index:02d}',
+                    'country': LEAGUE_CONFIG.get(league_id, {}).get('country'),
+                    'founded': 1880 + index,
+                    'national': False,
+                    'logo': f'https://media.api-sports.io/football/teams/{league_id * 1000 + index}.png'
+                },
+                'venue': {}
+            }
+            for index in range(1, self.teams_per_league + 1)
+        ]
+
+    def players(self, league_id: int, season: int) -> List[Dict]:
+        """Todos os jogadores da liga/temporada (memoizado)"""
+        key = (league_id, season)
+        with self._lock:
+            if key not in self._players_cache:
+                self._players_cache[key] = self._generate_players(league_id, season)
+            return self._players_cache[key]
+
+    def _generate_players(self, league_id: int, season: int) -> List[Dict]:
+        rng = random.Random(f'{self.seed}-{league_id}-{season}')
+        league = {
+            'id': league_id,
+            'name': LEAGUE_CONFIG.get(league_id, {}).get('name', 'Liga'),
+            'country': LEAGUE_CONFIG.get(league_id, {}).get('country'),
+            'season': season
+        }
+        players = []
+        for team in self.teams(league_id, season):
+            team_info = {'id': team['team']['id'], 'name': team['team']['name'], 'logo': team['team']['logo']}
+            for number in range(1, self.players_per_team + 1):
+                # IDs estáveis entre temporadas: o mesmo jogador aparece em várias
+                player_id = team_info['id'] * 100 + number
+                position = POSITIONS[number % len(POSITIONS)]
+                appearences = rng.randint(0, 38)
+                minutes = appearences * rng.randint(20, 90)
+                attacking = {'Goalkeeper': 0.0, 'Defender': 0.05, 'Midfielder': 0.15, 'Attacker': 0.4}[position]
+                players.append({
+                    'player': {
+                        'id': player_id,
+                        'name': f'J. Player{player_id}',
+                        'firstname': 'Jogador',
+                        'lastname': f'Player{player_id}',
+                        'age': rng.randint(17, 38),
+                        'birth': {'date': f'{season - rng.randint(17, 38)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}',
+                                  'place': None, 'country': league['country']},
+                        'nationality': league['country'],
+                        'height': f'{rng.randint(165, 200)} cm',
+                        'weight': f'{rng.randint(60, 95)} kg',
+                        'injured': False,
+                        'photo': f'https://media.api-sports.io/football/players/{player_id}.png'
+                    },
+                    'statistics': [{
+                        'team': team_info,
+                        'league': league,
+                        'games': {
+                            'appearences': appearences,
+                            'lineups': rng.randint(0, appearences),
+                            'minutes': minutes,
+                            'number': number,
+                            'position': position,
+                            'rating': f'{rng.uniform(6.0, 8.5):.6f}' if appearences else None,
+                            'captain': number == 5 and rng.random() < 0.5
+                        },
+                        'goals': {
+                            'total': int(appearences * attacking * rng.random()),
+                            'conceded': rng.randint(0, appearences * 2) if position == 'Goalkeeper' else 0,
+                            'assists': int(appearences * attacking * 0.6 * rng.random()),
+                            'saves': rng.randint(0, appearences * 4) if position == 'Goalkeeper' else None
+                        },
+                        'passes': {'total': minutes // 3, 'key': rng.randint(0, appearences * 2),
+                                   'accuracy': rng.randint(60, 95)},
+                        'tackles': {'total': rng.randint(0, appearences * 3), 'blocks': rng.randint(0, appearences),
+                                    'interceptions': rng.randint(0, appearences * 2)},
+                        'duels': {'total': rng.randint(0, appearences * 10), 'won': rng.randint(0, appearences * 5)},
+                        'dribbles': {'attempts': rng.randint(0, appearences * 3), 'success': rng.randint(0, appearences * 2),
+                                     'past': None},
+                        'fouls': {'drawn': rng.randint(0, appearences * 2), 'committed': rng.randint(0, appearences * 2)},
+                        'cards': {'yellow': rng.randint(0, 10), 'yellowred': 0, 'red': int(rng.random() < 0.1)},
+                        'penalty': {'won': None, 'commited': None, 'scored': rng.randint(0, 3) if position == 'Attacker' else 0,
+                                    'missed': int(rng.random() < 0.1), 'saved': None}
+                    }]
+                })
+        return players
+
+
+class RateLimitState:
+    """Contadores de cota do servidor (por minuto e por dia)"""
+
+    def __init__(self, per_minute: int, per_day: int):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self._lock = threading.Lock()
+        self._minute_window = int(time.time() // 60)
+        self._minute_count = 0
+        self._day_count = 0
+
+    def consume(self) -> Tuple[bool, Dict[str, str]]:
+        """Registra uma requisição; retorna (permitida, headers de cota)"""
+        with self._lock:
+            window = int(time.time() // 60)
+            if window != self._minute_window:
+                self._minute_window = window
+                self._minute_count = 0
+
+            allowed = self._minute_count < self.per_minute and self._day_count < self.per_day
+            if allowed:
+                self._minute_count += 1
+                self._day_count += 1
+
+            headers = {
+                'x-ratelimit-requests-limit': str(self.per_day),
+                'x-ratelimit-requests-remaining': str(max(self.per_day - self._day_count, 0)),
+                'X-RateLimit-Limit': str(self.per_minute),
+                'X-RateLimit-Remaining': str(max(self.per_minute - self._minute_count, 0))
+            }
+            return allowed, headers
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {'current': self._day_count, 'limit_day': self.per_day}
+
+
+def create_standin_app(seasons: List[int] = None, latency: float = 0.0, jitter: float = 0.0,
+                       error_rate: float = 0.0, rate_per_minute: int = 300, rate_per_day: int = 7500,
+                       archive_dir: str = None, seed: int = 42) -> Flask:
+    """
+    Cria o app Flask do servidor stand-in
+
+    Args:
+        seasons: Temporadas disponíveis nos dados sintéticos
+        latency: Latência fixa por requisição (segundos)
+        jitter: Latência adicional aleatória máxima (segundos)
+        error_rate: Fração de requisições respondidas com 500/503
+        rate_per_minute: Cota por minuto (acima dela responde 429)
+        rate_per_day: Cota diária
+        archive_dir: Serve as respostas gravadas neste ResponseArchive em vez de dados sintéticos
+        seed: Semente dos dados sintéticos e dos erros injetados
+
+    Returns:
+        App Flask
+    """
+    app = Flask(__name__)
+    dataset = SyntheticDataset(seasons or [2021, 2022, 2023])
+    recorded = _load_recorded(archive_dir) if archive_dir else None
+    limits = RateLimitState(rate_per_minute, rate_per_day)
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    def envelope(endpoint: str, response, page: int = 1, total: int = 1, errors=None):
+        return {
+            'get': endpoint.strip('/'),
+            'parameters': request.args.to_dict(),
+            'errors': errors or [],
+            'results': len(response) if isinstance(response, list) else 1,
+            'paging': {'current': page, 'total': total},
+            'response': response
+        }
+
+    def paginate(endpoint: str, items: List[Dict]):
+        page = request.args.get('page', 1, type=int)
+        total = max((len(items) + PAGE_SIZE - 1) // PAGE_SIZE, 1)
+        start = (page - 1) * PAGE_SIZE
+        return envelope(endpoint, items[start:start + PAGE_SIZE], page, total)
+
+    def handle(endpoint: str, build):
+        with rng_lock:
+            delay = latency + (rng.uniform(0, jitter) if jitter else 0.0)
+            fail = rng.random() < error_rate
+            status = rng.choice([500, 503])
+        if delay:
+            time.sleep(delay)
+
+        allowed, headers = limits.consume()
+        if not allowed:
+            body = envelope(endpoint, [], errors={'rateLimit': 'Too many requests. Your rate limit is exceeded.'})
+            return jsonify(body), 429, headers
+        if fail:
+            return jsonify({'message': 'Erro injetado pelo stand-in'}), status, headers
+
+        if recorded is not None:
+            payload = recorded.get(_recorded_key(endpoint, request.args.to_dict()))
+            if payload is None:
+                payload = envelope(endpoint, [])
+            return jsonify(payload), 200, headers
+
+        return jsonify(build()), 200, headers
+
+    @app.route('/leagues')
+    def leagues():
+        return handle('/leagues', lambda: envelope('/leagues', [
+            league for league in dataset.leagues()
+            if not request.args.get('id') or str(league['league']['id']) == request.args.get('id')
+        ]))
+
+    @app.route('/leagues/seasons')
+    def seasons_route():
+        return handle('/leagues/seasons', lambda: envelope('/leagues/seasons', dataset.seasons))
+
+    @app.route('/teams')
+    def teams():
+        league_id = request.args.get('league', type=int)
+        season = request.args.get('season', type=int)
+        return handle('/teams', lambda: envelope('/teams', dataset.teams(league_id, season)))
+
+    @app.route('/players')
+    def players():
+        league_id = request.args.get('league', type=int)
+        season = request.args.get('season', type=int)
+        team_id = request.args.get('team', type=int)
+
+        def build():
+            items = dataset.players(league_id, season) if season in dataset.seasons else []
+            if team_id:
+                items = [item for item in items if item['statistics'][0]['team']['id'] == team_id]
+            return paginate('/players', items)
+
+        return handle('/players', build)
+
+    @app.route('/players/topscorers')
+    def top_scorers():
+        league_id = request.args.get('league', type=int)
+        season = request.args.get('season', type=int)
+        return handle('/players/topscorers', lambda: envelope('/players/topscorers', _top(
+            dataset.players(league_id, season), 'total')))
+
+    @app.route('/players/topassists')
+    def top_assists():
+        league_id = request.args.get('league', type=int)
+        season = request.args.get('season', type=int)
+        return handle('/players/topassists', lambda: envelope('/players/topassists', _top(
+            dataset.players(league_id, season), 'assists')))
+
+    @app.route('/status')
+    def status():
+        return handle('/status', lambda: envelope('/status', {
+            'account': {'firstname': 'Stand-in', 'lastname': 'Local', 'email': 'standin@localhost'},
+            'subscription': {'plan': 'Stand-in', 'end': None, 'active': True},
+            'requests': limits.to_dict()
+        }))
+
+    return app
+
+
+def _top(players: List[Dict], goals_key: str) -> List[Dict]:
+    return sorted(players, key=lambda item: -(item['statistics'][0]['goals'][goals_key] or 0))[:20]
+
+
+def _recorded_key(endpoint: str, params: Dict) -> Tuple:
+    return endpoint, tuple(sorted((str(k), str(v)) for k, v in params.items()))
+
+
+def _load_recorded(archive_dir: str) -> Dict[Tuple, Dict]:
+    """Indexa as respostas do arquivo (a mais recente de cada requisição prevalece)"""
+    recorded = {}
+    for record in ResponseArchive(archive_dir).iter_records():
+        recorded[_recorded_key(record['endpoint'], record['params'])] = record['payload']
+    return recorded
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Servidor local que imita a API-Football')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--seasons', default='2021,2022,2023', help='Temporadas sintéticas (separadas por vírgula)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latência fixa por requisição (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Latência aleatória adicional máxima (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fração de respostas 500/503')
+    parser.add_argument('--rate-per-minute', type=int, default=300)
+    parser.add_argument('--rate-per-day', type=int, default=7500)
+    parser.add_argument('--archive-dir', default=None, help='Serve respostas gravadas pelo ResponseArchive')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    app = create_standin_app(
+        seasons=[int(season) for season in args.seasons.split(',') if season],
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_per_minute=args.rate_per_minute,
+        rate_per_day=args.rate_per_day,
+        archive_dir=args.archive_dir,
+        seed=args.seed
+    )
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
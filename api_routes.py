@@ -1,8 +1,22 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import db
 from src.models.league import League
-from src.models.player import Player, Team, PlayerStatistics
+from src.models.player import PlayerStatistics
+from src.models.job import SyncJob, SyncCheckpoint
 from src.services.api_football import APIFootballService, LEAGUE_CONFIG
+from src.services.jobs import JobProgress, job_runner
+from src.services.sync_service import sync_leagues as sync_leagues_from_api, sync_league_players
+from src.services.sync_orchestrator import run_full_sync
+from src.services.leaderboard_service import (
+    read_leaderboard, rebuild_leaderboards, decode_cursor, next_cursor, payload_cursor_key, ALL_SEASONS
+)
+from src.services.ranking_fields import (
+    FULL_FIELDS, iter_ranking_page, parse_fields, parse_limit, pick_fields, ranking_key_at, ranking_page
+)
+from src.services.json_stream import should_stream, stream_array
+from src.services.ranking_cache import cached_ranking, conditional_get, current_data_version, ranking_cache
+from src.services.ranking_snapshot import snapshot_stats
+from src.services.rank_index import rank_indexes
 import os
 
 api_bp = Blueprint('api', __name__)
@@ -26,6 +40,21 @@ def get_api_status():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/status/client', methods=['GET'])
+def get_client_status():
+    """Retorna contadores locais do cliente da API (requisições, cache e cotas)"""
+    if not api_service:
+        return jsonify({'error': 'API Football não configurada'}), 500
+    
+    try:
+        return jsonify({
+            'requests': api_service.stats.to_dict(),
+            'cache': api_service.cache.stats() if api_service.cache else None,
+            'rate_limit': api_service.rate_limiter.status()
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/leagues', methods=['GET'])
 def get_leagues():
     """Retorna lista de ligas monitoradas"""
@@ -37,84 +66,67 @@ def get_leagues():
 
 @api_bp.route('/leagues/sync', methods=['POST'])
 def sync_leagues():
-    """Sincroniza ligas da API Football com o banco local"""
+    """Enfileira a sincronização das ligas da API Football com o banco local"""
     if not api_service:
         return jsonify({'error': 'API Football não configurada'}), 500
     
     try:
-        synced_count = 0
-        
-        for league_id, config in LEAGUE_CONFIG.items():
-            # Buscar liga na API
-            leagues_data = api_service.get_leagues()
-            
-            # Encontrar a liga específica
-            league_data = None
-            for league in leagues_data:
-                if league['league']['id'] == league_id:
-                    league_data = league
-                    break
-            
-            if not league_data:
-                continue
-            
-            # Verificar se já existe no banco
-            existing_league = League.query.filter_by(id=league_id).first()
-            
-            if existing_league:
-                # Atualizar dados existentes
-                existing_league.name = league_data['league']['name']
-                existing_league.country = config['country']
-                existing_league.logo = league_data['league']['logo']
-                existing_league.type = league_data['league']['type']
-                existing_league.spp_multiplier = config['multiplier']
-            else:
-                # Criar nova liga
-                new_league = League(
-                    id=league_id,
-                    name=league_data['league']['name'],
-                    country=config['country'],
-                    logo=league_data['league']['logo'],
-                    type=league_data['league']['type'],
-                    spp_multiplier=config['multiplier']
-                )
-                db.session.add(new_league)
-            
-            synced_count += 1
-        
-        db.session.commit()
-        return jsonify({'message': f'{synced_count} ligas sincronizadas com sucesso'})
+        job = job_runner.submit('leagues', _leagues_sync_job)
+        return jsonify({
+            'message': 'Sincronização de ligas enfileirada',
+            'job_id': job.id,
+            'status_url': f'/api/jobs/{job.id}'
+        }), 202
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/status/cache', methods=['GET'])
+def get_cache_status():
+    """Retorna a versão dos dados, os contadores do cache de rankings e os snapshots e índices de posição deste processo"""
+    try:
+        return jsonify({
+            'data_version': current_data_version(),
+            'rankings': ranking_cache.stats(),
+            'snapshots': snapshot_stats(),
+            'rank_indexes': rank_indexes.stats()
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/players/top', methods=['GET'])
+@conditional_get
+@cached_ranking
 def get_top_players():
     """Retorna ranking dos melhores jogadores por pontuação SPP"""
     try:
-        limit = request.args.get('limit', 50, type=int)
         league_id = request.args.get('league_id', type=int)
         continent = request.args.get('continent', type=str)
+        try:
+            limit = parse_limit(request.args.get('limit'), 50)
+            after = decode_cursor(request.args.get('cursor'))
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        first_rank = after[2] + 1 if after else 1
         
-        query = db.session.query(
-            Player,
-            PlayerStatistics,
-            League,
-            Team
-        ).join(
-            PlayerStatistics, Player.id == PlayerStatistics.player_id
-        ).join(
-            League, PlayerStatistics.league_id == League.id
-        ).join(
-            Team, PlayerStatistics.team_id == Team.id
-        ).order_by(
-            PlayerStatistics.spp_score.desc()
-        )
+        # Rankings materializados (todas as temporadas); os dois filtros juntos consultam as tabelas
+        materialized = None
+        if league_id and not continent:
+            materialized = read_leaderboard(ALL_SEASONS, 'top_league', league_id, limit=limit, after=after)
+        elif continent and not league_id:
+            materialized = read_leaderboard(ALL_SEASONS, 'top_continent', continent, limit=limit, after=after)
+        elif not league_id and not continent:
+            materialized = read_leaderboard(ALL_SEASONS, 'top', limit=limit, after=after)
+        if materialized is not None:
+            players_data = [pick_fields(payload, fields, rank) if fields else payload for rank, payload in materialized]
+            return _top_players_page(players_data, payload_cursor_key(*materialized[-1]), limit)
         
         # Filtros opcionais
+        filters = []
         if league_id:
-            query = query.filter(PlayerStatistics.league_id == league_id)
+            filters.append(PlayerStatistics.league_id == league_id)
         
         if continent:
             # Filtrar por continente baseado na configuração das ligas
@@ -122,26 +134,26 @@ def get_top_players():
                 lid for lid, config in LEAGUE_CONFIG.items() 
                 if config.get('continent') == continent
             ]
-            query = query.filter(PlayerStatistics.league_id.in_(continent_leagues))
+            filters.append(PlayerStatistics.league_id.in_(continent_leagues))
         
-        results = query.limit(limit).all()
+        # Colunas lidas como tuplas, sem entidades ORM
+        if should_stream(limit):
+            # O cursor vai no cabeçalho: a chave do último item é lida antes de transmitir
+            cursor = next_cursor(ranking_key_at(filters, after, limit), limit, limit)
+            return stream_array(
+                iter_ranking_page(filters, limit, after=after, fields=fields or FULL_FIELDS),
+                headers={'X-Next-Cursor': cursor} if cursor else None
+            )
+        players_data, last_key = ranking_page(filters, limit, after=after, fields=fields or FULL_FIELDS)
         
-        players_data = []
-        for player, stats, league, team in results:
-            player_dict = player.to_dict()
-            player_dict['statistics'] = stats.to_dict()
-            player_dict['league'] = league.to_dict()
-            player_dict['team'] = team.to_dict()
-            players_data.append(player_dict)
-        
-        return jsonify(players_data)
+        return _top_players_page(players_data, last_key, limit)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/players/sync', methods=['POST'])
 def sync_players():
-    """Sincroniza jogadores e estatísticas de uma liga específica"""
+    """Enfileira a sincronização de jogadores e estatísticas de uma liga específica"""
     if not api_service:
         return jsonify({'error': 'API Football não configurada'}), 500
     
@@ -157,176 +169,109 @@ def sync_players():
         if not league:
             return jsonify({'error': 'Liga não encontrada'}), 404
         
-        synced_players = 0
-        page = 1
-        
-        while True:
-            # Buscar jogadores da API
-            players_data = api_service.get_players_statistics(league_id, season, page=page)
-            
-            if not players_data:
-                break
-            
-            for player_data in players_data:
-                player_info = player_data['player']
-                statistics = player_data['statistics'][0] if player_data['statistics'] else {}
-                
-                # Sincronizar time
-                team_info = statistics.get('team', {})
-                if team_info:
-                    team = Team.query.filter_by(id=team_info['id']).first()
-                    if not team:
-                        team = Team(
-                            id=team_info['id'],
-                            name=team_info['name'],
-                            logo=team_info['logo']
-                        )
-                        db.session.add(team)
-                
-                # Sincronizar jogador
-                player = Player.query.filter_by(id=player_info['id']).first()
-                if not player:
-                    player = Player(
-                        id=player_info['id'],
-                        name=player_info['name'],
-                        firstname=player_info.get('firstname'),
-                        lastname=player_info.get('lastname'),
-                        age=player_info.get('age'),
-                        birth_date=player_info.get('birth', {}).get('date'),
-                        birth_place=player_info.get('birth', {}).get('place'),
-                        birth_country=player_info.get('birth', {}).get('country'),
-                        nationality=player_info.get('nationality'),
-                        height=player_info.get('height'),
-                        weight=player_info.get('weight'),
-                        photo=player_info.get('photo'),
-                        league_id=league_id,
-                        team_id=team_info.get('id') if team_info else None
-                    )
-                    db.session.add(player)
-                
-                # Sincronizar estatísticas
-                if statistics:
-                    print(f"Processing stats for player {player_info['id']}")
-                    existing_stats = PlayerStatistics.query.filter_by(
-                        player_id=player_info['id'],
-                        season=season,
-                        league_id=league_id
-                    ).first()
-                    
-                    if existing_stats:
-                        # Atualizar estatísticas existentes
-                        _update_player_statistics(existing_stats, statistics)
-                    else:
-                        # Criar novas estatísticas
-                        new_stats = _create_player_statistics(player_info['id'], season, league_id, statistics)
-                        db.session.add(new_stats)
-                
-                synced_players += 1
-            
-            page += 1
-            if len(players_data) < 20:  # API retorna 20 por página
-                break
+        max_workers = request.json.get('workers', 4)
         
-        db.session.commit()
-        return jsonify({'message': f'{synced_players} jogadores sincronizados com sucesso'})
+        job = job_runner.submit('players', _players_sync_job, league_id=league_id, season=season, workers=max_workers)
+        return jsonify({
+            'message': 'Sincronização de jogadores enfileirada',
+            'job_id': job.id,
+            'status_url': f'/api/jobs/{job.id}'
+        }), 202
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-def _create_player_statistics(player_id: int, season: int, league_id: int, stats_data: dict) -> PlayerStatistics:
-    """Cria um novo registro de estatísticas de jogador"""
-    games = stats_data.get('games', {})
-    goals = stats_data.get('goals', {})
-    passes = stats_data.get('passes', {})
-    tackles = stats_data.get('tackles', {})
-    duels = stats_data.get('duels', {})
-    dribbles = stats_data.get('dribbles', {})
-    fouls = stats_data.get('fouls', {})
-    cards = stats_data.get('cards', {})
-    penalty = stats_data.get('penalty', {})
+@api_bp.route('/sync/all', methods=['POST'])
+def sync_all():
+    """Enfileira a sincronização de todas as ligas configuradas, com checkpoints"""
+    if not api_service:
+        return jsonify({'error': 'API Football não configurada'}), 500
     
-    return PlayerStatistics(
-        player_id=player_id,
-        season=season,
-        league_id=league_id,
-        team_id=stats_data.get('team', {}).get('id'),
-        games_appearences=games.get('appearences', 0),
-        games_lineups=games.get('lineups', 0),
-        games_minutes=games.get('minutes', 0),
-        games_number=games.get('number'),
-        games_position=games.get('position'),
-        games_rating=float(games.get('rating', 0)) if games.get('rating') else None,
-        games_captain=games.get('captain', False),
-        goals_total=goals.get('total', 0),
-        goals_conceded=goals.get('conceded', 0),
-        goals_assists=goals.get('assists', 0),
-        goals_saves=goals.get('saves', 0),
-        passes_total=passes.get('total', 0),
-        passes_key=passes.get('key', 0),
-        passes_accuracy=passes.get('accuracy', 0),
-        tackles_total=tackles.get('total', 0),
-        tackles_blocks=tackles.get('blocks', 0),
-        tackles_interceptions=tackles.get('interceptions', 0),
-        duels_total=duels.get('total', 0),
-        duels_won=duels.get('won', 0),
-        dribbles_attempts=dribbles.get('attempts', 0),
-        dribbles_success=dribbles.get('success', 0),
-        dribbles_past=dribbles.get('past', 0),
-        fouls_drawn=fouls.get('drawn', 0),
-        fouls_committed=fouls.get('committed', 0),
-        cards_yellow=cards.get('yellow', 0),
-        cards_yellowred=cards.get('yellowred', 0),
-        cards_red=cards.get('red', 0),
-        penalty_won=penalty.get('won', 0),
-        penalty_commited=penalty.get('commited', 0),
-        penalty_scored=penalty.get('scored', 0),
-        penalty_missed=penalty.get('missed', 0),
-        penalty_saved=penalty.get('saved', 0)
-    )
+    try:
+        data = request.get_json(silent=True) or {}
+        seasons = data.get('seasons', [2023])
+        current_season = data.get('current_season', max(seasons))
+        
+        job = job_runner.submit(
+            'full_sync', _full_sync_job,
+            seasons=seasons,
+            current_season=current_season,
+            workers=data.get('workers', 4),
+            force=bool(data.get('force', False))
+        )
+        return jsonify({
+            'message': 'Sincronização completa enfileirada',
+            'job_id': job.id,
+            'status_url': f'/api/jobs/{job.id}'
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
-def _update_player_statistics(stats: PlayerStatistics, stats_data: dict):
-    """Atualiza estatísticas existentes de um jogador"""
-    games = stats_data.get('games', {})
-    goals = stats_data.get('goals', {})
-    passes = stats_data.get('passes', {})
-    tackles = stats_data.get('tackles', {})
-    duels = stats_data.get('duels', {})
-    dribbles = stats_data.get('dribbles', {})
-    fouls = stats_data.get('fouls', {})
-    cards = stats_data.get('cards', {})
-    penalty = stats_data.get('penalty', {})
-    
-    stats.games_appearences = games.get('appearences', 0)
-    stats.games_lineups = games.get('lineups', 0)
-    stats.games_minutes = games.get('minutes', 0)
-    stats.games_number = games.get('number')
-    stats.games_position = games.get('position')
-    stats.games_rating = float(games.get('rating', 0)) if games.get('rating') else None
-    stats.games_captain = games.get('captain', False)
-    stats.goals_total = goals.get('total', 0)
-    stats.goals_conceded = goals.get('conceded', 0)
-    stats.goals_assists = goals.get('assists', 0)
-    stats.goals_saves = goals.get('saves', 0)
-    stats.passes_total = passes.get('total', 0)
-    stats.passes_key = passes.get('key', 0)
-    stats.passes_accuracy = passes.get('accuracy', 0)
-    stats.tackles_total = tackles.get('total', 0)
-    stats.tackles_blocks = tackles.get('blocks', 0)
-    stats.tackles_interceptions = tackles.get('interceptions', 0)
-    stats.duels_total = duels.get('total', 0)
-    stats.duels_won = duels.get('won', 0)
-    stats.dribbles_attempts = dribbles.get('attempts', 0)
-    stats.dribbles_success = dribbles.get('success', 0)
-    stats.dribbles_past = dribbles.get('past', 0)
-    stats.fouls_drawn = fouls.get('drawn', 0)
-    stats.fouls_committed = fouls.get('committed', 0)
-    stats.cards_yellow = cards.get('yellow', 0)
-    stats.cards_yellowred = cards.get('yellowred', 0)
-    stats.cards_red = cards.get('red', 0)
-    stats.penalty_won = penalty.get('won', 0)
-    stats.penalty_commited = penalty.get('commited', 0)
-    stats.penalty_scored = penalty.get('scored', 0)
-    stats.penalty_missed = penalty.get('missed', 0)
-    stats.penalty_saved = penalty.get('saved', 0)
+@api_bp.route('/sync/checkpoints', methods=['GET'])
+def list_sync_checkpoints():
+    """Lista os checkpoints da sincronização completa"""
+    try:
+        query = SyncCheckpoint.query
+        season = request.args.get('season', type=int)
+        if season:
+            query = query.filter(SyncCheckpoint.season == season)
+        checkpoints = query.order_by(SyncCheckpoint.season.desc(), SyncCheckpoint.league_id).all()
+        return jsonify([checkpoint.to_dict() for checkpoint in checkpoints])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Lista os jobs de sincronização mais recentes"""
+    try:
+        limit = request.args.get('limit', 20, type=int)
+        jobs = SyncJob.query.order_by(SyncJob.created_at.desc()).limit(limit).all()
+        return jsonify([job.to_dict() for job in jobs])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Retorna o progresso de um job de sincronização"""
+    try:
+        job = db.session.get(SyncJob, job_id)
+        if not job:
+            return jsonify({'error': 'Job não encontrado'}), 404
+        return jsonify(job.to_dict())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _leagues_sync_job(progress: JobProgress) -> str:
+    """Job de sincronização das ligas"""
+    message = sync_leagues_from_api(api_service, progress=progress)
+    # Multiplicadores alterados mudam pontuações de qualquer temporada
+    return _rebuild_leaderboards(progress, message)
+
+def _players_sync_job(progress: JobProgress, league_id: int, season: int, workers: int = 4) -> str:
+    """Job de sincronização de jogadores de uma liga"""
+    message = sync_league_players(api_service, league_id, season, progress=progress, max_workers=workers)
+    return _rebuild_leaderboards(progress, message, [season])
+
+def _full_sync_job(progress: JobProgress, seasons: list, current_season: int, workers: int = 4,
+                   force: bool = False) -> str:
+    """Job de sincronização completa (todas as ligas de LEAGUE_CONFIG)"""
+    message = run_full_sync(api_service, seasons, current_season=current_season, progress=progress,
+                            max_workers=workers, force=force)
+    return _rebuild_leaderboards(progress, message, seasons)
+
+def _rebuild_leaderboards(progress: JobProgress, message: str, seasons: list = None) -> str:
+    """Reconstrói os rankings materializados ao fim de um job e registra o tempo no resultado"""
+    leaderboards = rebuild_leaderboards(seasons)
+    progress.set_result({'leaderboards': leaderboards})
+    return f"{message}; rankings reconstruídos em {leaderboards['seconds']}s"
 
+def _top_players_page(players_data: list, last_key: tuple, limit: int):
+    """Resposta de /players/top: a lista continua no corpo e o cursor da próxima página vai no cabeçalho X-Next-Cursor"""
+    response = jsonify(players_data)
+    cursor = next_cursor(last_key, len(players_data), limit)
+    if cursor:
+        response.headers['X-Next-Cursor'] = cursor
+    return response
@@ -0,0 +1,16 @@
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(30), primary_key=True)  # rankings
+    version = db.Column(db.Integer, nullable=False, default=0)  # Incrementada a cada mudança nos dados
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
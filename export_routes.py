@@ -0,0 +1,34 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from src.services.export_service import EXPORT_FORMATS, export_filters, iter_csv, iter_ndjson
+from src.services.ranking_fields import parse_fields
+
+export_bp = Blueprint('export', __name__)
+
+@export_bp.route('/season/<int:season>', methods=['GET'])
+def export_season(season):
+    """Exporta todas as estatísticas de uma temporada (NDJSON ou CSV), transmitidas em partes"""
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        league_id = request.args.get('league_id', type=int)
+        min_minutes = request.args.get('min_minutes', type=int)
+
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Formato inválido. Opções: {list(EXPORT_FORMATS)}'}), 400
+
+        try:
+            fields = parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        filters = export_filters(season, league_id=league_id, min_minutes=min_minutes)
+        chunks = iter_csv(filters, fields) if export_format == 'csv' else iter_ndjson(filters, fields)
+
+        filename = f'season-{season}' + (f'-league-{league_id}' if league_id else '') + f'.{export_format}'
+        return Response(
+            stream_with_context(chunks),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
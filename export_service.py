@@ -0,0 +1,106 @@
+import csv
+import io
+from datetime import datetime
+from typing import Iterator, List, Optional
+from flask import current_app
+from src.models.user import db
+from src.models.player import PlayerStatistics
+from src.services.ranking_fields import (
+    FULL_FIELDS, GROUPS, RANKING_ORDER, expand_fields, ranking_select, row_serializer
+)
+
+# Linhas lidas do cursor do banco por vez (e linhas por parte transmitida)
+EXPORT_BATCH_ROWS = 1000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+def export_filters(season: int, league_id: int = None, min_minutes: int = None) -> List:
+    """Condições da exportação de uma temporada"""
+    filters = [PlayerStatistics.season == season]
+    if league_id:
+        filters.append(PlayerStatistics.league_id == league_id)
+    if min_minutes:
+        filters.append(PlayerStatistics.games_minutes >= min_minutes)
+    return filters
+
+
+def _iter_rows(filters: List, fields: List[str]):
+    """
+    Linhas da exportação, lidas do cursor do banco em lotes de EXPORT_BATCH_ROWS
+
+    Ordem dos rankings: percorre o índice (temporada/liga, spp_score) sem
+    ordenação temporária, mesmo para a temporada inteira.
+    """
+    query = ranking_select(fields, scored_only=False).where(*filters).order_by(*RANKING_ORDER)
+    return db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_ROWS))
+
+
+def iter_ndjson(filters: List, fields: Optional[List[str]] = None) -> Iterator[str]:
+    """
+    Exportação em NDJSON: um objeto por linha, no formato de /api/players/top (ou só os campos pedidos)
+
+    Yields:
+        Partes com até EXPORT_BATCH_ROWS linhas
+    """
+    fields = fields or FULL_FIELDS
+    serialize = row_serializer(fields)
+    dumps = current_app.json.dumps
+    lines = []
+    for rank, row in enumerate(_iter_rows(filters, fields), 1):
+        lines.append(dumps(serialize(row, rank)))
+        if len(lines) >= EXPORT_BATCH_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _csv_columns(fields: List[str]) -> List[tuple]:
+    """Colunas do CSV na ordem pedida: (cabeçalho, índice na tupla ou campo calculado)"""
+    expanded = expand_fields(fields)
+    columns = []
+    for field in fields:
+        if field in GROUPS:
+            columns.extend((key, expanded.index(key)) for key in expanded if key.startswith(f'{field}.'))
+        elif field in expanded:
+            columns.append((field, expanded.index(field)))
+        else:
+            columns.append((field, field))  # rank, spp_score
+    return list(dict.fromkeys(columns))
+
+
+def iter_csv(filters: List, fields: Optional[List[str]] = None) -> Iterator[str]:
+    """
+    Exportação em CSV: uma linha por estatística, com blocos aninhados como colunas 'bloco.campo'
+
+    Yields:
+        Cabeçalho e partes com até EXPORT_BATCH_ROWS linhas
+    """
+    fields = fields or FULL_FIELDS
+    columns = _csv_columns(fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in columns])
+
+    count = 0
+    for rank, row in enumerate(_iter_rows(filters, fields), 1):
+        values = []
+        for _, source in columns:
+            if source == 'rank':
+                value = rank
+            elif source == 'spp_score':
+                value = row[-2]
+            else:
+                value = row[source]
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        writer.writerow(values)
+        count += 1
+        if count % EXPORT_BATCH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,309 @@
+import hashlib
+import json
+import time
+from typing import Dict, List, Tuple
+from src.models.user import db
+from src.models.league import League
+from src.models.player import Player, Team, PlayerStatistics
+from src.services.spp_calculator import SPPCalculator
+
+# Linhas por comando INSERT ... ON CONFLICT (mantém transações e parâmetros pequenos)
+INGEST_CHUNK_SIZE = 500
+
+# Colunas de jogadores atualizadas quando o jogador já existe
+# (league_id/team_id ficam com os valores da primeira sincronização)
+PLAYER_UPDATE_COLUMNS = [
+    'name', 'firstname', 'lastname', 'age', 'birth_date', 'birth_place',
+    'birth_country', 'nationality', 'height', 'weight', 'photo'
+]
+
+# Colunas de estatísticas atualizadas quando a linha já existe: todas as do
+# modelo, menos a chave (jogador, temporada, liga) e last_updated (carimbada à parte)
+STATISTICS_UPDATE_COLUMNS = [
+    column.name for column in PlayerStatistics.__table__.columns
+    if column.name not in ('id', 'player_id', 'season', 'league_id', 'last_updated')
+]
+
+
+class IngestStats:
+    """Contadores de ingestão (linhas gravadas e vazão)"""
+
+    def __init__(self):
+        self.teams = 0
+        self.players = 0
+        self.statistics = 0
+        self.unchanged = 0  # Estatísticas idênticas às já gravadas (não regravadas)
+        self.scored = 0  # Estatísticas pontuadas durante a ingestão
+        self.seconds = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.teams + self.players + self.statistics
+
+    def to_dict(self) -> Dict:
+        return {
+            'teams': self.teams,
+            'players': self.players,
+            'statistics': self.statistics,
+            'unchanged': self.unchanged,
+            'scored': self.scored,
+            'rows': self.rows,
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows / self.seconds, 1) if self.seconds > 0 else None
+        }
+
+
+def team_row(team_info: dict) -> Dict:
+    """Converte o bloco 'team' da API numa linha da tabela teams"""
+    return {
+        'id': team_info['id'],
+        'name': team_info['name'],
+        'logo': team_info['logo']
+    }
+
+
+def player_row(player_info: dict, league_id: int, team_id: int = None) -> Dict:
+    """Converte o bloco 'player' da API numa linha da tabela players"""
+    birth = player_info.get('birth', {})
+    return {
+        'id': player_info['id'],
+        'name': player_info['name'],
+        'firstname': player_info.get('firstname'),
+        'lastname': player_info.get('lastname'),
+        'age': player_info.get('age'),
+        'birth_date': birth.get('date'),
+        'birth_place': birth.get('place'),
+        'birth_country': birth.get('country'),
+        'nationality': player_info.get('nationality'),
+        'height': player_info.get('height'),
+        'weight': player_info.get('weight'),
+        'photo': player_info.get('photo'),
+        'league_id': league_id,
+        'team_id': team_id
+    }
+
+
+def player_statistics_row(player_id: int, season: int, league_id: int, stats_data: dict) -> Dict:
+    """Converte um bloco 'statistics' da API numa linha da tabela player_statistics"""
+    games = stats_data.get('games', {})
+    goals = stats_data.get('goals', {})
+    passes = stats_data.get('passes', {})
+    tackles = stats_data.get('tackles', {})
+    duels = stats_data.get('duels', {})
+    dribbles = stats_data.get('dribbles', {})
+    fouls = stats_data.get('fouls', {})
+    cards = stats_data.get('cards', {})
+    penalty = stats_data.get('penalty', {})
+
+    return {
+        'player_id': player_id,
+        'season': season,
+        'league_id': league_id,
+        'team_id': stats_data.get('team', {}).get('id'),
+        'games_appearences': games.get('appearences', 0),
+        'games_lineups': games.get('lineups', 0),
+        'games_minutes': games.get('minutes', 0),
+        'games_number': games.get('number'),
+        'games_position': games.get('position'),
+        'games_rating': float(games.get('rating', 0)) if games.get('rating') else None,
+        'games_captain': games.get('captain', False),
+        'goals_total': goals.get('total', 0),
+        'goals_conceded': goals.get('conceded', 0),
+        'goals_assists': goals.get('assists', 0),
+        'goals_saves': goals.get('saves', 0),
+        'passes_total': passes.get('total', 0),
+        'passes_key': passes.get('key', 0),
+        'passes_accuracy': passes.get('accuracy', 0),
+        'tackles_total': tackles.get('total', 0),
+        'tackles_blocks': tackles.get('blocks', 0),
+        'tackles_interceptions': tackles.get('interceptions', 0),
+        'duels_total': duels.get('total', 0),
+        'duels_won': duels.get('won', 0),
+        'dribbles_attempts': dribbles.get('attempts', 0),
+        'dribbles_success': dribbles.get('success', 0),
+        'dribbles_past': dribbles.get('past', 0),
+        'fouls_drawn': fouls.get('drawn', 0),
+        'fouls_committed': fouls.get('committed', 0),
+        'cards_yellow': cards.get('yellow', 0),
+        'cards_yellowred': cards.get('yellowred', 0),
+        'cards_red': cards.get('red', 0),
+        'penalty_won': penalty.get('won', 0),
+        'penalty_commited': penalty.get('commited', 0),
+        'penalty_scored': penalty.get('scored', 0),
+        'penalty_missed': penalty.get('missed', 0),
+        'penalty_saved': penalty.get('saved', 0)
+    }
+
+
+def statistics_hash(row: Dict) -> str:
+    """Hash do conteúdo de uma linha de player_statistics (como vinda de player_statistics_row)"""
+    payload = json.dumps(row, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def transform_players_page(players_data: List[Dict], season: int, league_id: int) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    Transforma uma página da API em linhas para teams, players e player_statistics
+
+    Args:
+        players_data: Itens da resposta de /players
+        season: Temporada
+        league_id: ID da liga
+
+    Returns:
+        Tupla (times, jogadores, estatísticas), sem duplicatas dentro da página
+    """
+    teams = {}
+    players = {}
+    statistics_rows = {}
+
+    for player_data in players_data:
+        player_info = player_data['player']
+        statistics = player_data['statistics'][0] if player_data['statistics'] else {}
+
+        team_info = statistics.get('team', {})
+        if team_info:
+            teams[team_info['id']] = team_row(team_info)
+
+        players[player_info['id']] = player_row(
+            player_info, league_id, team_info.get('id') if team_info else None
+        )
+
+        if statistics:
+            statistics_rows[player_info['id']] = player_statistics_row(player_info['id'], season, league_id, statistics)
+
+    return list(teams.values()), list(players.values()), list(statistics_rows.values())
+
+
+def ingest_players_page(players_data: List[Dict], season: int, league_id: int,
+                        session=None, stats: IngestStats = None) -> int:
+    """
+    Grava uma página de jogadores com upserts em lote, pontuando as estatísticas alteradas
+
+    Times e jogadores usam ``INSERT ... ON CONFLICT (id) DO UPDATE``. Para as
+    estatísticas, uma única consulta busca as linhas já existentes da página
+    com o hash do conteúdo e a versão da pontuação: linhas idênticas e já
+    pontuadas com a configuração atual são ignoradas; as demais recebem a
+    categoria da posição e o SPP calculados aqui mesmo e são inseridas
+    (novas) ou atualizadas via conflito na chave primária. Assim os rankings
+    refletem a página assim que a transação é confirmada, sem recálculo da
+    temporada. Não faz commit: a transação fica a cargo de quem chama.
+
+    Args:
+        players_data: Itens da resposta de /players
+        season: Temporada
+        league_id: ID da liga
+        session: Sessão SQLAlchemy (padrão: db.session)
+        stats: Contadores de ingestão a atualizar (opcional)
+
+    Returns:
+        Número de jogadores processados
+    """
+    session = session or db.session
+    started = time.perf_counter()
+    teams, players, statistics_rows = transform_players_page(players_data, season, league_id)
+
+    _upsert(session, Team.__table__, teams, ['name', 'logo'])
+    _upsert(session, Player.__table__, players, PLAYER_UPDATE_COLUMNS)
+
+    # Uma consulta por página: id, hash do conteúdo e versão da pontuação já gravados
+    existing = {}
+    if statistics_rows:
+        existing = {
+            player_id: (stats_id, stats_hash, spp_version)
+            for player_id, stats_id, stats_hash, spp_version in session.execute(
+                db.select(
+                    PlayerStatistics.player_id, PlayerStatistics.id,
+                    PlayerStatistics.stats_hash, PlayerStatistics.spp_version
+                ).where(
+                    PlayerStatistics.season == season,
+                    PlayerStatistics.league_id == league_id,
+                    PlayerStatistics.player_id.in_([row['player_id'] for row in statistics_rows])
+                )
+            ).all()
+        }
+
+    # Sem a liga no banco não há multiplicador: a linha fica sem versão (pendente)
+    league = session.get(League, league_id) if statistics_rows else None
+    fingerprint = SPPCalculator.config_fingerprint() if league else None
+
+    new_rows = []
+    existing_rows = []
+    unchanged = 0
+    for row in statistics_rows:
+        row_hash = statistics_hash(row)
+        stats_id, stored_hash, stored_version = existing.get(row['player_id'], (None, None, None))
+        if stats_id is not None and stored_hash == row_hash and fingerprint and stored_version == fingerprint:
+            unchanged += 1
+            continue
+
+        row = {
+            **row,
+            'position_category': SPPCalculator._get_position_category(row['games_position']),
+            'stats_hash': row_hash,
+            'spp_version': fingerprint
+        }
+        row['spp_score'] = SPPCalculator.score_statistics_row(row, league) if league else 0.0
+        if stats_id is None:
+            new_rows.append(row)
+        else:
+            existing_rows.append({'id': stats_id, **row})
+
+    _insert_rows(session, PlayerStatistics.__table__, new_rows)
+    _upsert(session, PlayerStatistics.__table__, existing_rows, STATISTICS_UPDATE_COLUMNS, touch_column='last_updated')
+
+    if stats is not None:
+        stats.teams += len(teams)
+        stats.players += len(players)
+        stats.statistics += len(statistics_rows) - unchanged
+        stats.unchanged += unchanged
+        stats.scored += len(new_rows) + len(existing_rows) if league else 0
+        stats.seconds += time.perf_counter() - started
+
+    return len(players)
+
+
+def _insert_factory(session):
+    """Retorna a função insert do dialeto em uso (suporte a ON CONFLICT)"""
+    if session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _chunks(rows: List[Dict], size: int = INGEST_CHUNK_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _insert_rows(session, table, rows: List[Dict]):
+    """INSERT simples em lotes"""
+    if not rows:
+        return
+    statement = table.insert()
+    for chunk in _chunks(rows):
+        session.execute(statement, chunk)
+
+
+def _upsert(session, table, rows: List[Dict], update_columns: List[str], touch_column: str = None):
+    """
+    INSERT ... ON CONFLICT (id) DO UPDATE em lotes
+
+    Args:
+        session: Sessão SQLAlchemy
+        table: Tabela de destino
+        rows: Linhas (todas com as mesmas chaves, incluindo 'id')
+        update_columns: Colunas sobrescritas em caso de conflito
+        touch_column: Coluna de timestamp a atualizar em caso de conflito (opcional)
+    """
+    if not rows:
+        return
+    insert = _insert_factory(session)
+    statement = insert(table)
+    set_ = {column: statement.excluded[column] for column in update_columns}
+    if touch_column:
+        set_[touch_column] = db.func.current_timestamp()
+    statement = statement.on_conflict_do_update(index_elements=['id'], set_=set_)
+    for chunk in _chunks(rows):
+        session.execute(statement, chunk)
@@ -0,0 +1,62 @@
+import json
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class SyncJob(db.Model):
+    __tablename__ = 'sync_jobs'
+
+    id = db.Column(db.String(32), primary_key=True)  # UUID hexadecimal
+    job_type = db.Column(db.String(30), nullable=False)  # players, leagues, ...
+    params = db.Column(db.Text)  # Parâmetros do job (JSON)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, finished, failed
+
+    # Progresso
+    pages_done = db.Column(db.Integer, default=0)
+    pages_total = db.Column(db.Integer)
+    rows_written = db.Column(db.Integer, default=0)
+    api_usage = db.Column(db.Text)  # Contadores RequestStats (JSON)
+    errors = db.Column(db.Text)  # Lista de mensagens de erro (JSON)
+    message = db.Column(db.String(255))
+    result = db.Column(db.Text)  # Resultado detalhado do job (JSON, opcional)
+
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'params': json.loads(self.params) if self.params else {},
+            'status': self.status,
+            'pages_done': self.pages_done,
+            'pages_total': self.pages_total,
+            'rows_written': self.rows_written,
+            'api_usage': json.loads(self.api_usage) if self.api_usage else {},
+            'errors': json.loads(self.errors) if self.errors else [],
+            'message': self.message,
+            'result': json.loads(self.result) if self.result else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class SyncCheckpoint(db.Model):
+    __tablename__ = 'sync_checkpoints'
+
+    league_id = db.Column(db.Integer, primary_key=True)
+    season = db.Column(db.Integer, primary_key=True)
+    last_page = db.Column(db.Integer, nullable=False, default=0)  # Última página gravada
+    total_pages = db.Column(db.Integer)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, in_progress, done
+    updated_at = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+
+    def to_dict(self):
+        return {
+            'league_id': self.league_id,
+            'season': self.season,
+            'last_page': self.last_page,
+            'total_pages': self.total_pages,
+            'status': self.status,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,122 @@
+import json
+import os
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict
+from flask import current_app
+from src.models.user import db
+from src.models.job import SyncJob
+
+
+class JobProgress:
+    """
+    Registro de progresso de um job em execução
+
+    Passado para a função do job, que chama ``update`` a cada página gravada.
+    O estado é persistido na tabela sync_jobs, de modo que qualquer worker
+    web consegue responder ao polling de GET /api/jobs/<id>.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def update(self, pages_done: int = None, pages_total: int = None, rows_written: int = None,
+               api_usage: Dict = None, message: str = None):
+        """Atualiza os contadores do job e faz commit"""
+        job = db.session.get(SyncJob, self.job_id)
+        if job is None:
+            return
+        if pages_done is not None:
+            job.pages_done = pages_done
+        if pages_total is not None:
+            job.pages_total = pages_total
+        if rows_written is not None:
+            job.rows_written = rows_written
+        if api_usage is not None:
+            job.api_usage = json.dumps(api_usage)
+        if message is not None:
+            job.message = message[:255]
+        db.session.commit()
+
+    def set_result(self, result: Dict):
+        """Grava o resultado detalhado do job (JSON) e faz commit"""
+        job = db.session.get(SyncJob, self.job_id)
+        if job is None:
+            return
+        job.result = json.dumps(result)
+        db.session.commit()
+
+    def add_error(self, error: str):
+        """Acrescenta uma mensagem de erro ao job (sem interrompê-lo)"""
+        job = db.session.get(SyncJob, self.job_id)
+        if job is None:
+            return
+        errors = json.loads(job.errors) if job.errors else []
+        errors.append(error)
+        job.errors = json.dumps(errors)
+        db.session.commit()
+
+
+class JobRunner:
+    """
+    Executor de jobs de sincronização em segundo plano
+
+    Os jobs rodam num pool limitado de threads, cada um dentro de um app
+    context próprio, liberando os workers web para servir os rankings.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sync-job')
+
+    def submit(self, job_type: str, func: Callable, **params) -> SyncJob:
+        """
+        Enfileira um job
+
+        Args:
+            job_type: Tipo do job (ex: 'players')
+            func: Função executada como func(progress, **params)
+            **params: Parâmetros do job (precisam ser serializáveis em JSON)
+
+        Returns:
+            Registro SyncJob criado (status 'queued')
+        """
+        job = SyncJob(id=uuid.uuid4().hex, job_type=job_type, params=json.dumps(params), status='queued')
+        db.session.add(job)
+        db.session.commit()
+
+        app = current_app._get_current_object()
+        self._executor.submit(self._run, app, job.id, func, params)
+        return job
+
+    def _run(self, app, job_id: str, func: Callable, params: Dict):
+        with app.app_context():
+            job = db.session.get(SyncJob, job_id)
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+
+            progress = JobProgress(job_id)
+            try:
+                message = func(progress, **params)
+                db.session.commit()
+                status = 'finished'
+            except Exception as e:
+                db.session.rollback()
+                traceback.print_exc()
+                progress.add_error(str(e))
+                message = f'Job interrompido: {e}'
+                status = 'failed'
+
+            job = db.session.get(SyncJob, job_id)
+            job.status = status
+            job.message = (message or '')[:255] or None
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            db.session.remove()
+
+
+# Pool compartilhado pelo processo
+job_runner = JobRunner(max_workers=int(os.getenv('SYNC_JOB_WORKERS', 2)))
@@ -0,0 +1,149 @@
+import os
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from flask import Response, current_app, request, stream_with_context
+from src.services.leaderboard_service import next_cursor
+
+# Rankings com limit a partir deste valor são transmitidos em partes (sem montar a resposta inteira)
+STREAM_MIN_ROWS = int(os.getenv('RANKING_STREAM_MIN_ROWS', 500))
+
+# Itens por parte transmitida
+STREAM_BATCH_ROWS = 100
+
+# Respostas menores que isso não são comprimidas
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_LEVEL = int(os.getenv('API_GZIP_LEVEL', 6))
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain')
+
+
+def should_stream(limit: Optional[int]) -> bool:
+    """Indica se um ranking com esse limit deve ser transmitido em partes"""
+    return limit is not None and limit >= STREAM_MIN_ROWS
+
+
+def _batches(items: Iterable[Dict], item_format: Optional[Callable]) -> Iterator[Tuple[str, int, Optional[tuple]]]:
+    """Serializa os itens em grupos de STREAM_BATCH_ROWS: (json dos itens separados por vírgula, total, última chave)"""
+    dumps = current_app.json.dumps
+    batch = []
+    count = 0
+    last_key = None
+    for item, key in items:
+        batch.append(dumps(item_format(item) if item_format else item))
+        count += 1
+        last_key = key
+        if len(batch) >= STREAM_BATCH_ROWS:
+            yield ','.join(batch), count, last_key
+            batch = []
+    if batch:
+        yield ','.join(batch), count, last_key
+
+
+def stream_ranking(items: Iterator[Tuple[Dict, tuple]], limit: int, envelope: Dict = None,
+                   item_format: Optional[Callable] = None) -> Response:
+    """
+    Resposta de ranking transmitida em partes a partir de um iterador de linhas
+
+    O corpo é o mesmo objeto das respostas montadas com jsonify: 'ranking'
+    vem primeiro e 'total' e 'next_cursor' (só conhecidos no fim) vêm depois
+    do array, junto com as demais chaves de ``envelope``.
+
+    Args:
+        items: Tuplas (item, chave do cursor), ex: iter_ranking_page
+        limit: Tamanho da página (para o cursor da próxima)
+        envelope: Demais chaves da resposta (temporada, liga...)
+        item_format: Conversão de cada item para o formato da rota (opcional)
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '{"ranking":['
+        count = 0
+        last_key = None
+        for chunk, count_so_far, last_key in _batches(items, item_format):
+            yield (',' if count else '') + chunk
+            count = count_so_far
+        tail = dict(envelope or {}, total=count, next_cursor=next_cursor(last_key, count, limit))
+        yield '],' + dumps(tail)[1:]
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def stream_array(items: Iterator[Tuple[Dict, tuple]], item_format: Optional[Callable] = None,
+                 headers: Dict = None) -> Response:
+    """Resposta transmitida em partes cujo corpo é um array JSON (ex: /api/players/top)"""
+    def generate():
+        yield '['
+        first = True
+        for chunk, _, _ in _batches(items, item_format):
+            yield ('' if first else ',') + chunk
+            first = False
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json', headers=headers)
+
+
+def _gzip_chunks(chunks: Iterable) -> Iterator[bytes]:
+    """Comprime um corpo transmitido parte a parte (cada parte sai assim que é comprimida)"""
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)  # 31: cabeçalho gzip
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip() -> bool:
+    """Indica se o cliente da requisição atual aceita respostas com gzip"""
+    return request.accept_encodings['gzip'] > 0
+
+
+def gzip_body(data: bytes, mimetype: str) -> Optional[bytes]:
+    """
+    Corpo comprimido com gzip, ou None se não valer a pena (tipo não compressível ou menor que COMPRESS_MIN_BYTES)
+
+    Usada por compress_response e pelo cache de rankings, que guarda o corpo
+    já comprimido ao lado do original.
+    """
+    if mimetype not in COMPRESSIBLE_MIMETYPES or len(data) < COMPRESS_MIN_BYTES:
+        return None
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)  # 31: cabeçalho gzip
+    return compressor.compress(data) + compressor.flush()
+
+
+def set_gzip_body(response: Response, compressed: bytes) -> Response:
+    """Troca o corpo pelo já comprimido (compress_response não comprime de novo)"""
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Comprime a resposta com gzip quando o cliente aceita (after_request da aplicação)
+
+    Respostas transmitidas em partes são comprimidas parte a parte; as
+    demais, de uma vez, se tiverem ao menos COMPRESS_MIN_BYTES. Respostas
+    que já chegam comprimidas (cache de rankings) e arquivos servidos
+    diretamente (frontend, com suporte a Range) passam direto.
+    """
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if not accepts_gzip():
+        return response
+
+    if response.is_streamed:
+        response.response = _gzip_chunks(response.response)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    compressed = gzip_body(response.get_data(), response.mimetype)
+    return set_gzip_body(response, compressed) if compressed is not None else response
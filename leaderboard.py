@@ -0,0 +1,58 @@
+import json
+from flask_sqlalchemy import SQLAlchemy
+from src.models.user import db
+
+class LeaderboardBuild(db.Model):
+    __tablename__ = 'leaderboard_builds'
+
+    generation = db.Column(db.Integer, primary_key=True)
+    season = db.Column(db.Integer, nullable=False)  # 0 = todas as temporadas (/api/players/top)
+    status = db.Column(db.String(20), nullable=False, default='building')  # building, active, superseded
+    entries = db.Column(db.Integer, default=0)
+    size = db.Column(db.Integer)  # Posições gravadas por escopo
+    seconds = db.Column(db.Float)  # Tempo de construção
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    activated_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'generation': self.generation,
+            'season': self.season,
+            'status': self.status,
+            'entries': self.entries,
+            'size': self.size,
+            'seconds': self.seconds,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'activated_at': self.activated_at.isoformat() if self.activated_at else None
+        }
+
+class LeaderboardEntry(db.Model):
+    __tablename__ = 'leaderboard_entries'
+    __table_args__ = (
+        # Leitura de um ranking: um range scan já na ordem das posições
+        db.Index('ix_leaderboard_entries_lookup', 'generation', 'scope', 'scope_key', 'rank'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.Integer, nullable=False)  # LeaderboardBuild.generation
+    season = db.Column(db.Integer, nullable=False)
+    scope = db.Column(db.String(20), nullable=False)  # global, league, continent, position, position_league, top
+    scope_key = db.Column(db.String(50), nullable=False, default='')  # ID da liga, continente, posição...
+    rank = db.Column(db.Integer, nullable=False)
+
+    stats_id = db.Column(db.Integer, nullable=False)
+    player_id = db.Column(db.Integer, nullable=False)
+    spp_score = db.Column(db.Float)
+    payload = db.Column(db.Text, nullable=False)  # Jogador, estatísticas, liga e time já serializados (JSON)
+
+    def to_dict(self):
+        return {
+            'season': self.season,
+            'scope': self.scope,
+            'scope_key': self.scope_key,
+            'rank': self.rank,
+            'stats_id': self.stats_id,
+            'player_id': self.player_id,
+            'spp_score': self.spp_score,
+            'payload': json.loads(self.payload)
+        }
@@ -0,0 +1,359 @@
+import base64
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from src.models.user import db
+from src.models.player import PlayerStatistics
+from src.models.leaderboard import LeaderboardBuild, LeaderboardEntry
+from src.services.api_football import LEAGUE_CONFIG
+from src.services.ranking_cache import bump_data_version
+from src.services.ranking_fields import FULL_FIELDS, RANKING_ORDER, keyset_filter, ranking_select, serialize_rows
+from src.services.ranking_snapshot import build_snapshots
+from src.services.rank_index import rank_indexes
+
+# Posições gravadas por ranking; pedidos com limit maior consultam as tabelas diretamente
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', 100))
+
+# "Temporada" dos rankings sem filtro de temporada (/api/players/top)
+ALL_SEASONS = 0
+
+# Linhas por INSERT em lote
+LEADERBOARD_CHUNK_SIZE = 500
+
+# Construções mantidas por temporada (histórico de tempos)
+BUILD_HISTORY = 10
+
+CONTINENT_BY_LEAGUE = {league_id: config['continent'] for league_id, config in LEAGUE_CONFIG.items()}
+
+
+def encode_cursor(spp_score: float, stats_id: int, rank: int) -> str:
+    """Cursor opaco da próxima página: chave (spp_score, id) e posição do último item"""
+    raw = json.dumps([spp_score, stats_id, rank], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    """
+    Decodifica um cursor de encode_cursor
+
+    Returns:
+        Tupla (spp_score, stats_id, posição) ou None se não houver cursor
+
+    Raises:
+        ValueError: Cursor inválido (inclusive com spp_score NULL: linhas sem
+            pontuação não entram nos rankings, então não geram cursor)
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        spp_score, stats_id, rank = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Cursor inválido') from e
+    if spp_score is None:
+        raise ValueError('Cursor inválido: linhas sem pontuação não fazem parte dos rankings')
+    try:
+        return float(spp_score), int(stats_id), int(rank)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Cursor inválido') from e
+
+
+def next_cursor(last: Optional[tuple], count: int, limit: int) -> Optional[str]:
+    """
+    Cursor da página seguinte
+
+    Args:
+        last: Chave do último item da página (spp_score, stats_id, posição)
+        count: Itens na página
+        limit: Tamanho pedido
+
+    Returns:
+        Cursor, ou None se a página veio incompleta (não há mais itens)
+    """
+    if last is None or count < limit:
+        return None
+    return encode_cursor(*last)
+
+
+def payload_cursor_key(rank: int, payload: Dict) -> tuple:
+    """Chave de paginação (spp_score, stats_id, posição) de um item com 'statistics' completo"""
+    return payload['statistics']['spp_score'], payload['statistics']['id'], rank
+
+
+def _scopes(season: int) -> List[tuple]:
+    """Escopos materializados: (nome, colunas que particionam o ranking)"""
+    continent = db.case(CONTINENT_BY_LEAGUE, value=PlayerStatistics.league_id, else_=None)
+    if season == ALL_SEASONS:
+        return [
+            ('top', []),
+            ('top_league', [PlayerStatistics.league_id]),
+            ('top_continent', [continent]),
+        ]
+    return [
+        ('global', []),
+        ('league', [PlayerStatistics.league_id]),
+        ('continent', [continent]),
+        ('position', [PlayerStatistics.position_category]),
+        ('position_league', [PlayerStatistics.league_id, PlayerStatistics.position_category]),
+    ]
+
+
+def _top_per_partition(season: int, partition_columns: List, size: int) -> List[tuple]:
+    """
+    Seleciona as ``size`` primeiras posições de cada partição numa única consulta (ROW_NUMBER)
+
+    Parte de ranking_select, para que entrem as mesmas linhas das rotas de
+    ranking (jogador, liga e time cadastrados e pontuação não NULL).
+
+    Returns:
+        Tuplas (stats_id, *valores das colunas de partição, posição)
+    """
+    rank = db.func.row_number().over(
+        partition_by=partition_columns or None,
+        order_by=RANKING_ORDER
+    ).label('rank')
+    ranked = ranking_select([]).with_only_columns(
+        PlayerStatistics.id.label('stats_id'),
+        *[column.label(f'part_{index}') for index, column in enumerate(partition_columns)],
+        rank
+    )
+    if season != ALL_SEASONS:
+        ranked = ranked.where(PlayerStatistics.season == season)
+
+    ranked = ranked.subquery()
+    return db.session.execute(db.select(ranked).where(ranked.c.rank <= size)).all()
+
+
+def _load_payloads(stats_ids: Iterable[int]) -> Dict[int, tuple]:
+    """Serializa jogador, estatísticas, liga e time das linhas selecionadas (projeção de colunas por lote de IDs)"""
+    stats_ids = list(stats_ids)
+    payloads = {}
+    for start in range(0, len(stats_ids), LEADERBOARD_CHUNK_SIZE):
+        rows = db.session.execute(ranking_select(FULL_FIELDS).where(
+            PlayerStatistics.id.in_(stats_ids[start:start + LEADERBOARD_CHUNK_SIZE])
+        )).all()
+        items, _ = serialize_rows(rows, FULL_FIELDS)
+        for row, payload in zip(rows, items):
+            payloads[row[-1]] = (payload['id'], row[-2], json.dumps(payload, separators=(',', ':')))
+    return payloads
+
+
+def build_season_leaderboards(season: int, size: int = LEADERBOARD_SIZE) -> LeaderboardBuild:
+    """
+    Reconstrói os rankings materializados de uma temporada e troca a geração ativa
+
+    As entradas são gravadas numa nova geração; na mesma transação a geração
+    anterior é marcada como substituída e a nova como ativa. Leitores veem a
+    geração antiga ou a nova, nunca uma mistura. As entradas antigas são
+    apagadas numa transação seguinte.
+
+    Args:
+        season: Temporada (ALL_SEASONS para /api/players/top)
+        size: Posições gravadas por ranking
+
+    Returns:
+        Registro da nova geração (ativa)
+    """
+    started = time.perf_counter()
+
+    # Restos de construções interrompidas
+    abandoned = db.select(LeaderboardBuild.generation).where(
+        LeaderboardBuild.season == season, LeaderboardBuild.status == 'building'
+    )
+    db.session.execute(db.delete(LeaderboardEntry).where(LeaderboardEntry.generation.in_(abandoned)))
+    db.session.execute(db.delete(LeaderboardBuild).where(
+        LeaderboardBuild.season == season, LeaderboardBuild.status == 'building'
+    ))
+
+    build = LeaderboardBuild(season=season, status='building', size=size)
+    db.session.add(build)
+    db.session.flush()
+    generation = build.generation
+
+    selected = []
+    for scope, columns in _scopes(season):
+        for stats_id, *parts, rank in _top_per_partition(season, columns, size):
+            if any(part is None for part in parts):
+                continue
+            selected.append((scope, ':'.join(str(part) for part in parts), rank, stats_id))
+
+    payloads = _load_payloads({stats_id for _, _, _, stats_id in selected})
+    rows = []
+    for scope, scope_key, rank, stats_id in selected:
+        player_id, spp_score, payload = payloads[stats_id]
+        rows.append({
+            'generation': generation,
+            'season': season,
+            'scope': scope,
+            'scope_key': scope_key,
+            'rank': rank,
+            'stats_id': stats_id,
+            'player_id': player_id,
+            'spp_score': spp_score,
+            'payload': payload
+        })
+    for start in range(0, len(rows), LEADERBOARD_CHUNK_SIZE):
+        db.session.execute(LeaderboardEntry.__table__.insert(), rows[start:start + LEADERBOARD_CHUNK_SIZE])
+
+    # Troca da geração ativa
+    previous = [
+        previous_generation for (previous_generation,) in db.session.query(LeaderboardBuild.generation).filter(
+            LeaderboardBuild.season == season, LeaderboardBuild.status == 'active'
+        ).all()
+    ]
+    db.session.execute(db.update(LeaderboardBuild).where(
+        LeaderboardBuild.generation.in_(previous)
+    ).values(status='superseded'))
+    db.session.execute(db.update(LeaderboardBuild).where(
+        LeaderboardBuild.generation == generation
+    ).values(
+        status='active',
+        entries=len(rows),
+        seconds=round(time.perf_counter() - started, 3),
+        activated_at=datetime.utcnow()
+    ))
+    db.session.commit()
+
+    if previous:
+        db.session.execute(db.delete(LeaderboardEntry).where(LeaderboardEntry.generation.in_(previous)))
+        recent = db.select(LeaderboardBuild.generation).where(
+            LeaderboardBuild.season == season
+        ).order_by(LeaderboardBuild.generation.desc()).limit(BUILD_HISTORY)
+        db.session.execute(db.delete(LeaderboardBuild).where(
+            LeaderboardBuild.season == season,
+            LeaderboardBuild.status == 'superseded',
+            LeaderboardBuild.generation.not_in(recent)
+        ))
+        db.session.commit()
+
+    return db.session.get(LeaderboardBuild, generation)
+
+
+def rebuild_leaderboards(seasons: Optional[Iterable[int]] = None, size: int = LEADERBOARD_SIZE) -> Dict:
+    """
+    Reconstrói os rankings materializados ao fim de uma sincronização ou recálculo
+
+    Args:
+        seasons: Temporadas a reconstruir (padrão: todas as presentes no banco).
+            O ranking sem temporada (/api/players/top) é sempre reconstruído.
+        size: Posições gravadas por ranking
+
+    Returns:
+        Dict com a geração de cada temporada e o tempo total
+    """
+    started = time.perf_counter()
+    if seasons is None:
+        seasons = [season for (season,) in db.session.query(PlayerStatistics.season).distinct().all()]
+
+    builds = {}
+    for season in sorted(set(seasons)) + [ALL_SEASONS]:
+        builds[season] = build_season_leaderboards(season, size).to_dict()
+
+    # Rankings novos: respostas em cache de todos os processos deixam de valer
+    version = bump_data_version()
+    # As pontuações não mudaram: os índices de posição abertos continuam valendo
+    rank_indexes.advance(version)
+
+    # Snapshots colunares da nova versão (até ficarem prontos, as rotas leem do banco)
+    snapshots = build_snapshots(sorted(set(seasons)), version)
+
+    return {
+        'seasons': builds,
+        'entries': sum(build['entries'] for build in builds.values()),
+        'snapshots': snapshots,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def leaderboards_after_recalculation(result: Dict, seasons: Optional[Iterable[int]] = None) -> Dict:
+    """
+    Rankings materializados ao fim de um recálculo
+
+    O recálculo já os reconstrói quando alguma pontuação mudou (resultado em
+    ``result['leaderboards']``); senão, são reconstruídos aqui.
+
+    Args:
+        result: Resultado do recálculo (recalculate_scores_streaming ou recalculate_parallel)
+        seasons: Temporadas recalculadas (padrão: todas)
+
+    Returns:
+        Dict de rebuild_leaderboards
+    """
+    return result.get('leaderboards') or rebuild_leaderboards(seasons)
+
+
+def read_leaderboard(season: int, scope: str, scope_key: str = '', limit: int = 50,
+                     after: Optional[tuple] = None) -> Optional[List[tuple]]:
+    """
+    Lê um ranking materializado (uma consulta por intervalo no índice da geração ativa)
+
+    Args:
+        season: Temporada (ALL_SEASONS para os rankings sem temporada)
+        scope: Escopo (global, league, continent, position, position_league, top...)
+        scope_key: Chave do escopo (ID da liga, continente, posição...)
+        limit: Número máximo de posições
+        after: Cursor decodificado (decode_cursor); a página começa depois dele
+
+    Returns:
+        Lista de (posição, payload), ou None se não houver geração ativa que
+        cubra a página pedida (quem chama consulta as tabelas diretamente)
+    """
+    if limit is None or limit < 1:
+        return None
+
+    active_generation = db.select(LeaderboardBuild.generation).where(
+        LeaderboardBuild.season == season,
+        LeaderboardBuild.status == 'active',
+        LeaderboardBuild.size >= (after[2] if after else 0) + limit
+    ).scalar_subquery()
+    query = db.select(LeaderboardEntry.rank, LeaderboardEntry.payload).where(
+        LeaderboardEntry.generation == active_generation,
+        LeaderboardEntry.scope == scope,
+        LeaderboardEntry.scope_key == str(scope_key)
+    )
+    if after is not None:
+        query = query.where(keyset_filter(after, LeaderboardEntry.spp_score, LeaderboardEntry.stats_id))
+    rows = db.session.execute(query.order_by(LeaderboardEntry.rank).limit(limit)).all()
+    if not rows:
+        return None
+    return [(rank, json.loads(payload)) for rank, payload in rows]
+
+
+def compact_ranking_item(rank: int, payload: Dict) -> Dict:
+    """Item no formato dos rankings global e por posição"""
+    stats = payload['statistics']
+    league = payload['league']
+    team = payload['team']
+    item = {key: value for key, value in payload.items() if key not in ('statistics', 'league', 'team')}
+    item['rank'] = rank
+    item['spp_score'] = round(stats['spp_score'], 2)
+    item['statistics'] = {
+        'goals': stats['goals_total'],
+        'assists': stats['goals_assists'],
+        'games': stats['games_appearences'],
+        'minutes': stats['games_minutes'],
+        'rating': stats['games_rating'],
+        'position': stats['games_position']
+    }
+    item['league'] = {
+        'id': league['id'],
+        'name': league['name'],
+        'country': league['country'],
+        'logo': league['logo']
+    }
+    item['team'] = {
+        'id': team['id'],
+        'name': team['name'],
+        'logo': team['logo']
+    }
+    return item
+
+
+def detailed_ranking_item(rank: int, payload: Dict) -> Dict:
+    """Item no formato dos rankings por liga e continente (SPPCalculator.get_league_ranking)"""
+    item = dict(payload)
+    item['rank'] = rank
+    item['spp_score'] = payload['statistics']['spp_score']
+    return item
@@ -4,30 +4,42 @@ import sys
 # DON\'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import click
 from flask import Flask, send_from_directory, send_file
 from flask_cors import CORS
 from src.models.user import db
+from src.models.migrations import apply_migrations
 from src.routes.user import user_bp
 from src.routes.api_routes import api_bp
 from src.routes.spp_routes import spp_bp
+from src.routes.export_routes import export_bp
+from src.services.json_stream import compress_response
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
 
 # Habilitar CORS para todas as rotas
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
 
 app.register_blueprint(user_bp, url_prefix='/api/users')
 app.register_blueprint(api_bp, url_prefix='/api')
 app.register_blueprint(spp_bp, url_prefix='/api/spp')
+app.register_blueprint(export_bp, url_prefix='/api/export')
+
+# Compressão gzip das respostas conforme o Accept-Encoding do cliente
+app.after_request(compress_response)
 
 # Configuração do banco de dados
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
+    'DATABASE_URL',
+    f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
 with app.app_context():
     db.create_all()
+    apply_migrations()
 
 # Rota para servir o frontend React
 @app.route('/', defaults={'path': ''})
@@ -47,6 +59,78 @@ def serve_frontend(path):
             return "index.html not found", 404
 
 
+# Reconstrução do banco a partir do arquivo de respostas da API
+# Ex: DATABASE_URL=sqlite:////tmp/novo.db flask --app src/main.py replay-archive
+@app.cli.command('replay-archive')
+@click.option('--archive-dir', default=None, help='Diretório do arquivo (padrão: API_FOOTBALL_ARCHIVE_DIR)')
+@click.option('--league', 'league_id', type=int, default=None, help='Reprocessa apenas esta liga')
+@click.option('--season', type=int, default=None, help='Reprocessa apenas esta temporada')
+@click.option('--no-recalculate', is_flag=True, help='Não recalcula as pontuações SPP')
+def replay_archive_command(archive_dir, league_id, season, no_recalculate):
+    """Reconstrói o banco a partir das respostas arquivadas, sem consumir cota da API"""
+    from src.services.api_football import DEFAULT_ARCHIVE_DIR
+    from src.services.response_archive import ResponseArchive
+    from src.services.sync_service import replay_archive
+    from src.services.leaderboard_service import rebuild_leaderboards
+
+    archive = ResponseArchive(archive_dir or os.getenv('API_FOOTBALL_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+    result = replay_archive(archive, league_id=league_id, season=season, recalculate=not no_recalculate)
+    click.echo(
+        f"{result['leagues']} ligas, {result['pages']} páginas, "
+        f"{result['ingest']['rows']} linhas ({result['ingest']['rows_per_second']} linhas/s) "
+        f"em {result['seconds']}s"
+    )
+    leaderboards = rebuild_leaderboards([season] if season else None)
+    click.echo(f"{leaderboards['entries']} posições de ranking reconstruídas em {leaderboards['seconds']}s")
+
+
+# Recálculo de todas as temporadas após mudar pesos/multiplicadores
+# Ex: flask --app src/main.py recalculate-all --processes 8
+@app.cli.command('recalculate-all')
+@click.option('--season', 'seasons', type=int, multiple=True, help='Temporada (pode repetir; padrão: todas)')
+@click.option('--processes', type=int, default=None, help='Processos de pontuação (padrão: número de núcleos)')
+@click.option('--stale-only', is_flag=True, help='Recalcula apenas as pontuações pendentes')
+def recalculate_all_command(seasons, processes, stale_only):
+    """Recalcula as pontuações SPP em paralelo, por temporada e liga, e reconstrói os rankings"""
+    from src.services.parallel_recalc import recalculate_parallel
+    from src.services.leaderboard_service import leaderboards_after_recalculation
+
+    result = recalculate_parallel(list(seasons) or None, processes=processes, stale_only=stale_only)
+    for timing in result['timings']:
+        click.echo(
+            f"{timing['season']} liga {timing['league_id']:>4}: {timing['rows_scanned']:>7} linhas, "
+            f"{timing['rows_changed']:>7} alteradas, pontuação {timing['score_seconds']}s, "
+            f"gravação {timing['write_seconds']}s"
+        )
+    click.echo(
+        f"{result['rows_changed']} de {result['rows_scanned']} pontuações alteradas em {result['partitions']} "
+        f"partições, {result['processes']} processos, {result['elapsed_seconds']}s (ganho {result['speedup']}x)"
+    )
+    leaderboards = leaderboards_after_recalculation(result, list(seasons) or None)
+    click.echo(f"{leaderboards['entries']} posições de ranking reconstruídas em {leaderboards['seconds']}s")
+
+
+# Verificação dos planos das consultas de ranking (índices, sem sort temporário)
+# Ex: flask --app src/main.py check-query-plans
+@app.cli.command('check-query-plans')
+@click.option('--season', type=int, default=2023, help='Temporada usada nas consultas')
+@click.option('--verbose', is_flag=True, help='Mostra o plano completo de cada consulta')
+def check_query_plans_command(season, verbose):
+    """Falha (código 1) se alguma consulta de ranking não usar índice ou fizer sort temporário"""
+    from src.services.query_plans import check_ranking_query_plans
+
+    results = check_ranking_query_plans(season)
+    if not results:
+        click.echo('Verificação disponível apenas para SQLite')
+        return
+
+    for result in results:
+        click.echo(f"{'OK   ' if result['ok'] else 'FALHA'} {result['name']} ({', '.join(result['indexes'])})")
+        if verbose or not result['ok']:
+            for line in result['plan']:
+                click.echo(f'      {line}')
+    if not all(result['ok'] for result in results):
+        raise SystemExit(1)
 
 
 if __name__ == '__main__':
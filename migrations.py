@@ -0,0 +1,132 @@
+from typing import Callable, List, Tuple
+from src.models.user import db
+from src.models.player import PlayerStatistics
+from src.models.job import SyncJob
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'name': self.name,
+            'applied_at': self.applied_at.isoformat() if self.applied_at else None
+        }
+
+# Migrações registradas: (versão, nome, função)
+MIGRATIONS: List[Tuple[int, str, Callable]] = []
+
+
+def migration(version: int, name: str):
+    """Registra uma migração de esquema/dados, aplicada uma única vez por banco"""
+    def decorator(func: Callable) -> Callable:
+        MIGRATIONS.append((version, name, func))
+        return func
+    return decorator
+
+
+def apply_migrations() -> List[int]:
+    """
+    Aplica as migrações pendentes, em ordem de versão
+
+    db.create_all() só cria tabelas que não existem; colunas, índices e
+    ajustes de dados em bancos já existentes ficam a cargo das migrações.
+    Cada migração roda na sua própria transação e é registrada em
+    schema_migrations. Deve ser chamada dentro de um app context, depois de
+    db.create_all().
+
+    Returns:
+        Versões aplicadas nesta chamada
+    """
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    applied = {version for (version,) in db.session.query(SchemaMigration.version).all()}
+
+    newly_applied = []
+    for version, name, func in sorted(MIGRATIONS, key=lambda item: item[0]):
+        if version in applied:
+            continue
+        try:
+            func()
+            db.session.add(SchemaMigration(version=version, name=name))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        newly_applied.append(version)
+
+    return newly_applied
+
+
+def add_column_if_missing(column: db.Column) -> bool:
+    """
+    Adiciona uma coluna do modelo a uma tabela existente (ALTER TABLE ... ADD COLUMN)
+
+    Args:
+        column: Coluna da tabela do modelo (ex: PlayerStatistics.__table__.c.stats_hash)
+
+    Returns:
+        True se a coluna foi criada, False se já existia
+    """
+    table_name = column.table.name
+    existing = {info['name'] for info in db.inspect(db.session.connection()).get_columns(table_name)}
+    if column.name in existing:
+        return False
+
+    column_type = column.type.compile(dialect=db.engine.dialect)
+    db.session.execute(db.text(f'ALTER TABLE {table_name} ADD COLUMN {column.name} {column_type}'))
+    return True
+
+
+def create_index_if_missing(index: db.Index):
+    """Cria um índice declarado no modelo, se ainda não existir (na transação da migração)"""
+    index.create(db.session.connection(), checkfirst=True)
+
+
+@migration(1, 'player_statistics: spp_version e stats_hash')
+def _add_incremental_scoring_columns():
+    # Linhas antigas ficam sem versão/hash: são pontuadas na próxima ingestão
+    # ou por um recálculo das pontuações pendentes
+    add_column_if_missing(PlayerStatistics.__table__.c.spp_version)
+    add_column_if_missing(PlayerStatistics.__table__.c.stats_hash)
+
+
+@migration(2, 'sync_jobs: result')
+def _add_job_result_column():
+    add_column_if_missing(SyncJob.__table__.c.result)
+
+
+@migration(3, 'player_statistics: position_category e índice (season, position_category, spp_score)')
+def _add_position_category():
+    from src.services.spp_calculator import SPPCalculator
+
+    add_column_if_missing(PlayerStatistics.__table__.c.position_category)
+
+    # Uma atualização por valor distinto de games_position (poucas dezenas)
+    positions = [position for (position,) in db.session.query(PlayerStatistics.games_position).distinct().all()]
+    for position in positions:
+        condition = PlayerStatistics.games_position.is_(None) if position is None else PlayerStatistics.games_position == position
+        db.session.execute(
+            db.update(PlayerStatistics).where(condition).values(
+                position_category=SPPCalculator._get_position_category(position)
+            )
+        )
+
+    for index in PlayerStatistics.__table__.indexes:
+        if index.name == 'ix_player_statistics_season_position_spp':
+            create_index_if_missing(index)
+
+
+@migration(4, 'player_statistics: índices dos rankings e unicidade (player_id, season, league_id)')
+def _add_ranking_indexes():
+    # Remove duplicatas antes do índice único, mantendo a linha gravada por último
+    latest_ids = db.select(db.func.max(PlayerStatistics.id)).group_by(
+        PlayerStatistics.player_id, PlayerStatistics.season, PlayerStatistics.league_id
+    )
+    db.session.execute(db.delete(PlayerStatistics).where(PlayerStatistics.id.not_in(latest_ids)))
+
+    for index in PlayerStatistics.__table__.indexes:
+        create_index_if_missing(index)
@@ -0,0 +1,174 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine
+from src.models.user import db
+from src.models.player import PlayerStatistics
+from src.services.jobs import JobProgress
+from src.services.ranking_cache import bump_data_version
+from src.services.rank_index import rank_indexes
+from src.services.leaderboard_service import rebuild_leaderboards
+from src.services.spp_calculator import SPPCalculator
+from src.services.spp_vectorized import stat_columns_query
+
+# Processos de pontuação (padrão: um por núcleo)
+DEFAULT_PROCESSES = int(os.getenv('SPP_RECALC_PROCESSES', 0)) or os.cpu_count() or 1
+
+# Engine de leitura de cada processo do pool (criado na primeira partição)
+_worker_engine = None
+
+
+def plan_partitions(seasons: Optional[List[int]] = None, stale_only: bool = False) -> List[Dict]:
+    """
+    Lista as partições (temporada, liga) a recalcular
+
+    Args:
+        seasons: Temporadas (padrão: todas as presentes no banco)
+        stale_only: Considera apenas linhas com pontuação pendente
+
+    Returns:
+        Partições {'season', 'league_id', 'rows'}, das maiores para as menores
+        (as maiores começam primeiro, o que equilibra a carga entre os processos)
+    """
+    query = db.session.query(
+        PlayerStatistics.season,
+        PlayerStatistics.league_id,
+        db.func.count(PlayerStatistics.id)
+    )
+    if seasons:
+        query = query.filter(PlayerStatistics.season.in_(seasons))
+    if stale_only:
+        query = query.filter(SPPCalculator._stale_filter(SPPCalculator.config_fingerprint()))
+    rows = query.group_by(PlayerStatistics.season, PlayerStatistics.league_id).all()
+
+    partitions = [{'season': season, 'league_id': league_id, 'rows': count} for season, league_id, count in rows]
+    partitions.sort(key=lambda partition: (-partition['rows'], -partition['season'], partition['league_id']))
+    return partitions
+
+
+def recalculate_parallel(seasons: Optional[List[int]] = None, processes: int = None, stale_only: bool = False,
+                         progress: Optional[JobProgress] = None, rebuild: bool = True) -> Dict:
+    """
+    Recalcula as pontuações SPP particionando por (temporada, liga) num pool de processos
+
+    Cada processo abre a sua própria conexão, lê a partição e calcula as
+    pontuações; apenas as linhas alteradas voltam ao processo principal, que
+    é o único a escrever: cada partição é gravada com um UPDATE em lote por
+    chave primária, numa transação própria, assim que fica pronta. Isso
+    respeita o lock de escrita único do SQLite enquanto a pontuação usa todos
+    os núcleos. Deve ser chamada dentro de um app context.
+
+    Args:
+        seasons: Temporadas (padrão: todas as presentes no banco)
+        processes: Processos de pontuação (padrão: SPP_RECALC_PROCESSES ou número de núcleos)
+        stale_only: Recalcula apenas linhas com pontuação pendente
+        progress: Registro de progresso do job (opcional)
+        rebuild: Reconstrói os rankings materializados das temporadas alteradas
+            (False só para quem reconstrói logo em seguida)
+
+    Returns:
+        Dict com totais, o tempo de cada partição (leitura+pontuação no
+        processo filho, gravação no principal) e o resultado da reconstrução
+        dos rankings (None se nenhuma pontuação mudou)
+    """
+    started = time.perf_counter()
+    fingerprint = SPPCalculator.config_fingerprint()
+    partitions = plan_partitions(seasons, stale_only=stale_only)
+    processes = max(1, min(processes or DEFAULT_PROCESSES, len(partitions) or 1))
+    database_url = db.engine.url.render_as_string(hide_password=False)
+
+    if progress:
+        progress.update(pages_done=0, pages_total=len(partitions), rows_written=0,
+                        message=f'{len(partitions)} partições em {processes} processos')
+
+    results = []
+    rows_changed = 0
+    # 'spawn' evita herdar conexões e threads (JobRunner) do processo principal
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        futures = [
+            executor.submit(_score_partition, database_url, partition['season'],
+                            partition['league_id'], fingerprint, stale_only)
+            for partition in partitions
+        ]
+        for future in as_completed(futures):
+            scored = future.result()
+            updates = scored.pop('updates')
+
+            write_started = time.perf_counter()
+            if updates:
+                db.session.execute(db.update(PlayerStatistics), updates)
+            db.session.execute(
+                db.update(PlayerStatistics).where(
+                    PlayerStatistics.season == scored['season'],
+                    PlayerStatistics.league_id == scored['league_id'],
+                    SPPCalculator._stale_filter(fingerprint)
+                ).values(spp_version=fingerprint)
+            )
+            db.session.commit()
+            rank_indexes.apply_score_updates(scored['season'], updates)
+            scored['write_seconds'] = round(time.perf_counter() - write_started, 3)
+
+            results.append(scored)
+            rows_changed += scored['rows_changed']
+            if progress:
+                progress.update(pages_done=len(results), rows_written=rows_changed)
+
+    leaderboards = None
+    if rows_changed:
+        if rebuild:
+            # Rankings materializados com as pontuações novas (também incrementa a versão dos dados)
+            changed_seasons = {result['season'] for result in results if result['rows_changed']}
+            leaderboards = rebuild_leaderboards(sorted(changed_seasons))
+        else:
+            rank_indexes.advance(bump_data_version())
+
+    elapsed = time.perf_counter() - started
+    score_seconds = sum(result['score_seconds'] for result in results)
+    return {
+        'partitions': len(results),
+        'processes': processes,
+        'rows_scanned': sum(result['rows_scanned'] for result in results),
+        'rows_changed': rows_changed,
+        'elapsed_seconds': round(elapsed, 3),
+        # Tempo de pontuação somado / tempo total: aproxima o ganho sobre um único núcleo
+        'speedup': round(score_seconds / elapsed, 2) if elapsed > 0 else None,
+        'timings': sorted(results, key=lambda result: (result['season'], result['league_id'])),
+        'leaderboards': leaderboards
+    }
+
+
+def _score_partition(database_url: str, season: int, league_id: int, fingerprint: str, stale_only: bool) -> Dict:
+    """
+    Lê e pontua uma partição (executada num processo do pool, sem app context)
+
+    Returns:
+        Dict com a partição, contadores, tempo e as atualizações {'id', 'spp_score'}
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = create_engine(database_url)
+
+    started = time.perf_counter()
+    query = stat_columns_query().where(
+        PlayerStatistics.season == season,
+        PlayerStatistics.league_id == league_id
+    )
+    if stale_only:
+        query = query.where(SPPCalculator._stale_filter(fingerprint))
+
+    with _worker_engine.connect() as connection:
+        rows = connection.execute(query).all()
+    updates = SPPCalculator.changed_scores_from_columns(rows)
+
+    return {
+        'season': season,
+        'league_id': league_id,
+        'rows_scanned': len(rows),
+        'rows_changed': len(updates),
+        'score_seconds': round(time.perf_counter() - started, 3),
+        'pid': os.getpid(),
+        'updates': updates
+    }
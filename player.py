@@ -71,6 +71,15 @@ class Team(db.Model):
 
 class PlayerStatistics(db.Model):
     __tablename__ = 'player_statistics'
+    __table_args__ = (
+        # Índices dos rankings: filtro por temporada/liga e ordenação por spp_score sem sort temporário
+        db.Index('ix_player_statistics_season_spp', 'season', 'spp_score'),
+        db.Index('ix_player_statistics_league_season_spp', 'league_id', 'season', 'spp_score'),
+        db.Index('ix_player_statistics_season_position_spp', 'season', 'position_category', 'spp_score'),
+        db.Index('ix_player_statistics_spp', 'spp_score'),  # /api/players/top (todas as temporadas)
+        # Uma linha por jogador/temporada/liga (chave natural usada na ingestão)
+        db.Index('uq_player_statistics_player_season_league', 'player_id', 'season', 'league_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
@@ -84,6 +93,7 @@ class PlayerStatistics(db.Model):
     games_minutes = db.Column(db.Integer, default=0)
     games_number = db.Column(db.Integer)  # Número da camisa
     games_position = db.Column(db.String(20))
+    position_category = db.Column(db.String(20))  # Goalkeeper, Defender, Midfielder ou Attacker (SPPCalculator._get_position_category)
     games_rating = db.Column(db.Float)
     games_captain = db.Column(db.Boolean, default=False)
     
@@ -130,6 +140,8 @@ class PlayerStatistics(db.Model):
     
     # Pontuação SPP calculada
     spp_score = db.Column(db.Float, default=0.0)
+    spp_version = db.Column(db.String(16))  # Configuração usada no cálculo (SPPCalculator.config_fingerprint)
+    stats_hash = db.Column(db.String(40))  # Hash do conteúdo vindo da API (detecta linhas alteradas)
     last_updated = db.Column(db.DateTime, default=db.func.current_timestamp())
     
     def to_dict(self):
@@ -144,6 +156,7 @@ class PlayerStatistics(db.Model):
             'games_minutes': self.games_minutes,
             'games_number': self.games_number,
             'games_position': self.games_position,
+            'position_category': self.position_category,
             'games_rating': self.games_rating,
             'games_captain': self.games_captain,
             'goals_total': self.goals_total,
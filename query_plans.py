@@ -0,0 +1,122 @@
+from typing import Dict, List
+from src.models.user import db
+from src.models.player import PlayerStatistics
+from src.services.api_football import LEAGUE_CONFIG
+from src.services.ranking_fields import FULL_FIELDS, RANKING_ORDER, keyset_filter, ranking_select
+from src.services.stats_overview import overview_scan
+
+
+def explain_query_plan(statement) -> List[str]:
+    """
+    Executa EXPLAIN QUERY PLAN (SQLite) para uma consulta SQLAlchemy
+
+    Args:
+        statement: Consulta (select ou Query.statement)
+
+    Returns:
+        Linhas de detalhe do plano (ex: 'SEARCH s USING INDEX ...')
+    """
+    connection = db.session.connection()
+    # EXPLAIN só compila a consulta: ler sqlite_master antes força a conexão a
+    # recarregar o esquema, caso índices tenham sido criados por outra conexão
+    connection.exec_driver_sql('SELECT count(*) FROM sqlite_master').all()
+
+    # Valores literais: o plano não depende de parâmetros e listas IN são expandidas
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}').all()
+    return [row[-1] for row in rows]
+
+
+def ranking_queries(season: int = 2023) -> List[Dict]:
+    """
+    Consultas dos endpoints de ranking, no mesmo formato usado pelas rotas
+
+    Returns:
+        Lista de {'name', 'indexes', 'statement', 'allow_temp_sort'}; 'indexes'
+        são os índices de player_statistics que a consulta pode percorrer
+    """
+    league_id = next(iter(LEAGUE_CONFIG))
+    continent = LEAGUE_CONFIG[league_id]['continent']
+    continent_leagues = [lid for lid, config in LEAGUE_CONFIG.items() if config.get('continent') == continent]
+
+    def ranking(*filters):
+        return ranking_select(FULL_FIELDS).where(*filters).order_by(*RANKING_ORDER).limit(50)
+
+    # Página seguinte (cursor): deve continuar sendo um range scan no mesmo índice
+    after = keyset_filter((50.0, 1000, 50))
+
+    return [
+        {'name': 'spp/rankings/global', 'indexes': ('ix_player_statistics_season_spp',),
+         'allow_temp_sort': False,
+         'statement': ranking(PlayerStatistics.season == season)},
+        {'name': 'spp/rankings/league', 'indexes': ('ix_player_statistics_league_season_spp',),
+         'allow_temp_sort': False,
+         'statement': ranking(PlayerStatistics.league_id == league_id, PlayerStatistics.season == season)},
+        {'name': 'spp/rankings/continent', 'indexes': ('ix_player_statistics_season_spp',),
+         'allow_temp_sort': False,
+         'statement': ranking(PlayerStatistics.league_id.in_(continent_leagues), PlayerStatistics.season == season)},
+        {'name': 'spp/rankings/position', 'indexes': ('ix_player_statistics_season_position_spp',),
+         'allow_temp_sort': False,
+         'statement': ranking(PlayerStatistics.season == season, PlayerStatistics.position_category == 'Defender')},
+        # Posição e liga: os dois índices compostos servem sem sort temporário; sem ANALYZE, a escolha
+        # do planner entre eles depende da ordem de criação do esquema
+        {'name': 'spp/rankings/position?league_id',
+         'indexes': ('ix_player_statistics_league_season_spp', 'ix_player_statistics_season_position_spp'),
+         'allow_temp_sort': False,
+         'statement': ranking(PlayerStatistics.season == season, PlayerStatistics.position_category == 'Defender',
+                              PlayerStatistics.league_id == league_id)},
+        {'name': 'spp/stats/overview', 'indexes': ('ix_player_statistics_season_spp',),
+         'allow_temp_sort': False,
+         'statement': overview_scan(season)},
+        {'name': 'players/top', 'indexes': ('ix_player_statistics_spp',),
+         'allow_temp_sort': False,
+         'statement': ranking()},
+        {'name': 'spp/rankings/global?cursor', 'indexes': ('ix_player_statistics_season_spp',),
+         'allow_temp_sort': False,
+         'statement': ranking(PlayerStatistics.season == season, after)},
+        {'name': 'spp/rankings/position?league_id&cursor',
+         'indexes': ('ix_player_statistics_league_season_spp', 'ix_player_statistics_season_position_spp'),
+         'allow_temp_sort': False,
+         'statement': ranking(PlayerStatistics.season == season, PlayerStatistics.position_category == 'Defender',
+                              PlayerStatistics.league_id == league_id, after)},
+        {'name': 'players/top?cursor', 'indexes': ('ix_player_statistics_spp',),
+         'allow_temp_sort': False,
+         'statement': ranking(after)},
+        # Sem temporada, o filtro por liga busca no índice da liga e ordena só as linhas dela
+        {'name': 'players/top?league_id', 'indexes': ('ix_player_statistics_league_season_spp',),
+         'allow_temp_sort': True,
+         'statement': ranking(PlayerStatistics.league_id == league_id)},
+    ]
+
+
+def check_ranking_query_plans(season: int = 2023) -> List[Dict]:
+    """
+    Verifica se as consultas de ranking usam um dos índices esperados em player_statistics e evitam sort temporário
+
+    Um índice removido falha a verificação mesmo que o planner caia em outro
+    índice (ex: o da temporada no lugar do da liga).
+
+    Returns:
+        Lista de {'name', 'indexes', 'plan', 'uses_index', 'temp_sort', 'ok'};
+        lista vazia se o banco não for SQLite
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return []
+
+    results = []
+    for query in ranking_queries(season):
+        plan = explain_query_plan(query['statement'])
+        uses_index = any(
+            'player_statistics' in line and 'USING' in line and any(index in line.split() for index in query['indexes'])
+            for line in plan
+        )
+        temp_sort = any('USE TEMP B-TREE FOR ORDER BY' in line for line in plan)
+        results.append({
+            'name': query['name'],
+            'indexes': query['indexes'],
+            'plan': plan,
+            'uses_index': uses_index,
+            'temp_sort': temp_sort,
+            'ok': uses_index and (query['allow_temp_sort'] or not temp_sort)
+        })
+    return results
@@ -0,0 +1,207 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional
+from src.models.user import db
+from src.models.player import PlayerStatistics
+from src.services.api_football import LEAGUE_CONFIG
+from src.services.ranking_cache import current_data_version
+from src.services.ranking_fields import RANKING_ORDER, ranking_select
+
+CONTINENT_BY_LEAGUE = {league_id: config['continent'] for league_id, config in LEAGUE_CONFIG.items()}
+
+
+def _sort_key(spp_score: Optional[float], stats_id: int) -> tuple:
+    """Chave crescente equivalente a RANKING_ORDER (spp_score DESC, id DESC; NULL por último)"""
+    return (float('inf') if spp_score is None else -spp_score), -stats_id
+
+
+def _scope_keys(league_id: int, position_category: Optional[str]) -> Dict[str, object]:
+    """Chave de cada escopo (global, liga, continente e categoria de posição) de uma linha; None fora do escopo"""
+    return {
+        'global': '',
+        'league': league_id,
+        'continent': CONTINENT_BY_LEAGUE.get(league_id),
+        'position': position_category
+    }
+
+
+class SeasonRankIndex:
+    """
+    Índice de estatística de ordem dos rankings de uma temporada
+
+    Para cada (escopo, chave) guarda uma lista ordenada das chaves
+    (-spp_score, -id), a mesma ordem das rotas de ranking. A posição de uma
+    linha é uma busca binária (O(log n)); uma pontuação alterada sai e volta
+    para as listas dos seus escopos por busca binária, sem reconstruir o
+    índice. As tuplas de chave são compartilhadas entre os escopos.
+    """
+
+    def __init__(self, season: int, version: int):
+        """
+        Inicializa um índice vazio
+
+        Args:
+            season: Temporada
+            version: Versão dos dados que o índice representa
+        """
+        self.season = season
+        self.version = version
+        # (escopo, chave) -> chaves ordenadas
+        self._lists = {}
+        # stats_id -> (chave de ordenação, chaves dos escopos)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, season: int, version: int) -> 'SeasonRankIndex':
+        """
+        Monta o índice numa única leitura, já na ordem dos rankings (sem ordenar em memória)
+
+        Entram as mesmas linhas das rotas de ranking (joins com jogador, liga e time).
+        """
+        index = cls(season, version)
+        query = ranking_select(['statistics.league_id', 'statistics.position_category']).where(
+            PlayerStatistics.season == season
+        ).order_by(*RANKING_ORDER)
+        for league_id, position_category, spp_score, stats_id in db.session.execute(query):
+            key = _sort_key(spp_score, stats_id)
+            scopes = _scope_keys(league_id, position_category)
+            index._entries[stats_id] = (key, scopes)
+            for scope, scope_key in scopes.items():
+                if scope_key is not None:
+                    index._lists.setdefault((scope, scope_key), []).append(key)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rank(self, spp_score: Optional[float], stats_id: int, scope: str, scope_key=None) -> Optional[Dict]:
+        """
+        Posição de uma linha num escopo
+
+        Args:
+            spp_score: Pontuação da linha
+            stats_id: ID da estatística
+            scope: global, league, continent ou position
+            scope_key: Chave do escopo (padrão: a da própria linha)
+
+        Returns:
+            Dict com posição, total do escopo e percentil (percentual do escopo
+            que fica abaixo), ou None se a linha não estiver no escopo
+        """
+        key = _sort_key(spp_score, stats_id)
+        with self._lock:
+            entry = self._entries.get(stats_id)
+            if entry is None or entry[0] != key:
+                return None
+            if scope_key is None:
+                scope_key = entry[1][scope]
+            keys = self._lists.get((scope, scope_key))
+            if not keys:
+                return None
+            position = bisect.bisect_left(keys, key)
+            if position == len(keys) or keys[position] != key:
+                return None
+            total = len(keys)
+        return {
+            'rank': position + 1,
+            'total': total,
+            'percentile': round(100 * (total - position - 1) / total, 1)
+        }
+
+    def ranks(self, spp_score: Optional[float], stats_id: int) -> Dict[str, Dict]:
+        """Posição da linha em cada escopo em que ela aparece (escopo -> rank())"""
+        entry = self._entries.get(stats_id)
+        if entry is None:
+            return {}
+        ranks = {}
+        for scope, scope_key in entry[1].items():
+            if scope_key is None:
+                continue
+            rank = self.rank(spp_score, stats_id, scope)
+            if rank is not None:
+                ranks[scope] = dict(rank, key=scope_key)
+        return ranks
+
+    def update_scores(self, updates: Iterable[Dict]):
+        """
+        Aplica pontuações alteradas ({'id', 'spp_score'}, formato dos UPDATE em lote do recálculo)
+
+        IDs que não estão no índice (linhas sem jogador, liga ou time) são ignorados.
+        """
+        with self._lock:
+            for update in updates:
+                entry = self._entries.get(update['id'])
+                if entry is None:
+                    continue
+                old_key, scopes = entry
+                new_key = _sort_key(update['spp_score'], update['id'])
+                if new_key == old_key:
+                    continue
+                for scope, scope_key in scopes.items():
+                    if scope_key is None:
+                        continue
+                    keys = self._lists[(scope, scope_key)]
+                    del keys[bisect.bisect_left(keys, old_key)]
+                    bisect.insort(keys, new_key)
+                self._entries[update['id']] = (new_key, scopes)
+
+
+class RankIndexRegistry:
+    """
+    Índices de posição abertos neste processo, um por temporada
+
+    Um índice vale enquanto a versão dos dados não mudar. O recálculo feito
+    neste processo aplica as pontuações alteradas ao índice já aberto e o
+    passa para a versão nova (advance); mudanças feitas por outros processos
+    (ou por sincronizações) fazem o índice ser remontado na próxima consulta.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, season: int) -> SeasonRankIndex:
+        """Índice da temporada na versão atual dos dados (montado na primeira consulta)"""
+        version = current_data_version()
+        index = self._indexes.get(season)
+        if index is not None and index.version == version:
+            return index
+        with self._lock:
+            index = self._indexes.get(season)
+            if index is None or index.version != version:
+                index = SeasonRankIndex.build(season, version)
+                self._indexes[season] = index
+        return index
+
+    def apply_score_updates(self, season: int, updates: List[Dict]):
+        """Aplica pontuações alteradas por um recálculo ao índice aberto da temporada (se houver)"""
+        index = self._indexes.get(season)
+        if index is not None and updates:
+            index.update_scores(updates)
+
+    def advance(self, to_version: int):
+        """
+        Passa os índices para a versão gravada por uma mudança cujas pontuações já foram aplicadas
+
+        Chamada logo depois de bump_data_version no recálculo (pontuações já
+        aplicadas com apply_score_updates) e na reconstrução dos rankings (que
+        não altera pontuações). Índices que não estavam na versão
+        imediatamente anterior perderam alguma outra mudança e são descartados.
+        """
+        with self._lock:
+            for season, index in list(self._indexes.items()):
+                if index.version == to_version - 1:
+                    index.version = to_version
+                elif index.version != to_version:
+                    del self._indexes[season]
+
+    def stats(self) -> List[Dict]:
+        """Temporadas indexadas neste processo (versão e linhas)"""
+        return [
+            {'season': season, 'version': index.version, 'rows': len(index)}
+            for season, index in sorted(self._indexes.items())
+        ]
+
+
+rank_indexes = RankIndexRegistry()
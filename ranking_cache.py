@@ -0,0 +1,276 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+from flask import Response, make_response, request
+from src.models.user import db
+from src.models.data_version import DataVersion
+
+# Versão dos dados que alimentam os rankings (rotas de ranking e /api/players/top)
+RANKINGS = 'rankings'
+
+# Por quanto tempo cada processo reaproveita a versão lida do banco
+DATA_VERSION_TTL_SECONDS = float(os.getenv('DATA_VERSION_TTL_SECONDS', 1.0))
+
+# nome -> (expira em, versão, atualizada em)
+_version_memo = {}
+
+
+def data_version_info(name: str = RANKINGS) -> Tuple[int, Optional[datetime]]:
+    """
+    Versão atual dos dados e o momento da última mudança
+
+    A leitura é reaproveitada por DATA_VERSION_TTL_SECONDS: requisições
+    seguidas não consultam o banco, e uma mudança feita por outro processo
+    é percebida em até esse intervalo.
+
+    Returns:
+        Tupla (versão, atualizada em UTC); (0, None) enquanto nenhuma
+        sincronização ou recálculo foi registrado
+    """
+    now = time.monotonic()
+    memo = _version_memo.get(name)
+    if memo is not None and memo[0] > now:
+        return memo[1], memo[2]
+
+    row = db.session.execute(
+        db.select(DataVersion.version, DataVersion.updated_at).where(DataVersion.name == name)
+    ).first()
+    version, updated_at = (row.version, row.updated_at) if row else (0, None)
+    _version_memo[name] = (now + DATA_VERSION_TTL_SECONDS, version, updated_at)
+    return version, updated_at
+
+
+def current_data_version(name: str = RANKINGS) -> int:
+    """Versão atual dos dados (ver data_version_info)"""
+    return data_version_info(name)[0]
+
+
+def bump_data_version(name: str = RANKINGS) -> int:
+    """
+    Incrementa a versão dos dados, invalidando os resultados em cache de todos os processos
+
+    Deve ser chamada depois do commit dos dados alterados: uma requisição que
+    leia a versão antiga e os dados novos apenas grava em cache sob a versão
+    que está prestes a ser descartada. Faz commit.
+
+    Returns:
+        Nova versão
+    """
+    updated = db.session.execute(
+        db.update(DataVersion).where(DataVersion.name == name).values(
+            version=DataVersion.version + 1,
+            updated_at=db.func.current_timestamp()
+        )
+    )
+    if updated.rowcount == 0:
+        db.session.add(DataVersion(name=name, version=1))
+    db.session.commit()
+    _version_memo.pop(name, None)
+    return current_data_version(name)
+
+
+class RankingCache:
+    """
+    Cache em memória (LRU) das respostas de ranking já serializadas
+
+    Guarda os bytes JSON de cada resposta (e a versão com gzip, quando
+    compensa comprimir), indexados pela rota e pelos parâmetros normalizados,
+    e limitado a ``max_bytes``. Todas as entradas
+    pertencem a uma única versão dos dados: quando uma requisição traz uma
+    versão mais nova, o cache inteiro é descartado.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Inicializa o cache
+
+        Args:
+            max_bytes: Tamanho máximo (bytes das respostas) antes da evicção LRU
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str, version: int) -> Optional[Tuple[bytes, str, Dict, Optional[bytes]]]:
+        """
+        Busca uma resposta
+
+        Args:
+            key: Rota e parâmetros normalizados
+            version: Versão dos dados lida no início da requisição
+
+        Returns:
+            Tupla (corpo, mimetype, cabeçalhos, corpo com gzip ou None) ou None
+        """
+        with self._lock:
+            self._sync_version(version)
+            entry = self._entries.get(key) if version == self._version else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: str, version: int, body: bytes, mimetype: str, headers: Dict = None,
+            gzip_body: Optional[bytes] = None):
+        """
+        Grava uma resposta (e cabeçalhos próprios, como X-Next-Cursor) calculada com os dados da versão ``version``
+
+        ``gzip_body`` é o mesmo corpo já comprimido; os acertos de clientes que
+        aceitam gzip o usam sem comprimir de novo.
+        """
+        size = _entry_size(key, body, gzip_body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._sync_version(version)
+            # Resposta de uma versão já substituída: não entra no cache
+            if version != self._version:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= _entry_size(key, previous[0], previous[3])
+            self._entries[key] = (body, mimetype, headers or {}, gzip_body)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old_key, (old_body, _, _, old_gzip) = self._entries.popitem(last=False)
+                self._bytes -= _entry_size(old_key, old_body, old_gzip)
+                self.evictions += 1
+
+    def clear(self):
+        """Descarta todas as entradas"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Contadores do cache (acertos, falhas, evicções, tamanho)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'version': self._version,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+    def _sync_version(self, version: int):
+        """Descarta as entradas se os dados mudaram (chamada com o lock)"""
+        if self._version is None or version > self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+
+def _entry_size(key: str, body: bytes, gzip_body: Optional[bytes]) -> int:
+    """Bytes contados de uma entrada do cache (corpo, corpo com gzip e chave)"""
+    return len(body) + len(gzip_body or b'') + len(key)
+
+
+ranking_cache = RankingCache(max_bytes=int(os.getenv('RANKING_CACHE_MAX_MB', 64)) * 1024 * 1024)
+
+
+def _cache_key() -> str:
+    """Rota + parâmetros da query string ordenados (parâmetros vazios são ignorados)"""
+    args = sorted((key, value) for key, value in request.args.items(multi=True) if value != '')
+    return f'{request.path}?{urlencode(args)}'
+
+
+def cached_ranking(view):
+    """
+    Decorador das rotas de ranking: serve a resposta do cache enquanto a versão dos dados não mudar
+
+    Apenas respostas 200 são gravadas. O corpo é comprimido uma vez, antes
+    de entrar no cache: acertos de clientes que aceitam gzip recebem os bytes
+    já comprimidos. Desativado com RANKING_CACHE_DISABLED=1.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # json_stream depende (via leaderboard_service) deste módulo
+        from src.services.json_stream import accepts_gzip, gzip_body, set_gzip_body
+
+        if os.getenv('RANKING_CACHE_DISABLED') == '1':
+            return view(*args, **kwargs)
+
+        version = current_data_version()
+        key = _cache_key()
+        entry = ranking_cache.get(key, version)
+        if entry is not None:
+            body, mimetype, headers, compressed = entry
+            response = Response(body, mimetype=mimetype, headers=headers)
+            if compressed is not None and accepts_gzip():
+                set_gzip_body(response, compressed)
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        response = make_response(view(*args, **kwargs))
+        # Respostas transmitidas em partes não passam pelo cache (seria preciso montá-las inteiras)
+        if response.status_code == 200 and not response.is_streamed:
+            headers = {name: value for name, value in response.headers.items() if name.startswith('X-')}
+            body = response.get_data()
+            compressed = gzip_body(body, response.mimetype)
+            ranking_cache.set(key, version, body, response.mimetype, headers, compressed)
+            if compressed is not None and accepts_gzip():
+                set_gzip_body(response, compressed)
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
+
+
+def conditional_get(view):
+    """
+    Decorador de GET condicional: ETag e Last-Modified derivados da versão dos dados
+
+    O ETag combina a versão dos dados com a rota e os parâmetros normalizados.
+    If-None-Match (ou, na falta dele, If-Modified-Since) que ainda corresponda
+    à versão atual é respondido com 304 sem executar a rota.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version, updated_at = data_version_info()
+        etag = f'v{version}-' + hashlib.sha1(_cache_key().encode('utf-8')).hexdigest()[:16]
+        last_modified = updated_at.replace(tzinfo=timezone.utc, microsecond=0) if updated_at else None
+
+        if request.if_none_match:
+            # '*' não é aceito: a rota ainda pode responder 400/404
+            not_modified = not request.if_none_match.star_tag and request.if_none_match.contains_weak(etag)
+        else:
+            not_modified = bool(last_modified and request.if_modified_since
+                                and last_modified <= request.if_modified_since)
+
+        if not_modified:
+            response = Response(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        if last_modified:
+            response.last_modified = last_modified
+        # O navegador guarda a resposta, mas revalida a cada uso
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    return wrapper
@@ -0,0 +1,284 @@
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.models.user import db
+from src.models.league import League
+from src.models.player import Player, Team, PlayerStatistics
+
+# Blocos aninhados dos itens de ranking: nome -> modelo
+GROUPS = {
+    'statistics': PlayerStatistics,
+    'league': League,
+    'team': Team
+}
+
+# Linhas lidas por vez nas respostas transmitidas em partes
+ROW_BATCH_SIZE = 500
+
+# Campos calculados pela rota (não vêm de uma coluna)
+COMPUTED_FIELDS = ('rank', 'spp_score')
+
+# Ordem de todos os rankings: o id desempata e torna a ordem total (chave da paginação por cursor).
+# Em ordem decrescente, percorre os índices (..., spp_score) de trás para frente, sem ordenação temporária.
+RANKING_ORDER = (PlayerStatistics.spp_score.desc(), PlayerStatistics.id.desc())
+
+# Linhas que entram nos rankings: sem pontuação (spp_score NULL) não há
+# posição nem chave de cursor. Vale para as consultas, os rankings
+# materializados e os snapshots, que partem todos de ranking_select.
+SCORED_ROWS = PlayerStatistics.spp_score.isnot(None)
+
+
+def _dict_keys(model) -> List[str]:
+    """Chaves de to_dict() do modelo (a projeção reproduz exatamente esse formato)"""
+    return list(model().to_dict().keys())
+
+
+# Campo público (como em to_dict, com 'bloco.campo' para os aninhados) -> coluna
+FIELD_COLUMNS = {key: getattr(Player, key) for key in _dict_keys(Player)}
+for _group, _model in GROUPS.items():
+    FIELD_COLUMNS.update({f'{_group}.{key}': getattr(_model, key) for key in _dict_keys(_model)})
+
+PLAYER_FIELDS = _dict_keys(Player)
+
+# Formato completo (jogador + estatísticas, liga e time completos): /players/top e payloads materializados
+FULL_FIELDS = list(FIELD_COLUMNS)
+
+# Rankings por liga e continente (SPPCalculator.get_league_ranking)
+DETAILED_FIELDS = FULL_FIELDS + ['rank', 'spp_score']
+
+# Colunas lidas pelos rankings global e por posição (compact_ranking_item)
+COMPACT_FIELDS = PLAYER_FIELDS + [
+    'statistics.id', 'statistics.spp_score', 'statistics.goals_total', 'statistics.goals_assists',
+    'statistics.games_appearences', 'statistics.games_minutes', 'statistics.games_rating',
+    'statistics.games_position', 'league.id', 'league.name', 'league.country', 'league.logo',
+    'team.id', 'team.name', 'team.logo'
+]
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Interpreta o parâmetro fields= (lista separada por vírgulas)
+
+    Aceita os campos de to_dict() do jogador, 'bloco.campo' para
+    estatísticas, liga e time, o bloco inteiro ('statistics', 'league',
+    'team') e os campos calculados 'rank' e 'spp_score'.
+
+    Returns:
+        Lista de campos na ordem pedida, ou None se o parâmetro estiver vazio
+
+    Raises:
+        ValueError: Campo desconhecido
+    """
+    if not value:
+        return None
+    fields = []
+    for field in (part.strip() for part in value.split(',')):
+        if field and field not in fields:
+            fields.append(field)
+    unknown = [
+        field for field in fields
+        if field not in FIELD_COLUMNS and field not in GROUPS and field not in COMPUTED_FIELDS
+    ]
+    if unknown:
+        raise ValueError(f'Campos inválidos: {unknown}')
+    return fields or None
+
+
+def parse_limit(value: Optional[str], default: int) -> int:
+    """
+    Interpreta o parâmetro limit= dos rankings
+
+    Limites menores que 1 não são aceitos: LIMIT negativo no SQL lê a tabela
+    inteira e escaparia do corte de transmissão em partes (should_stream).
+
+    Returns:
+        Limite pedido, ou o padrão da rota se o parâmetro estiver vazio
+
+    Raises:
+        ValueError: Valor que não é um inteiro positivo
+    """
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f'limit inválido: {value!r} (use um inteiro positivo)')
+    if limit < 1:
+        raise ValueError(f'limit inválido: {limit} (use um inteiro positivo)')
+    return limit
+
+
+def expand_fields(fields: Iterable[str]) -> List[str]:
+    """Troca blocos inteiros ('statistics') pelos campos deles e remove os calculados"""
+    expanded = []
+    for field in fields:
+        if field in GROUPS:
+            expanded.extend(key for key in FIELD_COLUMNS if key.startswith(f'{field}.'))
+        elif field in FIELD_COLUMNS:
+            expanded.append(field)
+    return list(dict.fromkeys(expanded))
+
+
+def keyset_filter(after: Optional[tuple], score_column=PlayerStatistics.spp_score, id_column=PlayerStatistics.id):
+    """
+    Condição das linhas depois do cursor na ordem RANKING_ORDER (None na primeira página)
+
+    O spp_score do cursor nunca é NULL (decode_cursor recusa): os rankings só
+    têm linhas de SCORED_ROWS, onde a comparação por tupla é sempre definida.
+    """
+    if after is None:
+        return None
+    spp_score, stats_id, _ = after
+    return db.tuple_(score_column, id_column) < (spp_score, stats_id)
+
+
+def ranking_select(fields: Iterable[str], scored_only: bool = True):
+    """
+    Consulta de ranking que lê só as colunas dos campos pedidos (linhas como tuplas, sem entidades ORM)
+
+    Os joins são os mesmos das consultas com entidades, para que entrem as
+    mesmas linhas. As duas últimas colunas são sempre spp_score e o id da
+    estatística (chave do cursor).
+
+    Args:
+        fields: Campos de cada item
+        scored_only: Só linhas com pontuação (SCORED_ROWS); False para leituras
+            fora dos rankings, como o perfil de um jogador e as exportações
+    """
+    columns = [FIELD_COLUMNS[field].label(f'f{index}') for index, field in enumerate(expand_fields(fields))]
+    query = db.select(
+        *columns,
+        PlayerStatistics.spp_score.label('_spp_score'),
+        PlayerStatistics.id.label('_stats_id')
+    ).select_from(PlayerStatistics).join(
+        Player, Player.id == PlayerStatistics.player_id
+    ).join(
+        League, PlayerStatistics.league_id == League.id
+    ).join(
+        Team, PlayerStatistics.team_id == Team.id
+    )
+    return query.where(SCORED_ROWS) if scored_only else query
+
+
+def row_serializer(fields: List[str]) -> Callable[[tuple, int], Dict]:
+    """Função que monta um item a partir de uma tupla de ranking_select(fields) e da posição"""
+    with_rank = 'rank' in fields
+    with_score = 'spp_score' in fields
+    # (índice na tupla, bloco ou None, chave)
+    layout = [
+        (index, *(field.split('.', 1) if '.' in field else (None, field)))
+        for index, field in enumerate(expand_fields(fields))
+    ]
+    groups = [group for group in GROUPS if any(block == group for _, block, _ in layout)]
+
+    def serialize(row: tuple, rank: int) -> Dict:
+        item = {}
+        for group in groups:
+            item[group] = {}
+        for index, group, key in layout:
+            value = row[index]
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            if group is None:
+                item[key] = value
+            else:
+                item[group][key] = value
+        if with_rank:
+            item['rank'] = rank
+        if with_score:
+            item['spp_score'] = row[-2]
+        return item
+
+    return serialize
+
+
+def serialize_rows(rows: List[tuple], fields: Iterable[str], first_rank: int = 1) -> Tuple[List[Dict], Optional[tuple]]:
+    """
+    Monta os itens a partir das tuplas de ranking_select
+
+    Args:
+        rows: Linhas de ranking_select(fields)
+        fields: Os mesmos campos passados a ranking_select
+        first_rank: Posição do primeiro item (continua a página anterior)
+
+    Returns:
+        Tupla (itens, chave do último item para o cursor)
+    """
+    serialize = row_serializer(list(fields))
+    items = [serialize(row, rank) for rank, row in enumerate(rows, first_rank)]
+    last_key = (rows[-1][-2], rows[-1][-1], first_rank + len(rows) - 1) if rows else None
+    return items, last_key
+
+
+def ranking_page(filters: List, limit: int, after: Optional[tuple] = None,
+                 fields: Iterable[str] = DETAILED_FIELDS) -> Tuple[List[Dict], Optional[tuple]]:
+    """
+    Lê uma página de ranking com projeção de colunas
+
+    Args:
+        filters: Condições da consulta (temporada, liga, posição...)
+        limit: Tamanho da página
+        after: Cursor decodificado (spp_score, stats_id, posição) da página anterior
+        fields: Campos de cada item
+
+    Returns:
+        Tupla (itens, chave do último item para o cursor)
+    """
+    fields = list(fields)
+    query = ranking_select(fields).where(*filters)
+    if after is not None:
+        query = query.where(keyset_filter(after))
+    rows = db.session.execute(query.order_by(*RANKING_ORDER).limit(limit)).all()
+    return serialize_rows(rows, fields, after[2] + 1 if after else 1)
+
+
+def iter_ranking_page(filters: List, limit: int, after: Optional[tuple] = None,
+                      fields: Iterable[str] = DETAILED_FIELDS) -> Iterator[Tuple[Dict, tuple]]:
+    """
+    Versão incremental de ranking_page: lê as linhas em lotes (yield_per) e entrega um item por vez
+
+    A memória fica limitada ao lote, qualquer que seja o limit.
+
+    Yields:
+        Tuplas (item, chave do item para o cursor)
+    """
+    fields = list(fields)
+    serialize = row_serializer(fields)
+    query = ranking_select(fields).where(*filters)
+    if after is not None:
+        query = query.where(keyset_filter(after))
+    query = query.order_by(*RANKING_ORDER).limit(limit).execution_options(yield_per=ROW_BATCH_SIZE)
+    for rank, row in enumerate(db.session.execute(query), after[2] + 1 if after else 1):
+        yield serialize(row, rank), (row[-2], row[-1], rank)
+
+
+def ranking_key_at(filters: List, after: Optional[tuple], position: int) -> Optional[tuple]:
+    """
+    Chave (spp_score, stats_id, posição) do item na posição ``position`` (1 = primeiro depois do cursor)
+
+    Usada para saber o cursor da próxima página antes de transmitir a página.
+    """
+    query = ranking_select([]).where(*filters)
+    if after is not None:
+        query = query.where(keyset_filter(after))
+    row = db.session.execute(query.order_by(*RANKING_ORDER).offset(position - 1).limit(1)).first()
+    if row is None:
+        return None
+    return row[-2], row[-1], (after[2] if after else 0) + position
+
+
+def pick_fields(item: Dict, fields: Iterable[str], rank: int = None) -> Dict:
+    """Projeta um item completo (payload materializado) nos campos pedidos"""
+    picked = {}
+    for field in fields:
+        if field == 'rank':
+            picked['rank'] = rank
+        elif field == 'spp_score':
+            picked['spp_score'] = item['statistics']['spp_score']
+        elif field in GROUPS:
+            picked[field] = dict(item[field])
+        elif '.' in field:
+            group, key = field.split('.', 1)
+            picked.setdefault(group, {})[key] = item[group][key]
+        else:
+            picked[field] = item[field]
+    return picked
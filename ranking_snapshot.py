@@ -0,0 +1,428 @@
+import bisect
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from src.models.user import db
+from src.models.player import PlayerStatistics
+from src.services.api_football import LEAGUE_CONFIG
+from src.services.ranking_cache import current_data_version
+from src.services.ranking_fields import (
+    DETAILED_FIELDS, FIELD_COLUMNS, FULL_FIELDS, RANKING_ORDER, expand_fields, ranking_select, row_serializer
+)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele, os rankings são lidos do banco
+    np = None
+
+# Diretório dos snapshots (um subdiretório por temporada e versão dos dados)
+SNAPSHOT_DIR = os.getenv(
+    'RANKING_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'snapshots')
+)
+
+# Linhas lidas do banco por vez na construção
+SNAPSHOT_BATCH_ROWS = 1000
+
+# Campos gravados: o formato completo cobre o formato padrão de todas as rotas de ranking
+SNAPSHOT_FIELDS = FULL_FIELDS
+
+CONTINENT_BY_LEAGUE = {league_id: config['continent'] for league_id, config in LEAGUE_CONFIG.items()}
+
+# Escopos dos rankings (os mesmos dos rankings materializados): nome -> chave a partir de (liga, posição)
+SCOPES = {
+    'league': lambda league_id, category: league_id,
+    'continent': lambda league_id, category: CONTINENT_BY_LEAGUE.get(league_id),
+    'position': lambda league_id, category: category,
+    'position_league': lambda league_id, category: f'{league_id}:{category}' if category else None,
+}
+
+# temporada -> SeasonSnapshot aberto neste processo
+_snapshots = {}
+
+
+def is_available() -> bool:
+    """Indica se os snapshots podem ser usados (NumPy instalado e não desativados com RANKING_SNAPSHOT_DISABLED=1)"""
+    return np is not None and os.getenv('RANKING_SNAPSHOT_DISABLED') != '1'
+
+
+def _column_kind(field: str) -> str:
+    """Tipo do array de uma coluna: int, float, bool ou str (datas viram texto ISO, como em to_dict)"""
+    column_type = FIELD_COLUMNS[field].type
+    if isinstance(column_type, db.Boolean):
+        return 'bool'
+    if isinstance(column_type, db.Integer):
+        return 'int'
+    if isinstance(column_type, db.Float):
+        return 'float'
+    return 'str'
+
+
+def _season_dir(season: int) -> str:
+    return os.path.join(SNAPSHOT_DIR, f'season-{season}')
+
+
+def build_season_snapshot(season: int, version: int) -> Optional[Dict]:
+    """
+    Grava o snapshot colunar de uma temporada para a versão ``version`` dos dados
+
+    As linhas ficam na ordem dos rankings (RANKING_ORDER), uma coluna por
+    arquivo .npy de largura fixa; textos viram códigos numa tabela de strings
+    sem repetições. Para cada escopo (liga, continente, posição...) é gravado
+    o índice das linhas agrupado por chave, já na ordem do ranking. O
+    diretório é escrito com outro nome e renomeado no fim, então os leitores
+    nunca veem um snapshot incompleto; as versões anteriores são apagadas.
+
+    Args:
+        season: Temporada
+        version: Versão dos dados (bump_data_version) que o snapshot representa
+
+    Returns:
+        Metadados do snapshot (linhas, bytes, tempo de construção), ou None se
+        a temporada não tiver linhas
+    """
+    started = time.perf_counter()
+    fields = expand_fields(SNAPSHOT_FIELDS)
+    values = [[] for _ in fields]
+    scores = []
+    stats_ids = []
+
+    query = ranking_select(fields).where(PlayerStatistics.season == season).order_by(*RANKING_ORDER)
+    for row in db.session.execute(query.execution_options(yield_per=SNAPSHOT_BATCH_ROWS)):
+        for column, value in zip(values, row):
+            column.append(value)
+        scores.append(row[-2])
+        stats_ids.append(row[-1])
+    if not stats_ids:
+        return None
+
+    season_dir = _season_dir(season)
+    target = os.path.join(season_dir, f'v{version}')
+    staging = os.path.join(season_dir, f'.v{version}.{os.getpid()}.tmp')
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    # Tabela de strings: texto -> código (posição em string_offsets)
+    codes = {}
+    columns = {}
+    for field, column in zip(fields, values):
+        kind = _column_kind(field)
+        nulls = [value is None for value in column]
+        if kind == 'str':
+            array = np.array([
+                -1 if value is None else codes.setdefault(
+                    value.isoformat() if isinstance(value, datetime) else str(value), len(codes)
+                )
+                for value in column
+            ], dtype=np.int32)
+        elif kind == 'float':
+            array = np.array([np.nan if value is None else value for value in column], dtype=np.float64)
+        else:
+            array = np.array([0 if value is None else value for value in column],
+                             dtype=np.int8 if kind == 'bool' else np.int64)
+            if any(nulls):
+                np.save(os.path.join(staging, f'{field}.null.npy'), np.array(nulls, dtype=np.bool_))
+        np.save(os.path.join(staging, f'{field}.npy'), array)
+        columns[field] = {'kind': kind, 'nullable': kind in ('int', 'bool') and any(nulls)}
+
+    encoded = [text.encode('utf-8') for text in codes]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(text) for text in encoded])
+    np.save(os.path.join(staging, 'string_offsets.npy'), offsets)
+    np.save(os.path.join(staging, 'strings.npy'), np.frombuffer(b''.join(encoded), dtype=np.uint8))
+    np.save(os.path.join(staging, 'spp_score.npy'), np.array(
+        [np.nan if score is None else score for score in scores], dtype=np.float64
+    ))
+    np.save(os.path.join(staging, 'stats_id.npy'), np.array(stats_ids, dtype=np.int64))
+
+    # Índices dos escopos: linhas de cada chave em sequência, na ordem do ranking
+    league_ids = values[fields.index('league.id')]
+    categories = values[fields.index('statistics.position_category')]
+    scopes = {}
+    for scope, scope_key in SCOPES.items():
+        groups = {}
+        for index, (league_id, category) in enumerate(zip(league_ids, categories)):
+            key = scope_key(league_id, category)
+            if key is not None:
+                groups.setdefault(str(key), []).append(index)
+        ranges = {}
+        ordered = []
+        for key, indexes in groups.items():
+            ranges[key] = [len(ordered), len(ordered) + len(indexes)]
+            ordered.extend(indexes)
+        np.save(os.path.join(staging, f'scope-{scope}.npy'), np.array(ordered, dtype=np.int32))
+        scopes[scope] = ranges
+
+    meta = {
+        'season': season,
+        'version': version,
+        'rows': len(stats_ids),
+        'fields': fields,
+        'columns': columns,
+        'scopes': scopes,
+        'strings': len(encoded),
+        'built_at': datetime.utcnow().isoformat(),
+        'build_seconds': round(time.perf_counter() - started, 3)
+    }
+    meta['bytes'] = sum(
+        os.path.getsize(os.path.join(staging, name)) for name in os.listdir(staging)
+    )
+    with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as meta_file:
+        json.dump(meta, meta_file)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.rename(staging, target)
+    # Processos que ainda mapeiam uma versão antiga continuam lendo as páginas já abertas
+    for name in os.listdir(season_dir):
+        if name != f'v{version}' and not name.endswith('.tmp'):
+            shutil.rmtree(os.path.join(season_dir, name), ignore_errors=True)
+    return meta
+
+
+def build_snapshots(seasons: Iterable[int], version: int) -> Dict:
+    """
+    Grava os snapshots das temporadas ao fim de rebuild_leaderboards
+
+    Uma falha de disco não interrompe a reconstrução: as rotas continuam
+    lendo do banco enquanto não houver snapshot da versão atual.
+
+    Returns:
+        Dict temporada -> linhas, bytes e segundos (ou o erro)
+    """
+    if not is_available():
+        return {}
+    results = {}
+    for season in seasons:
+        try:
+            meta = build_season_snapshot(season, version)
+        except OSError as e:
+            print(f"Aviso: snapshot da temporada {season} não gravado: {e}")
+            results[season] = {'error': str(e)}
+            continue
+        if meta is not None:
+            results[season] = {key: meta[key] for key in ('version', 'rows', 'bytes', 'build_seconds')}
+    return results
+
+
+def _load_array(path: str):
+    """Abre um .npy mapeado em memória (arrays vazios não podem ser mapeados e são lidos normalmente)"""
+    try:
+        # ndarray comum sobre o mesmo mapeamento: evita o custo de np.memmap em cada indexação
+        return np.asarray(np.load(path, mmap_mode='r'))
+    except ValueError:
+        return np.load(path)
+
+
+class SeasonSnapshot:
+    """
+    Snapshot colunar de uma temporada, mapeado em memória (somente leitura)
+
+    Os arrays são abertos com mmap: as páginas vêm do cache de arquivos do
+    sistema, compartilhadas entre todos os processos, e só as linhas de uma
+    página de ranking são lidas e convertidas em cada requisição.
+    """
+
+    def __init__(self, path: str):
+        """
+        Abre um snapshot gravado por build_season_snapshot
+
+        Args:
+            path: Diretório season-<temporada>/v<versão>
+        """
+        started = time.perf_counter()
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as meta_file:
+            self.meta = json.load(meta_file)
+        self.version = self.meta['version']
+        self.rows = self.meta['rows']
+        self.fields = self.meta['fields']
+
+        self._strings = _load_array(os.path.join(path, 'strings.npy'))
+        self._string_offsets = _load_array(os.path.join(path, 'string_offsets.npy'))
+        self._scores = _load_array(os.path.join(path, 'spp_score.npy'))
+        self._stats_ids = _load_array(os.path.join(path, 'stats_id.npy'))
+        self._scopes = {scope: _load_array(os.path.join(path, f'scope-{scope}.npy')) for scope in SCOPES}
+        self._readers = {field: self._column_reader(field) for field in self.fields}
+        self.load_seconds = round(time.perf_counter() - started, 4)
+
+    def _column_reader(self, field: str) -> Callable[[object], list]:
+        """Função que lê uma coluna nas linhas indicadas (array de índices), já como tipos Python (None para NULL)"""
+        column = self.meta['columns'][field]
+        array = _load_array(os.path.join(self.path, f'{field}.npy'))
+        kind = column['kind']
+
+        if kind == 'str':
+            def read(indexes):
+                codes = array[indexes].tolist()
+                texts = {code: self._string(code) for code in set(codes)}
+                return [texts[code] for code in codes]
+            return read
+
+        if kind == 'float':
+            return lambda indexes: [None if value != value else value for value in array[indexes].tolist()]  # NaN = NULL
+
+        if kind == 'bool':
+            convert = lambda indexes: array[indexes].astype(np.bool_).tolist()
+        else:
+            convert = lambda indexes: array[indexes].tolist()
+        if not column['nullable']:
+            return convert
+        nulls = _load_array(os.path.join(self.path, f'{field}.null.npy'))
+        return lambda indexes: [
+            None if null else value for value, null in zip(convert(indexes), nulls[indexes].tolist())
+        ]
+
+    def _string(self, code: int) -> Optional[str]:
+        """Texto de um código da tabela de strings (-1 = NULL)"""
+        if code < 0:
+            return None
+        start, end = self._string_offsets[code], self._string_offsets[code + 1]
+        return self._strings[start:end].tobytes().decode('utf-8')
+
+    def covers(self, fields: Iterable[str]) -> bool:
+        """Indica se todos os campos pedidos estão no snapshot"""
+        return set(expand_fields(fields)) <= set(self.fields)
+
+    def scope_rows(self, scope: str, scope_key: str = ''):
+        """Linhas de um escopo na ordem do ranking (range para 'global', array de índices nos demais)"""
+        if scope == 'global':
+            return range(self.rows)
+        bounds = self.meta['scopes'][scope].get(str(scope_key))
+        if bounds is None:
+            return range(0)
+        return self._scopes[scope][bounds[0]:bounds[1]]
+
+    def _ranking_key(self, row: int) -> tuple:
+        """Chave crescente equivalente a RANKING_ORDER (spp_score DESC, id DESC; NULL por último)"""
+        score = float(self._scores[row])
+        return (float('inf') if score != score else -score), -int(self._stats_ids[row])
+
+    def iter_rows(self, scope: str, scope_key: str, limit: int, after: Optional[tuple],
+                  fields: List[str]) -> Iterator[tuple]:
+        """
+        Linhas de uma página no mesmo layout de ranking_select(fields)
+
+        O início depois do cursor é achado por busca binária na chave
+        (spp_score, id), como o filtro por tupla das consultas.
+        """
+        rows = self.scope_rows(scope, scope_key)
+        start = 0
+        if after is not None:
+            spp_score, stats_id, _ = after
+            start = bisect.bisect_right(
+                range(len(rows)), (-spp_score, -stats_id), key=lambda position: self._ranking_key(rows[position])
+            )
+        readers = [self._readers[field] for field in expand_fields(fields)]
+        # Cada coluna é lida de uma vez por lote de linhas (indexação vetorizada nos arrays mapeados)
+        end = min(start + limit, len(rows))
+        for batch_start in range(start, end, SNAPSHOT_BATCH_ROWS):
+            indexes = np.asarray(rows[batch_start:min(batch_start + SNAPSHOT_BATCH_ROWS, end)])
+            scores = [None if score != score else score for score in self._scores[indexes].tolist()]
+            yield from zip(*(read(indexes) for read in readers), scores, self._stats_ids[indexes].tolist())
+
+    def info(self) -> Dict:
+        """Metadados e tempos de construção e abertura"""
+        return {
+            'season': self.meta['season'],
+            'version': self.version,
+            'rows': self.rows,
+            'strings': self.meta['strings'],
+            'bytes': self.meta['bytes'],
+            'built_at': self.meta['built_at'],
+            'build_seconds': self.meta['build_seconds'],
+            'load_seconds': self.load_seconds
+        }
+
+
+def get_snapshot(season: int) -> Optional[SeasonSnapshot]:
+    """
+    Snapshot da temporada para a versão atual dos dados
+
+    Returns:
+        SeasonSnapshot, ou None se os snapshots estiverem indisponíveis ou se
+        ainda não houver snapshot da versão atual (quem chama lê do banco)
+    """
+    if not is_available():
+        return None
+    version = current_data_version()
+    snapshot = _snapshots.get(season)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    path = os.path.join(_season_dir(season), f'v{version}')
+    if not os.path.isfile(os.path.join(path, 'meta.json')):
+        return None
+    try:
+        snapshot = SeasonSnapshot(path)
+    except (OSError, ValueError, KeyError):
+        # Apagado por uma reconstrução mais nova entre a verificação e a abertura
+        return None
+    _snapshots[season] = snapshot
+    return snapshot
+
+
+def _open(season: int, fields: List[str]) -> Optional[SeasonSnapshot]:
+    snapshot = get_snapshot(season)
+    if snapshot is None or not snapshot.covers(fields):
+        return None
+    return snapshot
+
+
+def snapshot_page(season: int, scope: str, scope_key: str = '', limit: int = 50, after: Optional[tuple] = None,
+                  fields: Iterable[str] = DETAILED_FIELDS) -> Optional[Tuple[List[Dict], Optional[tuple]]]:
+    """
+    Versão de ranking_page servida pelo snapshot da temporada
+
+    Args:
+        season: Temporada
+        scope: global, league, continent, position ou position_league
+        scope_key: Chave do escopo (ID da liga, continente, posição, 'liga:posição')
+        limit: Tamanho da página
+        after: Cursor decodificado da página anterior
+        fields: Campos de cada item
+
+    Returns:
+        Tupla (itens, chave do último item para o cursor), ou None se não
+        houver snapshot atual com esses campos
+    """
+    fields = list(fields)
+    snapshot = _open(season, fields)
+    if snapshot is None:
+        return None
+    serialize = row_serializer(fields)
+    first_rank = after[2] + 1 if after else 1
+    items = []
+    last_key = None
+    for rank, row in enumerate(snapshot.iter_rows(scope, scope_key, limit, after, fields), first_rank):
+        items.append(serialize(row, rank))
+        last_key = (row[-2], row[-1], rank)
+    return items, last_key
+
+
+def iter_snapshot_page(season: int, scope: str, scope_key: str = '', limit: int = 50, after: Optional[tuple] = None,
+                       fields: Iterable[str] = DETAILED_FIELDS) -> Optional[Iterator[Tuple[Dict, tuple]]]:
+    """Versão de iter_ranking_page servida pelo snapshot (None se não houver snapshot atual com esses campos)"""
+    fields = list(fields)
+    snapshot = _open(season, fields)
+    if snapshot is None:
+        return None
+
+    def generate():
+        serialize = row_serializer(fields)
+        rows = snapshot.iter_rows(scope, scope_key, limit, after, fields)
+        for rank, row in enumerate(rows, after[2] + 1 if after else 1):
+            yield serialize(row, rank), (row[-2], row[-1], rank)
+
+    return generate()
+
+
+def snapshot_stats() -> Dict:
+    """Snapshots abertos neste processo (tamanho, tempos de construção e de abertura)"""
+    return {
+        'enabled': is_available(),
+        'directory': SNAPSHOT_DIR,
+        'loaded': [snapshot.info() for _, snapshot in sorted(_snapshots.items())]
+    }
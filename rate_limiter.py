@@ -0,0 +1,300 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Mapping, Optional
+
+# Períodos de reposição de cada bucket (segundos)
+BUCKET_PERIODS = {
+    'minute': 60.0,
+    'day': 86400.0
+}
+
+# Buckets de janela fixa: a cota volta inteira no início de cada período
+# (a cota diária da API-Sports zera à meia-noite UTC) em vez de ser reposta
+# aos poucos. Os demais buckets são repostos continuamente.
+WINDOW_BUCKETS = {'day'}
+
+# Reservas em andamento mais antigas que isso são descartadas (processo que
+# caiu entre acquire e a resposta), para não reduzir a cota para sempre
+RESERVATION_TTL = 300.0
+
+# Headers enviados pela API-Sports: (bucket, header de limite, header de restante)
+RATE_LIMIT_HEADERS = [
+    ('day', 'x-ratelimit-requests-limit', 'x-ratelimit-requests-remaining'),
+    ('minute', 'x-ratelimit-limit', 'x-ratelimit-remaining'),
+]
+
+
+class RateLimitExceeded(Exception):
+    """A cota disponível não permite uma nova requisição dentro da espera máxima"""
+    pass
+
+
+class TokenBucketLimiter:
+    """
+    Rate limiter token bucket com cotas por minuto e por dia
+
+    O estado dos buckets fica numa pequena tabela SQLite local, e cada retirada
+    de token acontece dentro de uma transação ``BEGIN IMMEDIATE``. Assim o
+    limite é respeitado por todas as threads e por todos os processos (workers
+    do gunicorn) que apontam para o mesmo arquivo.
+
+    A capacidade e os tokens restantes são ajustados a partir dos headers
+    ``X-RateLimit-*`` devolvidos pela API, de modo que o limiter converge para
+    o plano real da conta em vez de um intervalo fixo conservador. Cada
+    acquire deixa uma reserva em andamento até a resposta chegar
+    (update_from_headers) ou a requisição falhar (release); o ``remaining``
+    do servidor passa a valer descontadas as reservas que ele ainda não viu.
+    """
+
+    def __init__(self, db_path: str, per_minute: int = 60, per_day: int = 100,
+                 name: str = 'api_football', max_wait: float = 120.0):
+        """
+        Inicializa o limiter
+
+        Args:
+            db_path: Caminho do arquivo SQLite compartilhado
+            per_minute: Requisições permitidas por minuto (valor inicial)
+            per_day: Requisições permitidas por dia (valor inicial)
+            name: Nome da cota (permite vários limiters no mesmo arquivo)
+            max_wait: Espera máxima (segundos) antes de desistir com RateLimitExceeded
+        """
+        self.db_path = db_path
+        self.name = name
+        self.max_wait = max_wait
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._transaction() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit_buckets ('
+                ' name TEXT NOT NULL,'
+                ' bucket TEXT NOT NULL,'
+                ' capacity REAL NOT NULL,'
+                ' tokens REAL NOT NULL,'
+                ' updated_at REAL NOT NULL,'
+                ' in_flight REAL NOT NULL DEFAULT 0,'
+                ' in_flight_at REAL NOT NULL DEFAULT 0,'
+                ' PRIMARY KEY (name, bucket))'
+            )
+            # Arquivos criados antes das reservas em andamento
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(rate_limit_buckets)')}
+            for column in ('in_flight', 'in_flight_at'):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE rate_limit_buckets ADD COLUMN {column} REAL NOT NULL DEFAULT 0')
+            now = time.time()
+            for bucket, capacity in (('minute', per_minute), ('day', per_day)):
+                conn.execute(
+                    'INSERT OR IGNORE INTO rate_limit_buckets (name, bucket, capacity, tokens, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (name, bucket, float(capacity), float(capacity), now)
+                )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão SQLite própria de cada thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._connection())
+
+    def _load_buckets(self, conn: sqlite3.Connection, now: float) -> Dict[str, Dict]:
+        """
+        Lê os buckets e aplica a reposição de tokens desde a última atualização
+
+        Buckets de janela fixa voltam à capacidade quando a última atualização
+        é de uma janela anterior; os demais são repostos proporcionalmente ao
+        tempo decorrido.
+        """
+        buckets = {}
+        rows = conn.execute(
+            'SELECT bucket, capacity, tokens, updated_at, in_flight, in_flight_at '
+            'FROM rate_limit_buckets WHERE name = ?',
+            (self.name,)
+        ).fetchall()
+        for bucket, capacity, tokens, updated_at, in_flight, in_flight_at in rows:
+            period = BUCKET_PERIODS[bucket]
+            if bucket in WINDOW_BUCKETS:
+                window_start = now - now % period
+                rate = 0.0
+                reset_at = window_start + period
+                if updated_at < window_start:
+                    tokens = capacity
+            else:
+                rate = capacity / period
+                reset_at = None
+                tokens = min(capacity, tokens + max(now - updated_at, 0.0) * rate)
+            if now - in_flight_at > RESERVATION_TTL:
+                in_flight = 0.0
+            buckets[bucket] = {
+                'capacity': capacity,
+                'tokens': tokens,
+                'rate': rate,
+                'reset_at': reset_at,
+                'in_flight': in_flight,
+                'in_flight_at': in_flight_at
+            }
+        return buckets
+
+    def _save_buckets(self, conn: sqlite3.Connection, buckets: Dict[str, Dict], now: float):
+        for bucket, state in buckets.items():
+            conn.execute(
+                'UPDATE rate_limit_buckets SET capacity = ?, tokens = ?, updated_at = ?, '
+                'in_flight = ?, in_flight_at = ? WHERE name = ? AND bucket = ?',
+                (state['capacity'], state['tokens'], now, state['in_flight'], state['in_flight_at'],
+                 self.name, bucket)
+            )
+
+    @staticmethod
+    def _wait_for(state: Dict, tokens: float, now: float) -> float:
+        """Espera até o bucket ter os tokens pedidos (próxima janela, nos buckets de janela fixa)"""
+        if state['tokens'] >= tokens:
+            return 0.0
+        if state['reset_at'] is not None:
+            return max(state['reset_at'] - now, 0.0) if tokens <= state['capacity'] else float('inf')
+        if state['rate'] <= 0:
+            return float('inf')
+        return (tokens - state['tokens']) / state['rate']
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Retira tokens de todos os buckets, esperando se necessário
+
+        Os tokens retirados ficam como reserva em andamento até a resposta
+        (update_from_headers) ou a falha da requisição (release).
+
+        Args:
+            tokens: Quantidade de tokens (requisições) a consumir
+
+        Returns:
+            Tempo total esperado (segundos)
+
+        Raises:
+            RateLimitExceeded: Se a espera necessária ultrapassar max_wait
+        """
+        waited = 0.0
+        while True:
+            with self._transaction() as conn:
+                now = time.time()
+                buckets = self._load_buckets(conn, now)
+                wait = max((self._wait_for(state, tokens, now) for state in buckets.values()), default=0.0)
+                if wait == 0.0:
+                    for state in buckets.values():
+                        state['tokens'] -= tokens
+                        state['in_flight'] += tokens
+                        state['in_flight_at'] = now
+                    self._save_buckets(conn, buckets, now)
+                    return waited
+
+            if waited + wait > self.max_wait:
+                raise RateLimitExceeded(
+                    f"Cota da API esgotada: seria necessário esperar {wait:.0f}s por uma nova requisição"
+                )
+            time.sleep(wait)
+            waited += wait
+
+    def update_from_headers(self, headers: Mapping[str, str], tokens: float = 1.0):
+        """
+        Encerra a reserva da requisição respondida e adota a cota informada pelos headers
+
+        O ``remaining`` do servidor já conta esta requisição, mas não as que
+        ainda estão em andamento; os tokens passam a ser ``remaining`` menos
+        essas reservas, subindo ou descendo conforme o servidor.
+
+        Args:
+            headers: Headers HTTP da resposta (case-insensitive, como em requests)
+            tokens: Tokens retirados pelo acquire desta requisição
+        """
+        updates = {}
+        for bucket, limit_header, remaining_header in RATE_LIMIT_HEADERS:
+            limit = _parse_number(headers.get(limit_header))
+            remaining = _parse_number(headers.get(remaining_header))
+            if limit is not None or remaining is not None:
+                updates[bucket] = (limit, remaining)
+
+        with self._transaction() as conn:
+            now = time.time()
+            buckets = self._load_buckets(conn, now)
+            for bucket, state in buckets.items():
+                state['in_flight'] = max(state['in_flight'] - tokens, 0.0)
+                limit, remaining = updates.get(bucket, (None, None))
+                if limit is not None and limit > 0:
+                    state['capacity'] = limit
+                    state['tokens'] = min(state['tokens'], limit)
+                if remaining is not None:
+                    state['tokens'] = min(max(remaining - state['in_flight'], 0.0), state['capacity'])
+            self._save_buckets(conn, buckets, now)
+
+    def release(self, tokens: float = 1.0):
+        """
+        Encerra a reserva de uma requisição que falhou sem resposta
+
+        Os tokens não voltam para os buckets (o servidor pode ter contado a
+        requisição); só deixam de ser descontados do próximo ``remaining``.
+
+        Args:
+            tokens: Tokens retirados pelo acquire desta requisição
+        """
+        with self._transaction() as conn:
+            now = time.time()
+            buckets = self._load_buckets(conn, now)
+            for state in buckets.values():
+                state['in_flight'] = max(state['in_flight'] - tokens, 0.0)
+            self._save_buckets(conn, buckets, now)
+
+    def status(self) -> Dict[str, Dict]:
+        """
+        Retorna o estado atual dos buckets
+
+        Returns:
+            Dict com capacidade, tokens disponíveis, requisições em andamento e
+            reposição (taxa por segundo ou início da próxima janela) por bucket
+        """
+        with self._transaction() as conn:
+            buckets = self._load_buckets(conn, time.time())
+        status = {}
+        for bucket, state in buckets.items():
+            status[bucket] = {
+                'capacity': state['capacity'],
+                'available': round(state['tokens'], 2),
+                'in_flight': state['in_flight'],
+                'refill_per_second': state['rate']
+            }
+            if state['reset_at'] is not None:
+                status[bucket]['resets_at'] = state['reset_at']
+        return status
+
+
+class _ImmediateTransaction:
+    """Context manager para transações BEGIN IMMEDIATE (lock de escrita entre processos)"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute('COMMIT')
+        else:
+            self.conn.execute('ROLLBACK')
+        return False
+
+
+def _parse_number(value) -> Optional[float]:
+    """Converte o valor de um header numérico, ignorando valores inválidos"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,120 @@
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: apenas o lock entre threads
+    fcntl = None
+
+
+class ResponseArchive:
+    """
+    Arquivo append-only das respostas brutas da API Football
+
+    Cada página baixada é acrescentada como uma linha JSON num arquivo gzip
+    segmentado por endpoint, liga e temporada (ex:
+    ``players/league=39/season=2023.jsonl.gz``). Cada append gera um novo
+    membro gzip, o que mantém os arquivos válidos mesmo após uma queda do
+    processo. O arquivo permite reconstruir o banco sem gastar cota da API.
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        Args:
+            root_dir: Diretório raiz do arquivo
+        """
+        self.root_dir = root_dir
+        self._lock = threading.Lock()
+
+    def segment_path(self, endpoint: str, params: Dict = None) -> str:
+        """
+        Caminho do segmento de uma requisição
+
+        Args:
+            endpoint: Endpoint da API (ex: '/players')
+            params: Parâmetros da query string
+
+        Returns:
+            Caminho do arquivo .jsonl.gz
+        """
+        params = params or {}
+        parts = [self.root_dir, endpoint.strip('/').replace('/', '_') or 'root']
+        if params.get('league') is not None:
+            parts.append(f"league={params['league']}")
+        name = f"season={params['season']}.jsonl.gz" if params.get('season') is not None else 'all.jsonl.gz'
+        return os.path.join(*parts, name)
+
+    def append(self, endpoint: str, params: Dict, payload: Dict):
+        """
+        Acrescenta uma resposta ao arquivo
+
+        Args:
+            endpoint: Endpoint da API
+            params: Parâmetros da query string
+            payload: Resposta bruta da API
+        """
+        record = {
+            'fetched_at': time.time(),
+            'endpoint': endpoint,
+            'params': params or {},
+            'payload': payload
+        }
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+        data = gzip.compress(line)
+        path = self.segment_path(endpoint, params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._lock:
+            with open(path, 'ab') as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.write(data)
+                    f.flush()
+                finally:
+                    if fcntl:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def iter_records(self, endpoint: str = None, league_id: int = None, season: int = None) -> Iterator[Dict]:
+        """
+        Percorre as respostas arquivadas, na ordem em que foram gravadas em cada segmento
+
+        Args:
+            endpoint: Filtra por endpoint (ex: '/players')
+            league_id: Filtra por liga
+            season: Filtra por temporada
+
+        Yields:
+            Registros com as chaves 'fetched_at', 'endpoint', 'params' e 'payload'
+        """
+        endpoint_dir = endpoint.strip('/').replace('/', '_') if endpoint else '*'
+        pattern = os.path.join(self.root_dir, endpoint_dir, '**', '*.jsonl.gz')
+
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            for record in self._read_segment(path):
+                params = record.get('params') or {}
+                if league_id is not None and str(params.get('league')) != str(league_id):
+                    continue
+                if season is not None and str(params.get('season')) != str(season):
+                    continue
+                yield record
+
+    @staticmethod
+    def _read_segment(path: str) -> Iterator[Dict]:
+        """Lê um segmento, tolerando um último membro truncado por uma queda durante a escrita"""
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+            except (EOFError, OSError):
+                return
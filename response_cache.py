@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+
+class ResponseCache:
+    """
+    Cache persistente (read-through) das respostas da API Football
+
+    As respostas ficam comprimidas numa tabela SQLite local, indexadas pelo
+    endpoint e pelos parâmetros normalizados. Cada entrada tem um TTL próprio
+    (``None`` = nunca expira) e o tamanho total em disco é limitado por
+    ``max_bytes``: ao ultrapassá-lo, as entradas usadas há mais tempo (LRU)
+    são descartadas. Como o arquivo é compartilhado, workers diferentes
+    aproveitam as respostas já baixadas uns pelos outros.
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Inicializa o cache
+
+        Args:
+            db_path: Caminho do arquivo SQLite do cache
+            max_bytes: Tamanho máximo (bytes comprimidos) antes da evicção LRU
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS response_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' endpoint TEXT NOT NULL,'
+            ' body BLOB NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' expires_at REAL,'
+            ' last_access REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_response_cache_last_access ON response_cache (last_access)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão SQLite própria de cada thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict = None) -> str:
+        """
+        Gera a chave do cache a partir do endpoint e dos parâmetros normalizados
+
+        Args:
+            endpoint: Endpoint da API (ex: '/players')
+            params: Parâmetros da query string
+
+        Returns:
+            Hash SHA-256 hexadecimal
+        """
+        normalized = sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)
+        raw = json.dumps([endpoint, normalized], separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
+        """
+        Busca uma resposta no cache
+
+        Args:
+            endpoint: Endpoint da API
+            params: Parâmetros da query string
+
+        Returns:
+            Resposta da API, ou None se ausente/expirada
+        """
+        key = self.make_key(endpoint, params)
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute('SELECT body, expires_at FROM response_cache WHERE key = ?', (key,)).fetchone()
+
+        if row is not None and (row[1] is None or row[1] > now):
+            conn.execute('UPDATE response_cache SET last_access = ? WHERE key = ?', (now, key))
+            self._count(hits=1)
+            return json.loads(zlib.decompress(row[0]))
+
+        if row is not None:
+            conn.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+        self._count(misses=1)
+        return None
+
+    def set(self, endpoint: str, params: Dict, payload: Dict, ttl: Optional[float]):
+        """
+        Armazena uma resposta no cache
+
+        Args:
+            endpoint: Endpoint da API
+            params: Parâmetros da query string
+            payload: Resposta da API
+            ttl: Tempo de vida em segundos (None = nunca expira)
+        """
+        key = self.make_key(endpoint, params)
+        body = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO response_cache (key, endpoint, body, size, expires_at, last_access) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (key, endpoint, body, len(body), expires_at, now)
+        )
+        self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Remove as entradas menos usadas até o cache caber em max_bytes"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM response_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in conn.execute('SELECT key, size FROM response_cache ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+            total -= size
+            evicted += 1
+        self._count(evictions=evicted)
+
+    def clear(self):
+        """Remove todas as entradas do cache"""
+        self._connection().execute('DELETE FROM response_cache')
+
+    def _count(self, hits: int = 0, misses: int = 0, evictions: int = 0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def stats(self) -> Dict:
+        """
+        Retorna os contadores do cache (deste processo) e o uso em disco
+
+        Returns:
+            Dict com hits, misses, evictions, entradas e bytes armazenados
+        """
+        entries, size = self._connection().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache'
+        ).fetchone()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': entries,
+                'bytes': size,
+                'max_bytes': self.max_bytes
+            }
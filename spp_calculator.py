@@ -1,8 +1,19 @@
-from typing import Dict, List, Optional
+import hashlib
+import json
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
 from src.models.player import PlayerStatistics
 from src.models.league import League
 from src.services.api_football import LEAGUE_CONFIG
 
+# Linhas por bloco no recálculo em streaming
+RECALCULATION_CHUNK_SIZE = 5000
+
+# Versão da fórmula: incrementar quando calculate_spp_score mudar de comportamento
+# (mudanças nos pesos já alteram config_fingerprint automaticamente)
+SCORING_FORMULA_VERSION = 1
+
 class SPPCalculator:
     """
     Sistema Ponderado de Performance (SPP) para avaliação de jogadores de futebol.
@@ -77,8 +88,8 @@ class SPPCalculator:
         if not stats or not league:
             return 0.0
         
-        # Determinar posição do jogador
-        position_category = cls._get_position_category(stats.games_position)
+        # Determinar posição do jogador (categoria gravada na ingestão, quando disponível)
+        position_category = getattr(stats, 'position_category', None) or cls._get_position_category(stats.games_position)
         position_multipliers = cls.POSITION_MULTIPLIERS.get(position_category, cls.POSITION_MULTIPLIERS['Midfielder'])
         
         # Calcular pontos base
@@ -149,6 +160,37 @@ class SPPCalculator:
         
         return max(final_score, 0.0)  # Nunca retornar pontuação negativa
     
+    @classmethod
+    def config_fingerprint(cls) -> str:
+        """
+        Identificador da configuração de pontuação em uso
+        
+        Gravado em PlayerStatistics.spp_version a cada cálculo: linhas com
+        versão diferente (ou sem versão) precisam ser recalculadas.
+        
+        Returns:
+            Hash curto da versão da fórmula, pesos, penalizações e bônus
+        """
+        payload = json.dumps(
+            [SCORING_FORMULA_VERSION, cls.POSITION_MULTIPLIERS, cls.PENALTIES, cls.BONUSES],
+            sort_keys=True
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+    
+    @classmethod
+    def score_statistics_row(cls, row: Dict, league: League) -> float:
+        """
+        Calcula a pontuação SPP de uma linha de player_statistics ainda não gravada
+        
+        Args:
+            row: Colunas da linha (ex: ingest.player_statistics_row)
+            league: Liga da linha
+            
+        Returns:
+            Pontuação SPP calculada
+        """
+        return cls.calculate_spp_score(SimpleNamespace(**row), league)
+    
     @classmethod
     def _get_position_category(cls, position: str) -> str:
         """
@@ -210,7 +252,8 @@ class SPPCalculator:
         return 0
     
     @classmethod
-    def get_league_ranking(cls, league_id: int, season: int = 2023, limit: int = 50) -> List[Dict]:
+    def get_league_ranking(cls, league_id: int, season: int = 2023, limit: int = 50,
+                           after: tuple = None) -> List[Dict]:
         """
         Obtém ranking de jogadores de uma liga específica
         
@@ -218,47 +261,22 @@ class SPPCalculator:
             league_id: ID da liga
             season: Temporada
             limit: Número máximo de jogadores
+            after: Cursor decodificado (spp_score, id, posição) da página anterior
             
         Returns:
             Lista de jogadores ordenados por pontuação SPP
         """
-        from src.models.user import db
-        from src.models.player import Player, Team
-        
-        query = db.session.query(
-            Player,
-            PlayerStatistics,
-            League,
-            Team
-        ).join(
-            PlayerStatistics, Player.id == PlayerStatistics.player_id
-        ).join(
-            League, PlayerStatistics.league_id == League.id
-        ).join(
-            Team, PlayerStatistics.team_id == Team.id
-        ).filter(
-            PlayerStatistics.league_id == league_id,
-            PlayerStatistics.season == season
-        ).order_by(
-            PlayerStatistics.spp_score.desc()
-        ).limit(limit)
-        
-        results = query.all()
-        
-        ranking = []
-        for i, (player, stats, league, team) in enumerate(results, 1):
-            player_data = player.to_dict()
-            player_data['rank'] = i
-            player_data['spp_score'] = stats.spp_score
-            player_data['statistics'] = stats.to_dict()
-            player_data['league'] = league.to_dict()
-            player_data['team'] = team.to_dict()
-            ranking.append(player_data)
+        from src.services.ranking_fields import ranking_page
         
+        ranking, _ = ranking_page(
+            [PlayerStatistics.league_id == league_id, PlayerStatistics.season == season],
+            limit, after=after
+        )
         return ranking
     
     @classmethod
-    def get_continental_ranking(cls, continent: str, season: int = 2023, limit: int = 100) -> List[Dict]:
+    def get_continental_ranking(cls, continent: str, season: int = 2023, limit: int = 100,
+                                after: tuple = None) -> List[Dict]:
         """
         Obtém ranking de jogadores por continente
         
@@ -266,12 +284,12 @@ class SPPCalculator:
             continent: Nome do continente ('Europe', 'South America', etc.)
             season: Temporada
             limit: Número máximo de jogadores
+            after: Cursor decodificado (spp_score, id, posição) da página anterior
             
         Returns:
             Lista de jogadores ordenados por pontuação SPP
         """
-        from src.models.user import db
-        from src.models.player import Player, Team
+        from src.services.ranking_fields import ranking_page
         
         # Filtrar ligas do continente
         continent_leagues = [
@@ -282,36 +300,10 @@ class SPPCalculator:
         if not continent_leagues:
             return []
         
-        query = db.session.query(
-            Player,
-            PlayerStatistics,
-            League,
-            Team
-        ).join(
-            PlayerStatistics, Player.id == PlayerStatistics.player_id
-        ).join(
-            League, PlayerStatistics.league_id == League.id
-        ).join(
-            Team, PlayerStatistics.team_id == Team.id
-        ).filter(
-            PlayerStatistics.league_id.in_(continent_leagues),
-            PlayerStatistics.season == season
-        ).order_by(
-            PlayerStatistics.spp_score.desc()
-        ).limit(limit)
-        
-        results = query.all()
-        
-        ranking = []
-        for i, (player, stats, league, team) in enumerate(results, 1):
-            player_data = player.to_dict()
-            player_data['rank'] = i
-            player_data['spp_score'] = stats.spp_score
-            player_data['statistics'] = stats.to_dict()
-            player_data['league'] = league.to_dict()
-            player_data['team'] = team.to_dict()
-            ranking.append(player_data)
-        
+        ranking, _ = ranking_page(
+            [PlayerStatistics.league_id.in_(continent_leagues), PlayerStatistics.season == season],
+            limit, after=after
+        )
         return ranking
     
     @classmethod
@@ -325,27 +317,232 @@ class SPPCalculator:
         Returns:
             Número de jogadores atualizados
         """
+        return cls.recalculate_scores_streaming(season)['rows_changed']
+    
+    @classmethod
+    def recalculate_scores_streaming(cls, season: int = 2023, chunk_size: int = RECALCULATION_CHUNK_SIZE,
+                                     stale_only: bool = False, rebuild: bool = True) -> Dict:
+        """
+        Recalcula as pontuações SPP de uma temporada em blocos de tamanho fixo
+        
+        As linhas são lidas em blocos ordenados por id (paginação por chave,
+        sem manter um cursor aberto entre transações), pontuadas e apenas as
+        que mudaram são gravadas com um UPDATE em lote por bloco, seguido de
+        commit. A memória fica limitada ao tamanho do bloco e o lock de escrita
+        do SQLite é liberado a cada bloco. As linhas pontuadas ficam marcadas
+        com a versão atual da configuração (spp_version); linhas sem liga
+        cadastrada não são pontuadas e continuam pendentes.
+        
+        Args:
+            season: Temporada para recalcular
+            chunk_size: Linhas por bloco
+            stale_only: Lê apenas linhas sem spp_version ou com versão diferente da atual
+            rebuild: Reconstrói os rankings materializados da temporada se alguma
+                pontuação mudou (False só para quem reconstrói logo em seguida)
+            
+        Returns:
+            Dict com linhas lidas, linhas alteradas, blocos, tempo decorrido e,
+            se houve reconstrução, o resultado de rebuild_leaderboards
+        """
+        from src.models.user import db
+        from src.services import spp_vectorized
+        from src.services.rank_index import rank_indexes
+        from src.services.ranking_cache import bump_data_version
+        from src.services.leaderboard_service import rebuild_leaderboards
+        
+        started = time.perf_counter()
+        score_chunk = cls._score_chunk_vectorized if spp_vectorized.is_available() else cls._score_chunk_scalar
+        fingerprint = cls.config_fingerprint()
+        stale = cls._stale_filter(fingerprint)
+        filters = [PlayerStatistics.season == season]
+        if stale_only:
+            filters.append(stale)
+        rows_scanned = 0
+        rows_changed = 0
+        chunks = 0
+        last_id = 0
+        
+        while True:
+            first_id = last_id
+            last_id, scanned, updates = score_chunk(filters, last_id, chunk_size)
+            if not scanned:
+                break
+            
+            if updates:
+                db.session.execute(db.update(PlayerStatistics), updates)
+            # Linhas pontuadas no intervalo (as do join com a liga) cuja pontuação não mudou só recebem a versão atual
+            db.session.execute(
+                db.update(PlayerStatistics).where(
+                    PlayerStatistics.season == season,
+                    PlayerStatistics.id > first_id,
+                    PlayerStatistics.id <= last_id,
+                    PlayerStatistics.league_id.in_(db.select(League.id)),
+                    stale
+                ).values(spp_version=fingerprint)
+            )
+            db.session.commit()
+            db.session.expunge_all()
+            rank_indexes.apply_score_updates(season, updates)
+            
+            rows_scanned += scanned
+            rows_changed += len(updates)
+            chunks += 1
+        
+        result = {
+            'season': season,
+            'rows_scanned': rows_scanned,
+            'rows_changed': rows_changed,
+            'chunks': chunks,
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        }
+        if rows_changed:
+            if rebuild:
+                # Rankings materializados com as pontuações novas (também incrementa a versão dos dados)
+                result['leaderboards'] = rebuild_leaderboards([season])
+            else:
+                rank_indexes.advance(bump_data_version())
+        return result
+    
+    @classmethod
+    def recalculate_stale_scores(cls, rebuild: bool = True) -> Dict[int, int]:
+        """
+        Recalcula apenas as linhas com pontuação pendente, em todas as temporadas
+        
+        A ingestão já pontua as linhas novas ou alteradas; ficam pendentes as
+        linhas gravadas antes do controle de versão, as de ligas cujo
+        multiplicador mudou e todas as linhas após uma mudança na configuração
+        de pontuação.
+        
+        Args:
+            rebuild: Reconstrói os rankings materializados das temporadas
+                alteradas (False só para quem reconstrói logo em seguida)
+        
+        Returns:
+            Dict temporada -> número de linhas alteradas
+        """
+        from src.models.user import db
+        from src.services.leaderboard_service import rebuild_leaderboards
+        
+        seasons = [
+            season for (season,) in db.session.query(PlayerStatistics.season).filter(
+                cls._stale_filter(cls.config_fingerprint())
+            ).distinct().all()
+        ]
+        changed = {
+            season: cls.recalculate_scores_streaming(season, stale_only=True, rebuild=False)['rows_changed']
+            for season in sorted(seasons)
+        }
+        # Uma reconstrução para todas as temporadas alteradas
+        changed_seasons = [season for season, rows in changed.items() if rows]
+        if rebuild and changed_seasons:
+            rebuild_leaderboards(changed_seasons)
+        return changed
+    
+    @classmethod
+    def _stale_filter(cls, fingerprint: str):
+        """Condição SQL das linhas cuja pontuação não corresponde à configuração atual"""
         from src.models.user import db
         
-        # Buscar todas as estatísticas da temporada
-        stats_query = db.session.query(PlayerStatistics, League).join(
+        return db.or_(PlayerStatistics.spp_version.is_(None), PlayerStatistics.spp_version != fingerprint)
+    
+    @classmethod
+    def _score_chunk_vectorized(cls, filters: List, after_id: int, chunk_size: int) -> Tuple[int, int, List[Dict]]:
+        """
+        Pontua um bloco de linhas com o motor vetorizado
+        
+        Args:
+            filters: Condições da consulta (temporada e, opcionalmente, linhas pendentes)
+            after_id: Último id do bloco anterior
+            chunk_size: Linhas por bloco
+        
+        Returns:
+            Tupla (último id lido, linhas lidas, atualizações {'id', 'spp_score'})
+        """
+        from src.models.user import db
+        from src.services.spp_vectorized import stat_columns_query
+        
+        rows = db.session.execute(
+            stat_columns_query().where(
+                *filters,
+                PlayerStatistics.id > after_id
+            ).order_by(PlayerStatistics.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            return after_id, 0, []
+        
+        return rows[-1][0], len(rows), cls.changed_scores_from_columns(rows)
+    
+    @classmethod
+    def changed_scores_from_columns(cls, rows: List[tuple]) -> List[Dict]:
+        """
+        Pontua linhas de stat_columns_query e retorna só as que mudaram
+        
+        Usa o motor vetorizado quando o NumPy está disponível; sem ele, cada
+        linha passa por calculate_spp_score (os NULLs já vêm como 0 do SQL,
+        o que não altera o resultado).
+        
+        Args:
+            rows: Tuplas (id, spp_score, games_position, position_category, games_rating,
+                multiplicador, *STAT_COLUMNS)
+            
+        Returns:
+            Atualizações {'id', 'spp_score'} das linhas cuja pontuação mudou
+        """
+        from src.services import spp_vectorized
+        
+        if not rows:
+            return []
+        
+        if not spp_vectorized.is_available():
+            updates = []
+            for stats_id, current_score, position, category, rating, multiplier, *values in rows:
+                stats = SimpleNamespace(games_position=position, position_category=category, games_rating=rating,
+                                        **dict(zip(spp_vectorized.STAT_COLUMNS, values)))
+                new_score = cls.calculate_spp_score(stats, SimpleNamespace(spp_multiplier=multiplier))
+                if current_score is None or abs(current_score - new_score) > 0.01:
+                    updates.append({'id': stats_id, 'spp_score': new_score})
+            return updates
+        
+        import numpy as np
+        data = spp_vectorized.StatColumns.from_rows(rows)
+        new_scores = spp_vectorized.score_columns(data)
+        # Mesmo critério do cálculo linha a linha: tolerância de 0.01
+        changed = np.isnan(data.current_scores) | (np.abs(data.current_scores - new_scores) > 0.01)
+        return [
+            {'id': int(stats_id), 'spp_score': float(score)}
+            for stats_id, score in zip(data.ids[changed], new_scores[changed])
+        ]
+    
+    @classmethod
+    def _score_chunk_scalar(cls, filters: List, after_id: int, chunk_size: int) -> Tuple[int, int, List[Dict]]:
+        """
+        Pontua um bloco de linhas com calculate_spp_score (referência, sem NumPy)
+        
+        Args:
+            filters: Condições da consulta (temporada e, opcionalmente, linhas pendentes)
+            after_id: Último id do bloco anterior
+            chunk_size: Linhas por bloco
+        
+        Returns:
+            Tupla (último id lido, linhas lidas, atualizações {'id', 'spp_score'})
+        """
+        from src.models.user import db
+        
+        results = db.session.query(PlayerStatistics, League).join(
             League, PlayerStatistics.league_id == League.id
-        ).filter(PlayerStatistics.season == season)
-        
-        updated_count = 0
-        
-        for stats, league in stats_query:
-            try:
-                # Recalcular pontuação SPP
-                new_score = cls.calculate_spp_score(stats, league)
-                
-                # Atualizar no banco se houve mudança
-                if abs(stats.spp_score - new_score) > 0.01:  # Tolerância para diferenças mínimas
-                    stats.spp_score = new_score
-                    updated_count += 1
-            except Exception as e:
-                print(f"Erro ao calcular SPP para o jogador {stats.player_id}: {e}")
-        
-        db.session.commit()
-        return updated_count
-
+        ).filter(
+            *filters,
+            PlayerStatistics.id > after_id
+        ).order_by(PlayerStatistics.id).limit(chunk_size).all()
+        if not results:
+            return after_id, 0, []
+        
+        updates = []
+        for stats, league in results:
+            new_score = cls.calculate_spp_score(stats, league)
+            
+            # Linhas ainda sem pontuação sempre são gravadas; as demais, se mudaram além da tolerância
+            if stats.spp_score is None or abs(stats.spp_score - new_score) > 0.01:
+                updates.append({'id': stats.id, 'spp_score': new_score})
+        
+        return results[-1][0].id, len(results), updates
@@ -1,255 +1,249 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import db
 from src.models.league import League
-from src.models.player import Player, Team, PlayerStatistics
+from src.models.player import Player, PlayerStatistics
+from src.models.leaderboard import LeaderboardBuild
 from src.services.spp_calculator import SPPCalculator
 from src.services.api_football import LEAGUE_CONFIG
+from src.services.jobs import JobProgress, job_runner
+from src.services.ranking_cache import cached_ranking, conditional_get
+from src.services.leaderboard_service import (
+    read_leaderboard, rebuild_leaderboards, leaderboards_after_recalculation, compact_ranking_item, detailed_ranking_item, decode_cursor, next_cursor,
+    payload_cursor_key
+)
+from src.services.ranking_fields import (
+    COMPACT_FIELDS, DETAILED_FIELDS, FULL_FIELDS, iter_ranking_page, parse_fields, parse_limit, pick_fields,
+    ranking_page, ranking_select, serialize_rows
+)
+from src.services.ranking_snapshot import iter_snapshot_page, snapshot_page
+from src.services.stats_overview import get_overview
+from src.services.rank_index import rank_indexes
+from src.services.json_stream import should_stream, stream_ranking
 
 spp_bp = Blueprint('spp', __name__)
 
 @spp_bp.route('/rankings/global', methods=['GET'])
+@conditional_get
+@cached_ranking
 def get_global_ranking():
     """Retorna ranking global dos melhores jogadores"""
     try:
-        limit = request.args.get('limit', 100, type=int)
         season = request.args.get('season', 2023, type=int)
-        
-        query = db.session.query(
-            Player,
-            PlayerStatistics,
-            League,
-            Team
-        ).join(
-            PlayerStatistics, Player.id == PlayerStatistics.player_id
-        ).join(
-            League, PlayerStatistics.league_id == League.id
-        ).join(
-            Team, PlayerStatistics.team_id == Team.id
-        ).filter(
-            PlayerStatistics.season == season
-        ).order_by(
-            PlayerStatistics.spp_score.desc()
-        ).limit(limit)
-        
-        results = query.all()
-        
-        ranking = []
-        for i, (player, stats, league, team) in enumerate(results, 1):
-            player_data = player.to_dict()
-            player_data['rank'] = i
-            player_data['spp_score'] = round(stats.spp_score, 2)
-            player_data['statistics'] = {
-                'goals': stats.goals_total,
-                'assists': stats.goals_assists,
-                'games': stats.games_appearences,
-                'minutes': stats.games_minutes,
-                'rating': stats.games_rating,
-                'position': stats.games_position
-            }
-            player_data['league'] = {
-                'id': league.id,
-                'name': league.name,
-                'country': league.country,
-                'logo': league.logo
-            }
-            player_data['team'] = {
-                'id': team.id,
-                'name': team.name,
-                'logo': team.logo
-            }
-            ranking.append(player_data)
+        try:
+            limit, after, fields = _page_args(100)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Ranking materializado ao fim da última sincronização/recálculo
+        materialized = read_leaderboard(season, 'global', limit=limit, after=after)
+        if materialized is not None:
+            ranking = _materialized_items(materialized, fields, compact_ranking_item)
+            last_key = payload_cursor_key(*materialized[-1])
+        else:
+            # Snapshot da temporada mapeado em memória; sem ele, só as colunas exibidas, lidas do banco como tuplas
+            filters = [PlayerStatistics.season == season]
+            page_fields = fields or COMPACT_FIELDS + ['rank']
+            if should_stream(limit):
+                return stream_ranking(
+                    iter_snapshot_page(season, 'global', '', limit, after, page_fields)
+                    or iter_ranking_page(filters, limit, after=after, fields=page_fields),
+                    limit, envelope={'season': season}, item_format=None if fields else _compact_item
+                )
+            ranking, last_key = (snapshot_page(season, 'global', '', limit, after, page_fields)
+                                 or ranking_page(filters, limit, after=after, fields=page_fields))
+            if not fields:
+                ranking = [_compact_item(item) for item in ranking]
         
         return jsonify({
             'ranking': ranking,
             'total': len(ranking),
-            'season': season
+            'season': season,
+            'next_cursor': next_cursor(last_key, len(ranking), limit)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @spp_bp.route('/rankings/league/<int:league_id>', methods=['GET'])
+@conditional_get
+@cached_ranking
 def get_league_ranking(league_id):
     """Retorna ranking de jogadores de uma liga específica"""
     try:
-        limit = request.args.get('limit', 50, type=int)
         season = request.args.get('season', 2023, type=int)
+        try:
+            limit, after, fields = _page_args(50)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Verificar se a liga existe
         league = League.query.filter_by(id=league_id).first()
         if not league:
             return jsonify({'error': 'Liga não encontrada'}), 404
         
-        ranking = SPPCalculator.get_league_ranking(league_id, season, limit)
+        materialized = read_leaderboard(season, 'league', league_id, limit=limit, after=after)
+        if materialized is not None:
+            ranking = _materialized_items(materialized, fields, detailed_ranking_item)
+            last_key = payload_cursor_key(*materialized[-1])
+        else:
+            filters = [PlayerStatistics.league_id == league_id, PlayerStatistics.season == season]
+            page_fields = fields or DETAILED_FIELDS
+            if should_stream(limit):
+                return stream_ranking(
+                    iter_snapshot_page(season, 'league', league_id, limit, after, page_fields)
+                    or iter_ranking_page(filters, limit, after=after, fields=page_fields),
+                    limit, envelope={'league': league.to_dict(), 'season': season}
+                )
+            ranking, last_key = (snapshot_page(season, 'league', league_id, limit, after, page_fields)
+                                 or ranking_page(filters, limit, after=after, fields=page_fields))
         
         return jsonify({
             'ranking': ranking,
             'league': league.to_dict(),
             'total': len(ranking),
-            'season': season
+            'season': season,
+            'next_cursor': next_cursor(last_key, len(ranking), limit)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @spp_bp.route('/rankings/continent/<continent>', methods=['GET'])
+@conditional_get
+@cached_ranking
 def get_continental_ranking(continent):
     """Retorna ranking de jogadores por continente"""
     try:
-        limit = request.args.get('limit', 100, type=int)
         season = request.args.get('season', 2023, type=int)
+        try:
+            limit, after, fields = _page_args(100)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Validar continente
         valid_continents = set(config.get('continent') for config in LEAGUE_CONFIG.values())
         if continent not in valid_continents:
             return jsonify({'error': f'Continente inválido. Opções: {list(valid_continents)}'}), 400
         
-        ranking = SPPCalculator.get_continental_ranking(continent, season, limit)
-        
         # Obter informações das ligas do continente
         continent_leagues = [
             {'id': league_id, **config} for league_id, config in LEAGUE_CONFIG.items()
             if config.get('continent') == continent
         ]
         
+        materialized = read_leaderboard(season, 'continent', continent, limit=limit, after=after)
+        if materialized is not None:
+            ranking = _materialized_items(materialized, fields, detailed_ranking_item)
+            last_key = payload_cursor_key(*materialized[-1])
+        else:
+            filters = [
+                PlayerStatistics.league_id.in_([league['id'] for league in continent_leagues]),
+                PlayerStatistics.season == season
+            ]
+            page_fields = fields or DETAILED_FIELDS
+            if should_stream(limit):
+                return stream_ranking(
+                    iter_snapshot_page(season, 'continent', continent, limit, after, page_fields)
+                    or iter_ranking_page(filters, limit, after=after, fields=page_fields),
+                    limit, envelope={'continent': continent, 'leagues': continent_leagues, 'season': season}
+                )
+            ranking, last_key = (snapshot_page(season, 'continent', continent, limit, after, page_fields)
+                                 or ranking_page(filters, limit, after=after, fields=page_fields))
+        
         return jsonify({
             'ranking': ranking,
             'continent': continent,
             'leagues': continent_leagues,
             'total': len(ranking),
-            'season': season
+            'season': season,
+            'next_cursor': next_cursor(last_key, len(ranking), limit)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @spp_bp.route('/rankings/position/<position>', methods=['GET'])
+@conditional_get
+@cached_ranking
 def get_position_ranking(position):
     """Retorna ranking de jogadores por posição"""
     try:
-        limit = request.args.get('limit', 50, type=int)
         season = request.args.get('season', 2023, type=int)
         league_id = request.args.get('league_id', type=int)
+        try:
+            limit, after, fields = _page_args(50)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Validar posição
         valid_positions = ['Goalkeeper', 'Defender', 'Midfielder', 'Attacker']
         if position not in valid_positions:
             return jsonify({'error': f'Posição inválida. Opções: {valid_positions}'}), 400
         
-        query = db.session.query(
-            Player,
-            PlayerStatistics,
-            League,
-            Team
-        ).join(
-            PlayerStatistics, Player.id == PlayerStatistics.player_id
-        ).join(
-            League, PlayerStatistics.league_id == League.id
-        ).join(
-            Team, PlayerStatistics.team_id == Team.id
-        ).filter(
-            PlayerStatistics.season == season
-        )
-        
-        # Filtrar por posição usando a categorização do SPPCalculator
-        position_filters = {
-            'Goalkeeper': ['Goalkeeper', 'goalkeeper', 'keeper'],
-            'Defender': ['back', 'defender', 'centre-back', 'left-back', 'right-back'],
-            'Attacker': ['forward', 'striker', 'winger', 'attacker'],
-            'Midfielder': []  # Será usado como padrão
-        }
-        
-        if position != 'Midfielder':
-            position_keywords = position_filters[position]
-            filters = []
-            for keyword in position_keywords:
-                filters.append(PlayerStatistics.games_position.ilike(f'%{keyword}%'))
-            query = query.filter(db.or_(*filters))
+        if league_id:
+            materialized = read_leaderboard(season, 'position_league', f'{league_id}:{position}', limit=limit,
+                                            after=after)
+        else:
+            materialized = read_leaderboard(season, 'position', position, limit=limit, after=after)
+        if materialized is not None:
+            ranking = _materialized_items(materialized, fields, compact_ranking_item)
+            last_key = payload_cursor_key(*materialized[-1])
         else:
-            # Para meio-campistas, excluir as outras posições
-            exclude_keywords = []
-            for pos, keywords in position_filters.items():
-                if pos != 'Midfielder':
-                    exclude_keywords.extend(keywords)
+            # Categoria gravada na ingestão: range scan no índice (season, position_category, spp_score)
+            filters = [PlayerStatistics.season == season, PlayerStatistics.position_category == position]
             
-            exclude_filters = []
-            for keyword in exclude_keywords:
-                exclude_filters.append(~PlayerStatistics.games_position.ilike(f'%{keyword}%'))
-            query = query.filter(db.and_(*exclude_filters))
-        
-        # Filtrar por liga se especificado
-        if league_id:
-            query = query.filter(PlayerStatistics.league_id == league_id)
-        
-        query = query.order_by(PlayerStatistics.spp_score.desc()).limit(limit)
-        results = query.all()
-        
-        ranking = []
-        for i, (player, stats, league, team) in enumerate(results, 1):
-            player_data = player.to_dict()
-            player_data['rank'] = i
-            player_data['spp_score'] = round(stats.spp_score, 2)
-            player_data['statistics'] = {
-                'goals': stats.goals_total,
-                'assists': stats.goals_assists,
-                'games': stats.games_appearences,
-                'minutes': stats.games_minutes,
-                'rating': stats.games_rating,
-                'position': stats.games_position
-            }
-            player_data['league'] = {
-                'id': league.id,
-                'name': league.name,
-                'country': league.country,
-                'logo': league.logo
-            }
-            player_data['team'] = {
-                'id': team.id,
-                'name': team.name,
-                'logo': team.logo
-            }
-            ranking.append(player_data)
+            # Filtrar por liga se especificado
+            if league_id:
+                filters.append(PlayerStatistics.league_id == league_id)
+            
+            scope, scope_key = ('position_league', f'{league_id}:{position}') if league_id else ('position', position)
+            page_fields = fields or COMPACT_FIELDS + ['rank']
+            if should_stream(limit):
+                return stream_ranking(
+                    iter_snapshot_page(season, scope, scope_key, limit, after, page_fields)
+                    or iter_ranking_page(filters, limit, after=after, fields=page_fields),
+                    limit, envelope={'position': position, 'season': season},
+                    item_format=None if fields else _compact_item
+                )
+            ranking, last_key = (snapshot_page(season, scope, scope_key, limit, after, page_fields)
+                                 or ranking_page(filters, limit, after=after, fields=page_fields))
+            if not fields:
+                ranking = [_compact_item(item) for item in ranking]
         
         return jsonify({
             'ranking': ranking,
             'position': position,
             'total': len(ranking),
-            'season': season
+            'season': season,
+            'next_cursor': next_cursor(last_key, len(ranking), limit)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @spp_bp.route('/player/<int:player_id>/spp', methods=['GET'])
+@conditional_get
 def get_player_spp(player_id):
     """Retorna detalhes da pontuação SPP de um jogador específico"""
     try:
         season = request.args.get('season', 2023, type=int)
         
-        # Buscar jogador e suas estatísticas
-        result = db.session.query(
-            Player,
-            PlayerStatistics,
-            League,
-            Team
-        ).join(
-            PlayerStatistics, Player.id == PlayerStatistics.player_id
-        ).join(
-            League, PlayerStatistics.league_id == League.id
-        ).join(
-            Team, PlayerStatistics.team_id == Team.id
-        ).filter(
-            Player.id == player_id,
-            PlayerStatistics.season == season
-        ).first()
+        # Buscar jogador e suas estatísticas (colunas lidas como tuplas, sem entidades ORM)
+        rows = db.session.execute(
+            ranking_select(FULL_FIELDS, scored_only=False).where(
+                Player.id == player_id,
+                PlayerStatistics.season == season
+            ).limit(1)
+        ).all()
         
-        if not result:
+        if not rows:
             return jsonify({'error': 'Jogador não encontrado'}), 404
         
-        player, stats, league, team = result
+        (player_data,), _ = serialize_rows(rows, FULL_FIELDS)
+        stats = player_data['statistics']
         
         # Calcular breakdown da pontuação SPP
-        position_category = SPPCalculator._get_position_category(stats.games_position)
+        position_category = stats['position_category'] or SPPCalculator._get_position_category(stats['games_position'])
         position_multipliers = SPPCalculator.POSITION_MULTIPLIERS.get(
             position_category, 
             SPPCalculator.POSITION_MULTIPLIERS['Midfielder']
@@ -257,31 +251,29 @@ def get_player_spp(player_id):
         
         breakdown = {
             'goals': {
-                'count': stats.goals_total or 0,
+                'count': stats['goals_total'] or 0,
                 'points_per': position_multipliers.get('goals', 6.0),
-                'total_points': (stats.goals_total or 0) * position_multipliers.get('goals', 6.0)
+                'total_points': (stats['goals_total'] or 0) * position_multipliers.get('goals', 6.0)
             },
             'assists': {
-                'count': stats.goals_assists or 0,
+                'count': stats['goals_assists'] or 0,
                 'points_per': position_multipliers.get('assists', 4.0),
-                'total_points': (stats.goals_assists or 0) * position_multipliers.get('assists', 4.0)
+                'total_points': (stats['goals_assists'] or 0) * position_multipliers.get('assists', 4.0)
             },
             'penalties': {
-                'yellow_cards': stats.cards_yellow or 0,
-                'red_cards': stats.cards_red or 0,
-                'penalty_points': ((stats.cards_yellow or 0) * SPPCalculator.PENALTIES['yellow_card']) + 
-                                ((stats.cards_red or 0) * SPPCalculator.PENALTIES['red_card'])
+                'yellow_cards': stats['cards_yellow'] or 0,
+                'red_cards': stats['cards_red'] or 0,
+                'penalty_points': ((stats['cards_yellow'] or 0) * SPPCalculator.PENALTIES['yellow_card']) + 
+                                ((stats['cards_red'] or 0) * SPPCalculator.PENALTIES['red_card'])
             },
-            'league_multiplier': league.spp_multiplier or 1.0,
+            'league_multiplier': player_data['league']['spp_multiplier'] or 1.0,
             'position_category': position_category
         }
         
-        player_data = player.to_dict()
-        player_data['spp_score'] = round(stats.spp_score, 2)
+        player_data['spp_score'] = round(stats['spp_score'], 2)
         player_data['spp_breakdown'] = breakdown
-        player_data['statistics'] = stats.to_dict()
-        player_data['league'] = league.to_dict()
-        player_data['team'] = team.to_dict()
+        # Posição e percentil em cada escopo (índice em memória, sem consultar o ranking)
+        player_data['ranks'] = rank_indexes.get(season).ranks(stats['spp_score'], stats['id'])
         
         return jsonify(player_data)
         
@@ -290,105 +282,105 @@ def get_player_spp(player_id):
 
 @spp_bp.route('/recalculate', methods=['POST'])
 def recalculate_spp_scores():
-    """Recalcula todas as pontuações SPP"""
+    """Recalcula as pontuações SPP (todas ou só as pendentes, com stale_only)"""
     try:
         season = request.json.get('season', 2023) if request.json else 2023
+        stale_only = bool(request.json.get('stale_only', False)) if request.json else False
         
-        updated_count = SPPCalculator.recalculate_all_scores(season)
+        result = SPPCalculator.recalculate_scores_streaming(season, stale_only=stale_only)
+        leaderboards = leaderboards_after_recalculation(result, [season])
         
         return jsonify({
             'message': f'Pontuações SPP recalculadas com sucesso',
-            'updated_players': updated_count,
+            'updated_players': result['rows_changed'],
+            'rows_scanned': result['rows_scanned'],
+            'elapsed_seconds': result['elapsed_seconds'],
+            'stale_only': stale_only,
+            'leaderboard_build_seconds': leaderboards['seconds'],
             'season': season
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@spp_bp.route('/recalculate/all', methods=['POST'])
+def recalculate_all_seasons():
+    """Enfileira o recálculo de várias temporadas, particionado por (temporada, liga) em vários processos"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        job = job_runner.submit(
+            'recalculate', _recalculate_parallel_job,
+            seasons=data.get('seasons'),
+            processes=data.get('processes'),
+            stale_only=bool(data.get('stale_only', False))
+        )
+        return jsonify({
+            'message': 'Recálculo enfileirado',
+            'job_id': job.id,
+            'status_url': f'/api/jobs/{job.id}'
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@spp_bp.route('/leaderboards', methods=['GET'])
+def list_leaderboard_builds():
+    """Lista as gerações ativas dos rankings materializados (tamanho e tempo de construção)"""
+    try:
+        builds = LeaderboardBuild.query.filter_by(status='active').order_by(LeaderboardBuild.season.desc()).all()
+        return jsonify([build.to_dict() for build in builds])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@spp_bp.route('/leaderboards/rebuild', methods=['POST'])
+def rebuild_leaderboard_tables():
+    """Reconstrói os rankings materializados (todas as temporadas ou as indicadas)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        result = rebuild_leaderboards(data.get('seasons'))
+        return jsonify(result)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @spp_bp.route('/stats/overview', methods=['GET'])
+@conditional_get
 def get_stats_overview():
     """Retorna estatísticas gerais do sistema"""
     try:
         season = request.args.get('season', 2023, type=int)
         
-        # Contar jogadores por liga
-        leagues_stats = db.session.query(
-            League.id,
-            League.name,
-            League.country,
-            db.func.count(PlayerStatistics.player_id).label('player_count'),
-            db.func.avg(PlayerStatistics.spp_score).label('avg_spp'),
-            db.func.max(PlayerStatistics.spp_score).label('max_spp')
-        ).join(
-            PlayerStatistics, League.id == PlayerStatistics.league_id
-        ).filter(
-            PlayerStatistics.season == season
-        ).group_by(
-            League.id, League.name, League.country
-        ).all()
-        
-        # Estatísticas por posição
-        position_stats = db.session.query(
-            PlayerStatistics.games_position,
-            db.func.count(PlayerStatistics.player_id).label('count'),
-            db.func.avg(PlayerStatistics.spp_score).label('avg_spp')
-        ).filter(
-            PlayerStatistics.season == season,
-            PlayerStatistics.games_position.isnot(None)
-        ).group_by(
-            PlayerStatistics.games_position
-        ).all()
-        
-        # Top 10 jogadores
-        top_players = db.session.query(
-            Player.name,
-            PlayerStatistics.spp_score,
-            League.name.label('league_name'),
-            Team.name.label('team_name')
-        ).join(
-            PlayerStatistics, Player.id == PlayerStatistics.player_id
-        ).join(
-            League, PlayerStatistics.league_id == League.id
-        ).join(
-            Team, PlayerStatistics.team_id == Team.id
-        ).filter(
-            PlayerStatistics.season == season
-        ).order_by(
-            PlayerStatistics.spp_score.desc()
-        ).limit(10).all()
-        
-        return jsonify({
-            'season': season,
-            'leagues': [
-                {
-                    'id': league_id,
-                    'name': name,
-                    'country': country,
-                    'player_count': player_count,
-                    'avg_spp': round(float(avg_spp), 2) if avg_spp else 0,
-                    'max_spp': round(float(max_spp), 2) if max_spp else 0
-                }
-                for league_id, name, country, player_count, avg_spp, max_spp in leagues_stats
-            ],
-            'positions': [
-                {
-                    'position': position,
-                    'count': count,
-                    'avg_spp': round(float(avg_spp), 2) if avg_spp else 0
-                }
-                for position, count, avg_spp in position_stats
-            ],
-            'top_players': [
-                {
-                    'name': name,
-                    'spp_score': round(float(spp_score), 2),
-                    'league': league_name,
-                    'team': team_name
-                }
-                for name, spp_score, league_name, team_name in top_players
-            ]
-        })
+        # Uma varredura por temporada, reaproveitada até a próxima mudança dos dados
+        return jsonify(get_overview(season))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _recalculate_parallel_job(progress: JobProgress, seasons: list = None, processes: int = None,
+                              stale_only: bool = False) -> str:
+    """Job de recálculo paralelo (tempos por partição ficam no resultado do job)"""
+    from src.services.parallel_recalc import recalculate_parallel
+    
+    result = recalculate_parallel(seasons, processes=processes, stale_only=stale_only, progress=progress)
+    result['leaderboards'] = leaderboards_after_recalculation(result, seasons)
+    progress.set_result(result)
+    return (f"{result['rows_changed']} de {result['rows_scanned']} pontuações alteradas em "
+            f"{result['partitions']} partições ({result['processes']} processos, {result['elapsed_seconds']}s); "
+            f"rankings reconstruídos em {result['leaderboards']['seconds']}s")
+
+def _page_args(default_limit: int) -> tuple:
+    """Limite, cursor e campos (fields=) da requisição; ValueError se algum for inválido"""
+    return (parse_limit(request.args.get('limit'), default_limit), decode_cursor(request.args.get('cursor')),
+            parse_fields(request.args.get('fields')))
+
+def _materialized_items(materialized: list, fields: list, item_format) -> list:
+    """Itens de um ranking materializado: só os campos pedidos, ou no formato padrão da rota"""
+    if fields:
+        return [pick_fields(payload, fields, rank) for rank, payload in materialized]
+    return [item_format(rank, payload) for rank, payload in materialized]
+
+def _compact_item(item: dict) -> dict:
+    """Item lido com COMPACT_FIELDS no formato dos rankings global e por posição"""
+    return compact_ranking_item(item['rank'], item)
@@ -0,0 +1,254 @@
+from typing import Dict, List, Optional, Sequence
+from src.models.user import db
+from src.models.player import PlayerStatistics
+from src.models.league import League
+from src.services.spp_calculator import SPPCalculator
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele, o cálculo escalar é usado
+    np = None
+
+# Colunas numéricas usadas pelo SPP (NULL é tratado como 0, como no cálculo escalar)
+STAT_COLUMNS = [
+    'goals_total', 'goals_assists', 'goals_saves', 'goals_conceded',
+    'tackles_total', 'tackles_interceptions', 'tackles_blocks',
+    'passes_key', 'passes_accuracy', 'dribbles_success',
+    'cards_yellow', 'cards_red', 'penalty_missed', 'penalty_scored',
+    'games_minutes', 'games_appearences', 'games_captain'
+]
+
+# Pesos padrão usados por SPPCalculator.calculate_spp_score quando a posição não define o peso
+WEIGHT_DEFAULTS = {
+    'goals': 6.0,
+    'assists': 4.0,
+    'clean_sheets': 4.0,
+    'saves': 0.5,
+    'goals_conceded': -2.0,
+    'tackles': 0.8,
+    'interceptions': 0.6,
+    'blocks': 0.5,
+    'key_passes': 0.8,
+    'dribbles': 0.5,
+    'pass_accuracy_bonus': 0.1
+}
+
+CATEGORIES = ['Goalkeeper', 'Defender', 'Midfielder', 'Attacker']
+
+# Código das categorias gravadas fora de CATEGORIES: pesos de meio-campista
+# e nenhum termo específico de posição, como no cálculo escalar
+OTHER_CATEGORY = len(CATEGORIES)
+
+# Tipo de estimativa de clean sheets (ver SPPCalculator._calculate_clean_sheets)
+CLEAN_SHEETS_NONE, CLEAN_SHEETS_GOALKEEPER, CLEAN_SHEETS_DEFENDER = 0, 1, 2
+
+
+def is_available() -> bool:
+    """Indica se o motor vetorizado pode ser usado (NumPy instalado)"""
+    return np is not None
+
+
+class StatColumns:
+    """
+    Estatísticas de um conjunto de linhas de player_statistics em formato colunar
+
+    Cada coluna de STAT_COLUMNS vira um array NumPy; a posição é reduzida a
+    códigos de categoria (a gravada na ingestão, ou derivada de games_position
+    quando NULL) e de tipo de clean sheet, classificando apenas os pares
+    distintos de valores.
+    """
+
+    def __init__(self, ids, current_scores, positions: Sequence[Optional[str]],
+                 position_categories: Sequence[Optional[str]],
+                 columns: Dict[str, 'np.ndarray'], ratings, league_multipliers):
+        self.ids = ids
+        self.current_scores = current_scores
+        self.positions = positions
+        self.columns = columns
+        self.ratings = ratings
+        self.league_multipliers = league_multipliers
+        self.categories, self.clean_sheet_kinds = _classify_positions(positions, position_categories)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> 'StatColumns':
+        """
+        Monta as colunas a partir das linhas de stat_columns_query
+
+        Args:
+            rows: Tuplas (id, spp_score, games_position, position_category, games_rating,
+                multiplicador, *STAT_COLUMNS)
+        """
+        if not rows:
+            empty_int = np.zeros(0, dtype=np.int64)
+            return cls(empty_int, np.zeros(0), [], [], {name: empty_int for name in STAT_COLUMNS},
+                       np.zeros(0), np.zeros(0))
+
+        transposed = list(zip(*rows))
+        ids = np.asarray(transposed[0], dtype=np.int64)
+        current_scores = np.asarray([score if score is not None else np.nan for score in transposed[1]], dtype=np.float64)
+        positions = list(transposed[2])
+        position_categories = list(transposed[3])
+        ratings = np.asarray(transposed[4], dtype=np.float64)
+        league_multipliers = np.asarray(transposed[5], dtype=np.float64)
+        columns = {
+            name: np.asarray(transposed[6 + index], dtype=np.int64)
+            for index, name in enumerate(STAT_COLUMNS)
+        }
+        return cls(ids, current_scores, positions, position_categories, columns, ratings, league_multipliers)
+
+
+def stat_columns_query():
+    """
+    Consulta (só colunas, sem entidades ORM) com tudo que o SPP precisa
+
+    NULLs viram 0 no próprio SQL e o multiplicador da liga segue a regra
+    ``spp_multiplier or 1.0`` do cálculo escalar. A categoria de posição vem
+    crua: NULL significa derivar de games_position, como no cálculo escalar.
+    """
+    coalesce = db.func.coalesce
+    return db.select(
+        PlayerStatistics.id,
+        PlayerStatistics.spp_score,
+        PlayerStatistics.games_position,
+        PlayerStatistics.position_category,
+        coalesce(PlayerStatistics.games_rating, 0.0),
+        coalesce(db.func.nullif(League.spp_multiplier, 0), 1.0),
+        *[coalesce(getattr(PlayerStatistics, name), 0) for name in STAT_COLUMNS]
+    ).join(
+        League, PlayerStatistics.league_id == League.id
+    )
+
+
+def load_season_columns(season: int) -> StatColumns:
+    """
+    Carrega as estatísticas de uma temporada em formato colunar
+
+    Args:
+        season: Temporada
+
+    Returns:
+        StatColumns com todas as linhas da temporada
+    """
+    rows = db.session.execute(stat_columns_query().where(PlayerStatistics.season == season)).all()
+    return StatColumns.from_rows(rows)
+
+
+def score_columns(data: StatColumns) -> 'np.ndarray':
+    """
+    Calcula o SPP de todas as linhas com operações vetorizadas
+
+    Reproduz SPPCalculator.calculate_spp_score termo a termo e na mesma ordem
+    de soma; termos que não se aplicam à categoria somam 0.0, o que mantém o
+    resultado bit a bit igual ao do cálculo escalar.
+
+    Args:
+        data: Estatísticas em formato colunar
+
+    Returns:
+        Array com a pontuação SPP de cada linha
+    """
+    c = data.columns
+    category = data.categories
+    goalkeeper = category == CATEGORIES.index('Goalkeeper')
+    defender = category == CATEGORIES.index('Defender')
+    midfielder = category == CATEGORIES.index('Midfielder')
+    attacker = category == CATEGORIES.index('Attacker')
+
+    def weight(name: str) -> 'np.ndarray':
+        """Peso por linha, de acordo com a categoria da posição"""
+        table = np.asarray([
+            SPPCalculator.POSITION_MULTIPLIERS[cat].get(name, WEIGHT_DEFAULTS[name])
+            for cat in CATEGORIES + ['Midfielder']
+        ], dtype=np.float64)
+        return table[category]
+
+    zero = np.zeros(len(data), dtype=np.float64)
+    base = zero.copy()
+
+    base = base + c['goals_total'] * weight('goals')
+    base = base + c['goals_assists'] * weight('assists')
+
+    clean_sheets = _clean_sheets(data)
+    base = base + np.where(goalkeeper | defender, clean_sheets * weight('clean_sheets'), zero)
+
+    base = base + np.where(goalkeeper, c['goals_saves'] * weight('saves'), zero)
+    base = base + np.where(goalkeeper, c['goals_conceded'] * weight('goals_conceded'), zero)
+
+    base = base + c['tackles_total'] * weight('tackles')
+    base = base + c['tackles_interceptions'] * weight('interceptions')
+    base = base + c['tackles_blocks'] * weight('blocks')
+
+    base = base + np.where(midfielder | attacker, c['passes_key'] * weight('key_passes'), zero)
+    base = base + np.where(attacker, c['dribbles_success'] * weight('dribbles'), zero)
+
+    accuracy = c['passes_accuracy']
+    base = base + np.where(midfielder & (accuracy > 85), (accuracy - 85) * weight('pass_accuracy_bonus'), zero)
+
+    base = base + c['cards_yellow'] * SPPCalculator.PENALTIES['yellow_card']
+    base = base + c['cards_red'] * SPPCalculator.PENALTIES['red_card']
+    base = base + c['penalty_missed'] * SPPCalculator.PENALTIES['penalty_missed']
+    base = base + c['penalty_scored'] * SPPCalculator.BONUSES['penalty_scored']
+
+    base = np.where(c['games_captain'] != 0, base * SPPCalculator.BONUSES['captain_bonus'], base)
+
+    ratings = data.ratings
+    base = np.where(ratings > 8.0, base + SPPCalculator.BONUSES['high_rating_bonus'] * (ratings - 8.0), base)
+
+    final_score = base * data.league_multipliers
+
+    minutes = c['games_minutes']
+    final_score = np.where(minutes > 0, final_score * np.minimum(minutes / 2700, 1.0), final_score)
+
+    return np.maximum(final_score, 0.0)
+
+
+def _clean_sheets(data: StatColumns) -> 'np.ndarray':
+    """Estimativa vetorizada de SPPCalculator._calculate_clean_sheets"""
+    c = data.columns
+    appearences = c['games_appearences']
+    conceded = c['goals_conceded']
+    ratings = data.ratings
+    kind = data.clean_sheet_kinds
+
+    goalkeeper_estimate = np.minimum(np.maximum(0, appearences - conceded), appearences)
+    goalkeeper_estimate = np.where(appearences > 0, goalkeeper_estimate, 0)
+
+    defender_ratio = np.where(ratings > 7.0, 0.4, np.where(ratings > 6.5, 0.3, 0.2))
+    defender_estimate = np.trunc(appearences * defender_ratio).astype(np.int64)
+    defender_estimate = np.where((appearences > 0) & (ratings > 0), defender_estimate, 0)
+
+    return np.where(
+        kind == CLEAN_SHEETS_GOALKEEPER, goalkeeper_estimate,
+        np.where(kind == CLEAN_SHEETS_DEFENDER, defender_estimate, 0)
+    )
+
+
+def _classify_positions(positions: Sequence[Optional[str]], position_categories: Sequence[Optional[str]]):
+    """
+    Classifica cada par distinto (games_position, position_category) uma única vez
+
+    A categoria gravada tem precedência e games_position só é usado quando ela
+    é NULL (``position_category or _get_position_category(...)``, como em
+    calculate_spp_score); o tipo de clean sheet sempre vem de games_position.
+    """
+    pairs = list(zip(positions, position_categories))
+    lookup = {}
+    for pair in set(pairs):
+        position, stored_category = pair
+        category_name = stored_category or SPPCalculator._get_position_category(position)
+        category = CATEGORIES.index(category_name) if category_name in CATEGORIES else OTHER_CATEGORY
+        lowered = position.lower() if position else ''
+        if position and 'goalkeeper' in lowered:
+            kind = CLEAN_SHEETS_GOALKEEPER
+        elif position and any(word in lowered for word in ['back', 'defender']):
+            kind = CLEAN_SHEETS_DEFENDER
+        else:
+            kind = CLEAN_SHEETS_NONE
+        lookup[pair] = (category, kind)
+
+    categories = np.fromiter((lookup[pair][0] for pair in pairs), dtype=np.int64, count=len(pairs))
+    kinds = np.fromiter((lookup[pair][1] for pair in pairs), dtype=np.int64, count=len(pairs))
+    return categories, kinds
@@ -0,0 +1,187 @@
+import math
+from typing import Dict, List
+from src.models.user import db
+from src.models.league import League
+from src.models.player import Player, Team, PlayerStatistics
+from src.services.spp_calculator import SPPCalculator
+from src.services.ranking_cache import current_data_version
+from src.services.ranking_fields import RANKING_ORDER
+
+# Percentis de SPP calculados por liga e por posição
+OVERVIEW_PERCENTILES = (50, 90, 99)
+
+# Ordem das categorias de posição na resposta
+POSITION_CATEGORIES = ['Goalkeeper', 'Defender', 'Midfielder', 'Attacker']
+
+TOP_PLAYERS = 10
+
+# temporada -> (versão dos dados, visão geral)
+_overviews = {}
+
+
+def overview_scan(season: int):
+    """
+    Consulta única da visão geral: uma linha por estatística da temporada, na ordem dos rankings
+
+    Percorre o índice (season, spp_score) de trás para frente, sem ordenação
+    temporária; os grupos saem com as pontuações já em ordem decrescente.
+    """
+    return db.select(
+        PlayerStatistics.league_id,
+        PlayerStatistics.position_category,
+        PlayerStatistics.games_position,
+        PlayerStatistics.spp_score,
+        PlayerStatistics.player_id,
+        PlayerStatistics.team_id
+    ).where(
+        PlayerStatistics.season == season
+    ).order_by(*RANKING_ORDER)
+
+
+def _percentile(descending: List[float], percent: float) -> float:
+    """Percentil com interpolação linear (como numpy.percentile) de pontuações em ordem decrescente"""
+    position = (len(descending) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(descending) - 1)
+    low_value = descending[len(descending) - 1 - lower]
+    high_value = descending[len(descending) - 1 - upper]
+    return low_value + (high_value - low_value) * (position - lower)
+
+
+def _summary(count: int, scores: List[float]) -> Dict:
+    """Contagem, média, máximo e percentis de um grupo (pontuações NULL ficam fora, como em AVG/MAX)"""
+    return {
+        'count': count,
+        'avg_spp': round(math.fsum(scores) / len(scores), 2) if scores else 0,
+        'max_spp': round(scores[0], 2) if scores else 0,
+        'percentiles': {
+            f'p{percent}': round(_percentile(scores, percent), 2) if scores else 0
+            for percent in OVERVIEW_PERCENTILES
+        }
+    }
+
+
+def _top_players(rows: List[tuple], leagues: Dict[int, tuple]) -> List[Dict]:
+    """
+    Primeiros jogadores da temporada, lidos das linhas já ordenadas da varredura
+
+    Só os nomes são buscados, por chave primária e em lotes de TOP_PLAYERS;
+    linhas sem jogador, liga ou time cadastrados ficam de fora, como no join
+    das rotas de ranking.
+    """
+    top = []
+    start = 0
+    while len(top) < TOP_PLAYERS and start < len(rows):
+        batch = rows[start:start + TOP_PLAYERS]
+        start += TOP_PLAYERS
+        players = dict(db.session.execute(
+            db.select(Player.id, Player.name).where(Player.id.in_({row.player_id for row in batch}))
+        ).all())
+        teams = dict(db.session.execute(
+            db.select(Team.id, Team.name).where(Team.id.in_({row.team_id for row in batch}))
+        ).all())
+        for row in batch:
+            if row.player_id in players and row.team_id in teams and row.league_id in leagues:
+                top.append({
+                    'name': players[row.player_id],
+                    'spp_score': round(float(row.spp_score or 0), 2),
+                    'league': leagues[row.league_id][0],
+                    'team': teams[row.team_id]
+                })
+                if len(top) == TOP_PLAYERS:
+                    break
+    return top
+
+
+def build_overview(season: int) -> Dict:
+    """
+    Calcula a visão geral de uma temporada numa única varredura de player_statistics
+
+    Agregados por liga e por categoria de posição (posição gravada na
+    ingestão, ou derivada de games_position), percentis de SPP de cada grupo
+    e os melhores jogadores saem das mesmas linhas. As demais leituras são
+    por chave primária (ligas e os nomes do top 10).
+
+    Args:
+        season: Temporada
+
+    Returns:
+        Dict no formato de /api/spp/stats/overview
+    """
+    # Linhas como tuplas simples (sem a camada ORM): a varredura lê a temporada inteira
+    rows = db.session.connection().execute(overview_scan(season)).all()
+
+    league_groups = {}
+    position_groups = {}
+    categories = {}
+    for league_id, position_category, games_position, spp_score, _, _ in rows:
+        league_group = league_groups.get(league_id)
+        if league_group is None:
+            league_group = league_groups[league_id] = [0, []]
+        league_group[0] += 1
+
+        category = position_category
+        if category is None and games_position:
+            category = categories.get(games_position)
+            if category is None:
+                category = categories[games_position] = SPPCalculator._get_position_category(games_position)
+        position_group = None
+        if category is not None:
+            position_group = position_groups.get(category)
+            if position_group is None:
+                position_group = position_groups[category] = [0, []]
+            position_group[0] += 1
+
+        if spp_score is not None:
+            league_group[1].append(spp_score)
+            if position_group is not None:
+                position_group[1].append(spp_score)
+
+    leagues = {
+        league_id: (name, country) for league_id, name, country in db.session.execute(
+            db.select(League.id, League.name, League.country).where(League.id.in_(list(league_groups)))
+        ).all()
+    }
+
+    league_stats = []
+    for league_id in sorted(league_id for league_id in league_groups if league_id in leagues):
+        summary = _summary(*league_groups[league_id])
+        name, country = leagues[league_id]
+        league_stats.append({
+            'id': league_id,
+            'name': name,
+            'country': country,
+            'player_count': summary.pop('count'),
+            **summary
+        })
+
+    position_stats = [
+        {'position': category, **_summary(*position_groups[category])}
+        for category in sorted(position_groups, key=lambda category: (
+            POSITION_CATEGORIES.index(category) if category in POSITION_CATEGORIES else len(POSITION_CATEGORIES),
+            category
+        ))
+    ]
+
+    return {
+        'season': season,
+        'leagues': league_stats,
+        'positions': position_stats,
+        'top_players': _top_players(rows, leagues)
+    }
+
+
+def get_overview(season: int) -> Dict:
+    """
+    Visão geral da temporada, reaproveitada enquanto a versão dos dados não mudar
+
+    Returns:
+        Dict no formato de /api/spp/stats/overview
+    """
+    version = current_data_version()
+    cached = _overviews.get(season)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    overview = build_overview(season)
+    _overviews[season] = (version, overview)
+    return overview
@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from src.models.user import db
+from src.models.league import League
+from src.models.job import SyncCheckpoint
+from src.services.api_football import APIFootballService, RequestStats, LEAGUE_CONFIG
+from src.services.ingest import IngestStats, ingest_players_page
+from src.services.jobs import JobProgress
+from src.services.rate_limiter import RateLimitExceeded
+from src.services.sync_service import sync_leagues
+
+# Intervalo mínimo entre duas sincronizações completas da temporada corrente
+CURRENT_SEASON_REFRESH = timedelta(hours=12)
+
+
+class WorkUnit:
+    """Uma liga/temporada a sincronizar, a partir de uma página inicial"""
+
+    def __init__(self, league_id: int, season: int, start_page: int = 1,
+                 total_pages: int = None, priority: tuple = ()):
+        self.league_id = league_id
+        self.season = season
+        self.start_page = start_page
+        self.total_pages = total_pages
+        self.priority = priority
+
+    @property
+    def estimated_requests(self) -> Optional[int]:
+        """Requisições restantes estimadas (None se o total de páginas ainda não é conhecido)"""
+        if self.total_pages is None:
+            return None
+        return max(self.total_pages - self.start_page + 1, 1)
+
+    def to_dict(self) -> Dict:
+        return {
+            'league_id': self.league_id,
+            'season': self.season,
+            'start_page': self.start_page,
+            'total_pages': self.total_pages
+        }
+
+
+def plan_work_units(seasons: List[int], current_season: int, force: bool = False) -> List[WorkUnit]:
+    """
+    Planeja as unidades de trabalho (liga, temporada, página inicial) de LEAGUE_CONFIG
+
+    Unidades concluídas de temporadas encerradas são ignoradas; a temporada
+    corrente é refeita quando a última sincronização completa ficou mais
+    antiga que CURRENT_SEASON_REFRESH. Unidades interrompidas retomam da
+    página seguinte ao último checkpoint.
+
+    Args:
+        seasons: Temporadas a sincronizar
+        current_season: Temporada corrente (sincronizada primeiro)
+        force: Refaz tudo a partir da página 1, ignorando checkpoints
+
+    Returns:
+        Unidades ordenadas por prioridade
+    """
+    checkpoints = {
+        (checkpoint.league_id, checkpoint.season): checkpoint
+        for checkpoint in SyncCheckpoint.query.filter(SyncCheckpoint.season.in_(seasons)).all()
+    }
+    now = datetime.utcnow()
+
+    units = []
+    for season in seasons:
+        for league_id, config in LEAGUE_CONFIG.items():
+            checkpoint = checkpoints.get((league_id, season))
+            start_page = 1
+            total_pages = None
+
+            if checkpoint and not force:
+                total_pages = checkpoint.total_pages
+                if checkpoint.status == 'done':
+                    stale = checkpoint.updated_at is None or now - checkpoint.updated_at > CURRENT_SEASON_REFRESH
+                    if season != current_season or not stale:
+                        continue
+                else:
+                    start_page = checkpoint.last_page + 1
+
+            # Temporada corrente primeiro, depois as mais recentes; dentro da
+            # temporada, ligas de maior peso no SPP primeiro
+            priority = (season != current_season, -season, -config['multiplier'], league_id)
+            units.append(WorkUnit(league_id, season, start_page, total_pages, priority))
+
+    units.sort(key=lambda unit: unit.priority)
+    return units
+
+
+def run_full_sync(api_service: APIFootballService, seasons: List[int], current_season: int = None,
+                  progress: Optional[JobProgress] = None, max_workers: int = 4, force: bool = False) -> str:
+    """
+    Sincroniza todas as ligas de LEAGUE_CONFIG nas temporadas indicadas, com checkpoints
+
+    Cada página é gravada junto com o seu checkpoint na mesma transação, de
+    modo que uma execução interrompida (queda do processo, cota esgotada)
+    retoma exatamente da próxima página. Unidades cujo custo estimado excede a
+    cota diária disponível são adiadas para a próxima execução.
+
+    Args:
+        api_service: Cliente da API Football
+        seasons: Temporadas a sincronizar
+        current_season: Temporada corrente (padrão: a mais recente de seasons)
+        progress: Registro de progresso do job (opcional)
+        max_workers: Número máximo de páginas buscadas em paralelo
+        force: Ignora checkpoints e refaz tudo
+
+    Returns:
+        Mensagem de resumo
+    """
+    current_season = current_season or max(seasons)
+    request_stats = RequestStats()
+    ingest_stats = IngestStats()
+
+    # As estatísticas dependem das ligas cadastradas
+    if League.query.filter(League.id.in_(list(LEAGUE_CONFIG))).count() < len(LEAGUE_CONFIG):
+        sync_leagues(api_service, request_stats=request_stats)
+    known_leagues = {league_id for (league_id,) in db.session.query(League.id).all()}
+
+    units = plan_work_units(seasons, current_season, force=force)
+    planned_pages = {(unit.league_id, unit.season): unit.estimated_requests or 0 for unit in units}
+    pages_done = 0
+    completed = 0
+    deferred = []
+
+    for unit in units:
+        if unit.league_id not in known_leagues:
+            if progress:
+                progress.add_error(f'Liga {unit.league_id} não encontrada na API; unidade ignorada')
+            continue
+
+        available = api_service.rate_limiter.status().get('day', {}).get('available')
+        if unit.estimated_requests is not None and available is not None and unit.estimated_requests > available:
+            deferred.append(unit)
+            planned_pages.pop((unit.league_id, unit.season), None)
+            continue
+
+        if progress:
+            progress.update(message=f'Liga {unit.league_id} / {unit.season} a partir da página {unit.start_page}')
+
+        try:
+            for page, total_pages, players_data in api_service.iter_players_statistics_pages(
+                unit.league_id, unit.season, start_page=unit.start_page,
+                max_workers=max_workers, stats=request_stats
+            ):
+                ingest_players_page(players_data, unit.season, unit.league_id, stats=ingest_stats)
+                _save_checkpoint(unit.league_id, unit.season, page, total_pages,
+                                 'done' if page >= total_pages else 'in_progress')
+                db.session.commit()
+
+                pages_done += 1
+                planned_pages[(unit.league_id, unit.season)] = total_pages - unit.start_page + 1
+                if progress:
+                    progress.update(pages_done=pages_done, pages_total=sum(planned_pages.values()),
+                                    rows_written=ingest_stats.rows, api_usage=request_stats.to_dict())
+        except RateLimitExceeded as e:
+            db.session.rollback()
+            if progress:
+                progress.add_error(str(e))
+            remaining = units[units.index(unit):]
+            return (f'Cota esgotada: {completed} unidades concluídas, {len(remaining) + len(deferred)} '
+                    f'pendentes para a próxima execução')
+
+        completed += 1
+
+    message = f'{completed} unidades concluídas, {pages_done} páginas gravadas'
+    if deferred:
+        message += f', {len(deferred)} adiadas por falta de cota'
+    return message
+
+
+def _save_checkpoint(league_id: int, season: int, page: int, total_pages: int, status: str):
+    """Atualiza o checkpoint da unidade (sem commit: acompanha a transação da página)"""
+    checkpoint = db.session.get(SyncCheckpoint, (league_id, season))
+    if checkpoint is None:
+        checkpoint = SyncCheckpoint(league_id=league_id, season=season)
+        db.session.add(checkpoint)
+    checkpoint.last_page = page
+    checkpoint.total_pages = total_pages
+    checkpoint.status = status
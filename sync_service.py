@@ -0,0 +1,204 @@
+import time
+from typing import Dict, Optional
+from src.models.user import db
+from src.models.league import League
+from src.models.player import PlayerStatistics
+from src.services.api_football import APIFootballService, RequestStats, LEAGUE_CONFIG
+from src.services.ingest import IngestStats, ingest_players_page
+from src.services.jobs import JobProgress
+from src.services.ranking_cache import bump_data_version
+from src.services.response_archive import ResponseArchive
+from src.services.spp_calculator import SPPCalculator
+
+
+def sync_leagues(api_service: APIFootballService, progress: Optional[JobProgress] = None,
+                 request_stats: RequestStats = None) -> str:
+    """
+    Sincroniza as ligas de LEAGUE_CONFIG com o banco local
+
+    As pontuações pendentes são recalculadas, mas os rankings materializados
+    não: quem chama reconstrói uma única vez ao fim do job (como nas
+    sincronizações de jogadores).
+
+    Args:
+        api_service: Cliente da API Football
+        progress: Registro de progresso do job (opcional)
+        request_stats: Contadores de uso da API (opcional)
+
+    Returns:
+        Mensagem de resumo
+    """
+    request_stats = request_stats or RequestStats()
+
+    # Uma única consulta cobre todas as ligas configuradas
+    leagues_data = {
+        league['league']['id']: league
+        for league in api_service.get_leagues(stats=request_stats)
+    }
+    if progress:
+        progress.update(pages_total=len(LEAGUE_CONFIG), api_usage=request_stats.to_dict())
+
+    synced_count = apply_leagues(leagues_data)
+    db.session.commit()
+    if progress:
+        progress.update(pages_done=len(LEAGUE_CONFIG), rows_written=synced_count, api_usage=request_stats.to_dict())
+
+    # Ligas com multiplicador alterado (ou configuração de pontuação nova) deixam linhas pendentes
+    rescored = sum(SPPCalculator.recalculate_stale_scores(rebuild=False).values())
+    bump_data_version()
+
+    message = f'{synced_count} ligas sincronizadas com sucesso'
+    if rescored:
+        message += f', {rescored} pontuações SPP atualizadas'
+    return message
+
+
+def apply_leagues(leagues_data: Dict[int, Dict]) -> int:
+    """
+    Grava as ligas de LEAGUE_CONFIG a partir dos itens de /leagues (sem commit)
+
+    Quando o multiplicador SPP de uma liga muda, as estatísticas dela ficam
+    marcadas como pendentes (spp_version nulo) para o próximo recálculo
+    incremental.
+
+    Args:
+        leagues_data: Itens da resposta de /leagues indexados pelo ID da liga
+
+    Returns:
+        Número de ligas gravadas
+    """
+    synced_count = 0
+
+    for league_id, config in LEAGUE_CONFIG.items():
+        league_data = leagues_data.get(league_id)
+        if not league_data:
+            continue
+
+        # Verificar se já existe no banco
+        existing_league = League.query.filter_by(id=league_id).first()
+
+        if existing_league:
+            # Atualizar dados existentes
+            existing_league.name = league_data['league']['name']
+            existing_league.country = config['country']
+            existing_league.logo = league_data['league']['logo']
+            existing_league.type = league_data['league']['type']
+            if existing_league.spp_multiplier != config['multiplier']:
+                PlayerStatistics.query.filter_by(league_id=league_id).update(
+                    {'spp_version': None}, synchronize_session=False
+                )
+            existing_league.spp_multiplier = config['multiplier']
+        else:
+            # Criar nova liga
+            new_league = League(
+                id=league_id,
+                name=league_data['league']['name'],
+                country=config['country'],
+                logo=league_data['league']['logo'],
+                type=league_data['league']['type'],
+                spp_multiplier=config['multiplier']
+            )
+            db.session.add(new_league)
+
+        synced_count += 1
+
+    return synced_count
+
+
+def sync_league_players(api_service: APIFootballService, league_id: int, season: int,
+                        progress: Optional[JobProgress] = None, max_workers: int = 4,
+                        request_stats: RequestStats = None, ingest_stats: IngestStats = None) -> str:
+    """
+    Sincroniza jogadores e estatísticas de uma liga/temporada
+
+    Args:
+        api_service: Cliente da API Football
+        league_id: ID da liga
+        season: Temporada
+        progress: Registro de progresso do job (opcional)
+        max_workers: Número máximo de páginas buscadas em paralelo
+        request_stats: Contadores de uso da API (opcional)
+        ingest_stats: Contadores de ingestão (opcional)
+
+    Returns:
+        Mensagem de resumo
+    """
+    request_stats = request_stats or RequestStats()
+    ingest_stats = ingest_stats or IngestStats()
+    synced_players = 0
+    pages_done = 0
+
+    # Páginas buscadas em paralelo (limitado pela cota) e entregues em ordem
+    for page, total_pages, players_data in api_service.iter_players_statistics_pages(
+        league_id, season, max_workers=max_workers, stats=request_stats
+    ):
+        # Times, jogadores e estatísticas gravados em lote (upsert por página)
+        synced_players += ingest_players_page(players_data, season, league_id, stats=ingest_stats)
+        db.session.commit()
+
+        pages_done += 1
+        if progress:
+            progress.update(
+                pages_done=pages_done,
+                pages_total=total_pages,
+                rows_written=ingest_stats.rows,
+                api_usage=request_stats.to_dict()
+            )
+
+    if pages_done:
+        bump_data_version()
+
+    return f'{synced_players} jogadores sincronizados com sucesso'
+
+
+def replay_archive(archive: ResponseArchive, league_id: int = None, season: int = None,
+                   recalculate: bool = True, commit_every: int = 50) -> Dict:
+    """
+    Reconstrói o banco a partir do arquivo de respostas brutas, sem acessar a API
+
+    As respostas de /leagues e /players são reaplicadas com as mesmas
+    transformações da sincronização online (apply_leagues e
+    ingest_players_page), na ordem em que foram baixadas: a resposta mais
+    recente de cada página prevalece.
+
+    Args:
+        archive: Arquivo de respostas
+        league_id: Reprocessa apenas esta liga (opcional)
+        season: Reprocessa apenas esta temporada (opcional)
+        recalculate: Recalcula as pontuações SPP pendentes (as linhas reprocessadas já são pontuadas na ingestão)
+        commit_every: Páginas por transação
+
+    Returns:
+        Dict com ligas, páginas, contadores de ingestão e temporadas recalculadas
+    """
+    started = time.perf_counter()
+    leagues_data = {}
+    for record in archive.iter_records('/leagues'):
+        for league in record['payload'].get('response', []):
+            leagues_data[league['league']['id']] = league
+    leagues = apply_leagues(leagues_data)
+    db.session.commit()
+
+    ingest_stats = IngestStats()
+    pages = 0
+    for record in archive.iter_records('/players', league_id=league_id, season=season):
+        params = record['params']
+        players_data = record['payload'].get('response', [])
+        if not players_data:
+            continue
+        ingest_players_page(players_data, int(params['season']), int(params['league']), stats=ingest_stats)
+        pages += 1
+        if pages % commit_every == 0:
+            db.session.commit()
+    db.session.commit()
+
+    recalculated = SPPCalculator.recalculate_stale_scores() if recalculate else {}
+    bump_data_version()
+
+    return {
+        'leagues': leagues,
+        'pages': pages,
+        'ingest': ingest_stats.to_dict(),
+        'recalculated': recalculated,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
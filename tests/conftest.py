@@ -0,0 +1,21 @@
+import pytest
+from flask import Flask
+
+from src.models.user import db
+from src.models import data_version, job, leaderboard, league, player  # noqa: F401 (tabelas do create_all)
+from src.models.migrations import apply_migrations
+
+
+@pytest.fixture
+def app():
+    """App mínimo com banco SQLite em memória e o esquema completo (create_all + migrações)"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        apply_migrations()
+        yield app
+        db.session.remove()
+        db.drop_all()
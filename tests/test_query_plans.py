@@ -0,0 +1,10 @@
+from src.services.query_plans import check_ranking_query_plans, ranking_queries
+
+
+def test_ranking_query_plans_use_indexes(app):
+    results = check_ranking_query_plans()
+
+    assert [result['name'] for result in results] == [query['name'] for query in ranking_queries()]
+    failures = {result['name']: result['plan'] for result in results if not result['ok']}
+    assert failures == {}
+
@@ -0,0 +1,42 @@
+import gzip
+import json
+
+import pytest
+
+from src.services import json_stream, ranking_cache
+from src.services.json_stream import compress_response
+from src.services.ranking_cache import RankingCache, cached_ranking
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    """Rota de ranking com cache próprio e compressão, contando as compressões feitas"""
+    monkeypatch.setattr(ranking_cache, 'ranking_cache', RankingCache())
+    monkeypatch.setattr(ranking_cache, '_version_memo', {})
+    compressions = []
+    gzip_body = json_stream.gzip_body
+    monkeypatch.setattr(json_stream, 'gzip_body', lambda *args: compressions.append(1) or gzip_body(*args))
+
+    @app.route('/ranking')
+    @cached_ranking
+    def ranking():
+        return {'ranking': [{'player': f'Jogador {index}', 'spp_score': index} for index in range(200)]}
+
+    app.after_request(compress_response)
+    client = app.test_client()
+    client.compressions = compressions
+    return client
+
+
+def test_cache_hits_reuse_the_gzip_body(client):
+    miss = client.get('/ranking', headers={'Accept-Encoding': 'gzip'})
+    hit = client.get('/ranking', headers={'Accept-Encoding': 'gzip'})
+    identity = client.get('/ranking')
+
+    assert [miss.headers['X-Cache'], hit.headers['X-Cache'], identity.headers['X-Cache']] == ['MISS', 'HIT', 'HIT']
+    assert miss.headers['Content-Encoding'] == hit.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Encoding' not in identity.headers
+    assert 'Accept-Encoding' in hit.headers['Vary'] and 'Accept-Encoding' in identity.headers['Vary']
+    assert gzip.decompress(hit.data) == gzip.decompress(miss.data) == identity.data
+    assert len(json.loads(identity.data)['ranking']) == 200
+    assert len(client.compressions) == 1
@@ -0,0 +1,93 @@
+import pytest
+
+from src.models.user import db
+from src.models.league import League
+from src.models.player import Player, Team, PlayerStatistics
+from src.services import ranking_cache, ranking_snapshot
+from src.services.leaderboard_service import (
+    decode_cursor, encode_cursor, next_cursor, payload_cursor_key, read_leaderboard, rebuild_leaderboards
+)
+from src.services.ranking_fields import FULL_FIELDS, ranking_page
+
+SEASON = 2023
+
+# Páginas que terminam antes, exatamente sobre e depois da primeira linha sem pontuação
+PAGE_SIZES = [4, 12, 20]
+
+
+@pytest.fixture
+def rankings(app, tmp_path, monkeypatch):
+    """Temporada com empates de pontuação e linhas sem pontuação (spp_score NULL); retorna a ordem esperada"""
+    monkeypatch.setattr(ranking_snapshot, 'SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(ranking_snapshot, '_snapshots', {})
+    monkeypatch.setattr(ranking_cache, '_version_memo', {})
+
+    db.session.add(League(id=1, name='Liga', country='X', spp_multiplier=1.0))
+    db.session.add(Team(id=1, name='Time'))
+    scores = [50.0, 42.5, 42.5, None, 30.0, None, 12.0, 12.0, 12.0, 7.5, None, 3.0, 1.0, 0.0]
+    for index, score in enumerate(scores, 1):
+        db.session.add(Player(id=index, name=f'Jogador {index}'))
+        db.session.add(PlayerStatistics(id=index, player_id=index, team_id=1, league_id=1, season=SEASON,
+                                        games_position='Midfielder', spp_score=score))
+    db.session.flush()
+    # O ORM troca None pelo padrão 0.0 da coluna
+    unscored = [index for index, score in enumerate(scores, 1) if score is None]
+    db.session.execute(
+        db.update(PlayerStatistics).where(PlayerStatistics.id.in_(unscored)).values(spp_score=None)
+    )
+    db.session.commit()
+
+    scored = [(score, index) for index, score in enumerate(scores, 1) if score is not None]
+    return [index for _, index in sorted(scored, reverse=True)]
+
+
+def _page_through(read_page, page_size: int):
+    """Percorre todas as páginas pelo cursor opaco, como um cliente; retorna os IDs na ordem recebida"""
+    stats_ids = []
+    after = None
+    while True:
+        items, last_key = read_page(after)
+        stats_ids.extend(item['statistics']['id'] for item in items)
+        cursor = next_cursor(last_key, len(items), page_size)
+        if cursor is None:
+            return stats_ids
+        after = decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('page_size', PAGE_SIZES)
+def test_sql_pages_skip_unscored_rows(rankings, page_size):
+    filters = [PlayerStatistics.season == SEASON]
+
+    stats_ids = _page_through(lambda after: ranking_page(filters, page_size, after=after, fields=FULL_FIELDS), page_size)
+
+    assert stats_ids == rankings
+
+
+@pytest.mark.parametrize('page_size', PAGE_SIZES)
+def test_materialized_pages_match_sql_order(rankings, page_size):
+    rebuild_leaderboards([SEASON])
+
+    def read_page(after):
+        materialized = read_leaderboard(SEASON, 'global', limit=page_size, after=after) or []
+        items = [payload for _, payload in materialized]
+        return items, payload_cursor_key(*materialized[-1]) if materialized else None
+
+    assert _page_through(read_page, page_size) == rankings
+
+
+@pytest.mark.parametrize('page_size', PAGE_SIZES)
+def test_snapshot_pages_match_sql_order(rankings, page_size):
+    pytest.importorskip('numpy')
+    rebuild_leaderboards([SEASON])
+
+    def read_page(after):
+        page = ranking_snapshot.snapshot_page(SEASON, 'global', '', page_size, after, FULL_FIELDS)
+        assert page is not None
+        return page
+
+    assert _page_through(read_page, page_size) == rankings
+
+
+def test_cursor_with_null_score_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(None, 4, 10))
@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from src.models.user import db
+from src.models.league import League
+from src.models.player import PlayerStatistics
+from src.services import spp_vectorized
+from src.services.spp_calculator import SPPCalculator
+from src.services.spp_vectorized import StatColumns, score_columns, stat_columns_query
+
+SEASON = 2023
+
+# Multiplicadores de liga: 0 e NULL caem na regra ``spp_multiplier or 1.0``
+LEAGUE_MULTIPLIERS = {1: 1.2, 2: 0.85, 3: 0.0, 4: None}
+
+# Valores de games_position vindos da API, incluindo grafias fora do padrão
+GAMES_POSITIONS = [
+    'Goalkeeper', 'Defender', 'Midfielder', 'Attacker', None, '', 'G', 'keeper',
+    'GOALKEEPER', 'Centre-Back', 'Left-Back ', 'Wing-Back', 'Right Winger',
+    'Attacking Midfield', 'Second Striker', 'Defensive Midfield', '  '
+]
+
+# Categorias gravadas na ingestão: NULL (derivar de games_position), a mesma
+# de games_position, uma divergente e valores fora das categorias conhecidas
+POSITION_CATEGORIES = [None, None, None, 'Goalkeeper', 'Defender', 'Midfielder', 'Attacker', '', 'Coach']
+
+
+def _stat(rng: random.Random, low: int, high: int):
+    """Valor inteiro aleatório, NULL em parte das linhas"""
+    return None if rng.random() < 0.15 else rng.randint(low, high)
+
+
+def _seed_statistics(rows: int, seed: int = 2023):
+    """Grava ligas e linhas aleatórias (reprodutíveis) de player_statistics"""
+    rng = random.Random(seed)
+    for league_id, multiplier in LEAGUE_MULTIPLIERS.items():
+        db.session.add(League(id=league_id, name=f'Liga {league_id}', country='X', spp_multiplier=multiplier))
+
+    for index in range(rows):
+        db.session.add(PlayerStatistics(
+            player_id=index + 1,
+            team_id=1,
+            league_id=rng.choice(list(LEAGUE_MULTIPLIERS)),
+            season=SEASON,
+            games_position=rng.choice(GAMES_POSITIONS),
+            position_category=rng.choice(POSITION_CATEGORIES),
+            games_rating=None if rng.random() < 0.2 else round(rng.uniform(5.0, 9.8), 6),
+            games_captain=rng.choice([None, True, False]),
+            games_minutes=_stat(rng, 0, 4000),
+            games_appearences=_stat(rng, 0, 40),
+            goals_total=_stat(rng, 0, 30),
+            goals_assists=_stat(rng, 0, 20),
+            goals_saves=_stat(rng, 0, 120),
+            goals_conceded=_stat(rng, 0, 70),
+            tackles_total=_stat(rng, 0, 100),
+            tackles_interceptions=_stat(rng, 0, 60),
+            tackles_blocks=_stat(rng, 0, 30),
+            passes_key=_stat(rng, 0, 80),
+            passes_accuracy=_stat(rng, 40, 99),
+            dribbles_success=_stat(rng, 0, 60),
+            cards_yellow=_stat(rng, 0, 12),
+            cards_red=_stat(rng, 0, 3),
+            penalty_missed=_stat(rng, 0, 3),
+            penalty_scored=_stat(rng, 0, 8),
+            spp_score=None if rng.random() < 0.5 else round(rng.uniform(0, 500), 2)
+        ))
+    db.session.commit()
+
+
+def _scalar_scores():
+    """Pontuação de cada linha pelo cálculo escalar, a partir das entidades ORM"""
+    rows = db.session.query(PlayerStatistics, League).join(League, PlayerStatistics.league_id == League.id)
+    return {stats.id: SPPCalculator.calculate_spp_score(stats, league) for stats, league in rows}
+
+
+def _columns():
+    rows = db.session.execute(stat_columns_query().where(PlayerStatistics.season == SEASON)).all()
+    return rows, StatColumns.from_rows(rows)
+
+
+def test_score_columns_matches_scalar_exactly(app):
+    _seed_statistics(3000)
+    expected = _scalar_scores()
+
+    _, data = _columns()
+    vectorized = dict(zip(data.ids.tolist(), score_columns(data).tolist()))
+
+    assert len(vectorized) == len(expected)
+    mismatches = {stats_id: (score, vectorized[stats_id])
+                  for stats_id, score in expected.items() if vectorized[stats_id] != score}
+    assert mismatches == {}
+
+
+def test_stored_position_category_takes_precedence(app):
+    _seed_statistics(0)
+    # games_position de atacante, mas categoria gravada de goleiro
+    db.session.add(PlayerStatistics(
+        player_id=1, team_id=1, league_id=1, season=SEASON,
+        games_position='Attacker', position_category='Goalkeeper',
+        games_appearences=10, goals_conceded=4, goals_saves=30, dribbles_success=20
+    ))
+    db.session.commit()
+    expected = _scalar_scores()
+
+    _, data = _columns()
+
+    assert data.categories.tolist() == [spp_vectorized.CATEGORIES.index('Goalkeeper')]
+    assert score_columns(data).tolist() == list(expected.values())
+
+
+def test_changed_scores_match_with_and_without_numpy(app, monkeypatch):
+    _seed_statistics(1000, seed=7)
+    rows, _ = _columns()
+
+    vectorized = SPPCalculator.changed_scores_from_columns(rows)
+    monkeypatch.setattr(spp_vectorized, 'is_available', lambda: False)
+    scalar = SPPCalculator.changed_scores_from_columns(rows)
+
+    assert vectorized == scalar
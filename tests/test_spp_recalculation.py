@@ -0,0 +1,44 @@
+import pytest
+
+from src.models.user import db
+from src.models.league import League
+from src.models.player import PlayerStatistics
+from src.services import spp_vectorized
+from src.services.spp_calculator import SPPCalculator
+
+SEASON = 2023
+
+
+def _add_unscored_statistics(league_id: int) -> int:
+    """Grava uma linha sem pontuação (spp_score NULL, como em bancos anteriores ao cálculo na ingestão)"""
+    stats = PlayerStatistics(
+        player_id=1, team_id=1, league_id=league_id, season=SEASON, games_position='Attacker',
+        goals_total=10, goals_assists=5, games_minutes=2700
+    )
+    db.session.add(stats)
+    db.session.flush()
+    # O ORM troca None pelo padrão 0.0 da coluna
+    db.session.execute(db.update(PlayerStatistics).where(PlayerStatistics.id == stats.id).values(spp_score=None))
+    db.session.commit()
+    return stats.id
+
+
+@pytest.mark.parametrize('vectorized', [True, False])
+def test_unscored_rows_are_scored_and_stamped(app, monkeypatch, vectorized):
+    if vectorized:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(spp_vectorized, 'is_available', lambda: False)
+    db.session.add(League(id=1, name='Liga', country='X', spp_multiplier=1.0))
+    unscored = _add_unscored_statistics(1)
+    # Liga não cadastrada: a linha não passa pelo cálculo e deve continuar pendente
+    orphan = _add_unscored_statistics(99)
+
+    result = SPPCalculator.recalculate_scores_streaming(SEASON, rebuild=False)
+
+    assert result['rows_changed'] == 1
+    stats = db.session.get(PlayerStatistics, unscored)
+    assert stats.spp_score == pytest.approx(80.0)
+    assert stats.spp_version == SPPCalculator.config_fingerprint()
+    assert db.session.get(PlayerStatistics, orphan).spp_version is None
+    assert SPPCalculator.recalculate_scores_streaming(SEASON, stale_only=True, rebuild=False)['rows_changed'] == 0